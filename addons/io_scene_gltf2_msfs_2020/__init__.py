@@ -69,6 +69,12 @@ class MSFS2020_ExporterProperties(bpy.types.PropertyGroup):
         default=True,
     )
 
+    resolve_unique_id_collisions: bpy.props.BoolProperty(
+        name="Resolve Unique ID Collisions",
+        description="Add a suffix computed from the name of the node to the unique IDs already used by another node",
+        default=False,
+    )
+
 
 # endregion
 
@@ -136,6 +142,8 @@ if bpy.app.version < (4, 2, 0):
                     "use_unique_id",
                     text="Enable ASOBO Unique ID extension"
                 )
+                if props.use_unique_id:
+                    layout.prop(props, "resolve_unique_id_collisions")
 
 else:
 
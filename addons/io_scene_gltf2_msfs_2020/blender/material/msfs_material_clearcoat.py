@@ -62,25 +62,20 @@ class MSFS2020_Clearcoat(MSFS2020_Material):
         nodeClearcoatSeparate = self.getNodeByName(MSFS2020_ShaderNodes.clearcoatSeparate.value)
         nodePrincipledBSDF = self.getNodeByName(MSFS2020_ShaderNodes.principledBSDF.value)
 
+        clearcoatInput = nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.clearcoat.value]
+        clearcoatRoughnessInput = nodePrincipledBSDF.inputs[
+            MSFS2020_PrincipledBSDFInputs.clearcoatRoughness.value
+        ]
+
         if tex:
-            nodeClearcoat.image = tex
-            nodeClearcoat.image.colorspace_settings.name = "Non-Color"
+            self.setNodeImage(nodeClearcoat, tex, nonColor=True)
 
-            self.link(
-                nodeClearcoatSeparate.outputs[0], 
-                nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.clearcoat.value]
-            )
-            self.link(
-                nodeClearcoatSeparate.outputs[1], 
-                nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.clearcoatRoughness.value]
+            self.reconcileLinks(
+                [
+                    (nodeClearcoatSeparate.outputs[0], clearcoatInput),
+                    (nodeClearcoatSeparate.outputs[1], clearcoatRoughnessInput),
+                ]
             )
             return
         
-        self.unLinkNodeInput(
-            nodePrincipledBSDF,
-            MSFS2020_PrincipledBSDFInputs.clearcoat.value
-        )
-        self.unLinkNodeInput(
-            nodePrincipledBSDF,
-            MSFS2020_PrincipledBSDFInputs.clearcoatRoughness.value
-        )
+        self.reconcileLinks([], [clearcoatInput, clearcoatRoughnessInput])
@@ -63,15 +63,15 @@ class MSFS2020_Parallax(MSFS2020_Material):
         nodeBaseColorMulRGB = self.getNodeByName(MSFS2020_ShaderNodes.baseColorMulRGB.value)
         nodePrincipledBSDF = self.getNodeByName(MSFS2020_ShaderNodes.principledBSDF.value)
 
-        nodeBehindGlassTex.image = tex
-        self.updateColorLinks()
-        
+        self.setNodeImage(nodeBehindGlassTex, tex)
+
         ## TODO - check if this is good
-        self.link(
-            nodeBaseColorMulRGB.outputs[0],
-            nodeAlbedoDetailMix.inputs[1]
-        )
-        self.link(
-            nodeAlbedoDetailMix.outputs[0],
-            nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.baseColor.value]
+        self.updateColorLinks(
+            extraLinks=[
+                (nodeBaseColorMulRGB.outputs[0], nodeAlbedoDetailMix.inputs[1]),
+                (
+                    nodeAlbedoDetailMix.outputs[0],
+                    nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.baseColor.value],
+                ),
+            ]
         )
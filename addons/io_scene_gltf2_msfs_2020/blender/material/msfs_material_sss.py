@@ -32,6 +32,7 @@ class MSFS2020_SSS(MSFS2020_Material):
             return
         
         nodePrincipledBSDF = self.getNodeByName(MSFS2020_ShaderNodes.principledBSDF.value)
-        nodePrincipledBSDF.inputs[
-            MSFS2020_PrincipledBSDFInputs.subsurfaceColor.value
-        ].default_value = color
+        self.setSocketValue(
+            nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.subsurfaceColor.value],
+            color,
+        )
@@ -29,21 +29,36 @@ class MSFS2020_Material:
     bl_icon = "SOUND"
 
     def __init__(self, material, buildTree=False):
-        self.material = material
-        self.node_tree = self.material.node_tree
-        self.nodes = self.material.node_tree.nodes
-        self.links = material.node_tree.links
+        # Node name -> node, built on the first lookup (see getNodeByName)
+        self.nodeMap = None
+        self.nodeMapSignature = None
+        self.bindMaterial(material)
         if buildTree:
             self.__buildShaderTree()
             self.force_update_properties()
 
+    def bindMaterial(self, material):
+        # Python references to Blender data can change between two calls (undo, reallocation)
+        # so a cached wrapper is pointed at the current ones before being used
+        self.material = material
+        self.node_tree = material.node_tree
+        self.nodes = material.node_tree.nodes
+        self.links = material.node_tree.links
+
     def revertToPBRShaderTree(self):
         self.cleanNodeTree()
         self.__createPBRTree()
 
     def __buildShaderTree(self):
+        from .msfs_material_template import MSFS2020_MaterialTemplate
+
         self.cleanNodeTree()
-        self.createNodetree()
+        if MSFS2020_MaterialTemplate.build_node_tree(self):
+            # Templates are recorded on a material without blend mask texture
+            if self.getNodeByName(MSFS2020_ShaderNodes.blendMaskTex.value) is not None:
+                self.toggleVertexBlendMapMask(self.material.msfs_blend_mask_texture is None)
+        else:
+            self.createNodetree()
 
     def force_update_properties(self):
         from .msfs_material_prop_update import MSFS2020_Material_Property_Update
@@ -75,6 +90,7 @@ class MSFS2020_Material:
         nodes = self.material.node_tree.nodes
         for node in nodes:
             nodes.remove(node)
+        self.nodeMap = None
 
     def __createPBRTree(self):
         nodeOutputMaterial = self.addNode(
@@ -746,7 +762,7 @@ class MSFS2020_Material:
         nodeAnisotropicTex = self.getNodeByName(
             MSFS2020_AnisotropicNodes.anisotropicTex.value
         )
-        nodeAnisotropicTex.image = tex
+        self.setNodeImage(nodeAnisotropicTex, tex)
 
         nodeSeparateAnisotropic = self.getNodeByName(
             MSFS2020_AnisotropicNodes.separateAnisotropic.value
@@ -754,111 +770,108 @@ class MSFS2020_Material:
         nodePrincipledBSDF = self.getNodeByName(MSFS2020_ShaderNodes.principledBSDF.value)
 
         if nodeAnisotropicTex.image:
-            self.link(
-                nodeSeparateAnisotropic.outputs[0],
-                nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.anisotropic.value],
-            )
-            self.link(
-                nodeSeparateAnisotropic.outputs[2],
-                nodePrincipledBSDF.inputs[
-                    MSFS2020_PrincipledBSDFInputs.anisotropicRotation.value
-                ],
+            self.reconcileLinks(
+                [
+                    (
+                        nodeSeparateAnisotropic.outputs[0],
+                        nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.anisotropic.value],
+                    ),
+                    (
+                        nodeSeparateAnisotropic.outputs[2],
+                        nodePrincipledBSDF.inputs[
+                            MSFS2020_PrincipledBSDFInputs.anisotropicRotation.value
+                        ],
+                    ),
+                ]
             )
         else:
-            self.unLinkNodeInput(
-                nodePrincipledBSDF, MSFS2020_PrincipledBSDFInputs.anisotropic.value
-            )
-            self.unLinkNodeInput(
-                nodePrincipledBSDF, MSFS2020_PrincipledBSDFInputs.anisotropicRotation.value
+            self.reconcileLinks(
+                [],
+                [
+                    nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.anisotropic.value],
+                    nodePrincipledBSDF.inputs[
+                        MSFS2020_PrincipledBSDFInputs.anisotropicRotation.value
+                    ],
+                ],
             )
 
     def setBaseColor(self, color):
         nodeBaseColorRGB = self.getNodeByName(MSFS2020_ShaderNodes.baseColorRGB.value)
         nodeBaseColorA = self.getNodeByName(MSFS2020_ShaderNodes.baseColorA.value)
 
-        nodeBaseColorRGB.outputs[0].default_value[0] = color[0]
-        nodeBaseColorRGB.outputs[0].default_value[1] = color[1]
-        nodeBaseColorRGB.outputs[0].default_value[2] = color[2]
-        nodeBaseColorA.outputs[0].default_value = color[3]
+        baseColor = nodeBaseColorRGB.outputs[0].default_value
+        self.setSocketValue(
+            nodeBaseColorRGB.outputs[0], (color[0], color[1], color[2], baseColor[3])
+        )
+        self.setSocketValue(nodeBaseColorA.outputs[0], color[3])
         self.updateColorLinks()
 
     def setBaseColorTex(self, tex):
         nodeBaseColorTex = self.getNodeByName(MSFS2020_ShaderNodes.baseColorTex.value)
-        nodeBaseColorTex.image = tex
+        self.setNodeImage(nodeBaseColorTex, tex)
         self.updateColorLinks()
 
     def setDetailColorTex(self, tex):
         nodeDetailColor = self.getNodeByName(MSFS2020_ShaderNodes.detailColorTex.value)
-        nodeDetailColor.image = tex
+        self.setNodeImage(nodeDetailColor, tex)
         self.updateColorLinks()
 
     def setCompTex(self, tex):
         nodeCompTex = self.getNodeByName(MSFS2020_ShaderNodes.compTex.value)
-        nodeCompTex.image = tex
-        if tex is not None:
-            nodeCompTex.image.colorspace_settings.name = "Non-Color"
+        self.setNodeImage(nodeCompTex, tex, nonColor=True)
         self.updateCompLinks()
 
     def setDetailCompTex(self, tex):
         nodeDetailCompTex = self.getNodeByName(MSFS2020_ShaderNodes.detailCompTex.value)
-        nodeDetailCompTex.image = tex
-        if tex is not None:
-            nodeDetailCompTex.image.colorspace_settings.name = "Non-Color"
+        self.setNodeImage(nodeDetailCompTex, tex, nonColor=True)
         self.updateCompLinks()
 
     def setRoughnessScale(self, scale):
         nodeRoughnessScale = self.getNodeByName(MSFS2020_ShaderNodes.roughnessScale.value)
-        nodeRoughnessScale.outputs[0].default_value = scale
+        self.setSocketValue(nodeRoughnessScale.outputs[0], scale)
         self.updateCompLinks()
 
     def setMetallicScale(self, scale):
         nodeMetallicScale = self.getNodeByName(MSFS2020_ShaderNodes.metallicScale.value)
-        nodeMetallicScale.outputs[0].default_value = scale
+        self.setSocketValue(nodeMetallicScale.outputs[0], scale)
         self.updateCompLinks()
 
     def setEmissiveTexture(self, tex):
         nodeEmissiveTex = self.getNodeByName(MSFS2020_ShaderNodes.emissiveTex.value)
-        nodeEmissiveTex.image = tex
-        if tex is not None:
-            nodeEmissiveTex.image.colorspace_settings.name = "Non-Color"
+        self.setNodeImage(nodeEmissiveTex, tex, nonColor=True)
         self.updateEmissiveLinks()
 
     def setEmissiveScale(self, scale):
         nodeEmissiveScale = self.getNodeByName(MSFS2020_ShaderNodes.emissiveScale.value)
-        nodeEmissiveScale.outputs[0].default_value = scale
+        self.setSocketValue(nodeEmissiveScale.outputs[0], scale)
         self.updateEmissiveLinks()
 
     def setEmissiveColor(self, color):
         nodeEmissiveColor = self.getNodeByName(MSFS2020_ShaderNodes.emissiveColor.value)
         emissiveValue = nodeEmissiveColor.outputs[0].default_value
-        emissiveValue[0] = color[0]
-        emissiveValue[1] = color[1]
-        emissiveValue[2] = color[2]
-        nodeEmissiveColor.outputs[0].default_value = emissiveValue
+        self.setSocketValue(
+            nodeEmissiveColor.outputs[0], (color[0], color[1], color[2], emissiveValue[3])
+        )
         self.updateEmissiveLinks()
 
     def setNormalScale(self, scale):
         nodeNormalScale = self.getNodeByName(MSFS2020_ShaderNodes.normalScale.value)
-        nodeNormalScale.outputs[0].default_value = scale
+        self.setSocketValue(nodeNormalScale.outputs[0], scale)
         self.updateNormalLinks()
 
     def setDetailNormalTex(self, tex):
         nodeDetailNormalTex = self.getNodeByName(MSFS2020_ShaderNodes.detailNormalTex.value)
-        nodeDetailNormalTex.image = tex
-        if tex is not None:
-            nodeDetailNormalTex.image.colorspace_settings.name = "Non-Color"
+        self.setNodeImage(nodeDetailNormalTex, tex, nonColor=True)
         self.updateNormalLinks()
 
     def setNormalTex(self, tex):
         nodeNormalTex = self.getNodeByName(MSFS2020_ShaderNodes.normalTex.value)
-        nodeNormalTex.image = tex
-        if tex is not None:
-            nodeNormalTex.image.colorspace_settings.name = "Non-Color"
+        self.setNodeImage(nodeNormalTex, tex, nonColor=True)
         self.updateNormalLinks()
 
     def setBlendMaskTex(self, tex):
         nodeBlendMaskTex = self.getNodeByName(MSFS2020_ShaderNodes.blendMaskTex.value)
-        nodeBlendMaskTex.image = tex
+        self.setNodeImage(nodeBlendMaskTex, tex)
 
     def setUV(self, uvScale, offset_u, offset_v, normalScale):
         nodeDetailUvScale = self.getNodeByName(MSFS2020_ShaderNodes.detailUVScale.value)
@@ -875,14 +888,13 @@ class MSFS2020_Material:
             and nodeDetailNormalScale
         ):
 
-            nodeDetailNormalScale.outputs[0].default_value = normalScale
-            nodeDetailUvScale.outputs[0].default_value = uvScale
-            nodeDetailUvOffsetU.outputs[0].default_value = offset_u
-            nodeDetailUvOffsetV.outputs[0].default_value = offset_v
+            self.setSocketValue(nodeDetailNormalScale.outputs[0], normalScale)
+            self.setSocketValue(nodeDetailUvScale.outputs[0], uvScale)
+            self.setSocketValue(nodeDetailUvOffsetU.outputs[0], offset_u)
+            self.setSocketValue(nodeDetailUvOffsetV.outputs[0], offset_v)
 
     ##############################################
-    def updateColorLinks(self):
-        # relink nodes
+    def updateColorLinks(self, extraLinks=()):
         nodeBaseColorRGB = self.getNodeByName(MSFS2020_ShaderNodes.baseColorRGB.value)
         nodeBaseColorA = self.getNodeByName(MSFS2020_ShaderNodes.baseColorA.value)
         nodeBaseColorTex = self.getNodeByName(MSFS2020_ShaderNodes.baseColorTex.value)
@@ -893,56 +905,42 @@ class MSFS2020_Material:
         nodeBlendAlphaMap = self.getNodeByName(MSFS2020_ShaderNodes.blendAlphaMap.value)
         nodePrincipledBSDF = self.getNodeByName(MSFS2020_ShaderNodes.principledBSDF.value)
 
+        baseColorInput = nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.baseColor.value]
+        alphaInput = nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.alpha.value]
+
         # !!!! input orders matters for the exporter here
-        self.link(nodeBaseColorTex.outputs[0], nodeBlendColorMap.inputs[1])
-        self.link(nodeDetailColorTex.outputs[0], nodeBlendColorMap.inputs[2])
-        self.link(nodeBlendColorMap.outputs[0], nodeMulBaseColorRGB.inputs[2])
-        self.link(nodeBaseColorTex.outputs[1], nodeBlendAlphaMap.inputs[0])
-        self.link(nodeDetailColorTex.outputs[1], nodeBlendAlphaMap.inputs[1])
-        self.link(nodeBaseColorA.outputs[0], nodeMulBaseColorA.inputs[1])
-        self.link(nodeBaseColorRGB.outputs[0], nodeMulBaseColorRGB.inputs[1])
+        links = [
+            (nodeBaseColorTex.outputs[0], nodeBlendColorMap.inputs[1]),
+            (nodeDetailColorTex.outputs[0], nodeBlendColorMap.inputs[2]),
+            (nodeBlendColorMap.outputs[0], nodeMulBaseColorRGB.inputs[2]),
+            (nodeBaseColorTex.outputs[1], nodeBlendAlphaMap.inputs[0]),
+            (nodeDetailColorTex.outputs[1], nodeBlendAlphaMap.inputs[1]),
+            (nodeBaseColorA.outputs[0], nodeMulBaseColorA.inputs[1]),
+            (nodeBaseColorRGB.outputs[0], nodeMulBaseColorRGB.inputs[1]),
+        ]
 
         if not nodeBaseColorTex.image and not nodeDetailColorTex.image:
-            self.link(
-                nodeBaseColorRGB.outputs[0],
-                nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.baseColor.value],
-            )
-            self.link(
-                nodeBaseColorA.outputs[0],
-                nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.alpha.value],
-            )
+            links.append((nodeBaseColorRGB.outputs[0], baseColorInput))
+            links.append((nodeBaseColorA.outputs[0], alphaInput))
 
         elif nodeBaseColorTex.image and not nodeDetailColorTex.image:
-            nodeBlendColorMap.blend_type = "ADD"
-            self.link(
-                nodeMulBaseColorRGB.outputs[0],
-                nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.baseColor.value],
-            )
-            self.link(nodeBaseColorTex.outputs[1], nodeMulBaseColorA.inputs[0])
-            self.link(
-                nodeMulBaseColorA.outputs[0],
-                nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.alpha.value],
-            )
+            self.setNodeAttribute(nodeBlendColorMap, "blend_type", "ADD")
+            links.append((nodeMulBaseColorRGB.outputs[0], baseColorInput))
+            links.append((nodeBaseColorTex.outputs[1], nodeMulBaseColorA.inputs[0]))
+            links.append((nodeMulBaseColorA.outputs[0], alphaInput))
 
         elif not nodeBaseColorTex.image and nodeDetailColorTex.image:
-            nodeBlendColorMap.blend_type = "ADD"
-            self.link(
-                nodeMulBaseColorRGB.outputs[0],
-                nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.baseColor.value],
-            )
-            self.link(nodeDetailColorTex.outputs[1], nodeMulBaseColorA.inputs[0])
-            self.link(
-                nodeMulBaseColorA.outputs[0],
-                nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.alpha.value],
-            )
+            self.setNodeAttribute(nodeBlendColorMap, "blend_type", "ADD")
+            links.append((nodeMulBaseColorRGB.outputs[0], baseColorInput))
+            links.append((nodeDetailColorTex.outputs[1], nodeMulBaseColorA.inputs[0]))
+            links.append((nodeMulBaseColorA.outputs[0], alphaInput))
 
         else:
-            nodeBlendColorMap.blend_type = "MULTIPLY"
-            self.link(
-                nodeMulBaseColorRGB.outputs[0],
-                nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.baseColor.value],
-            )
-            self.link(nodeBlendAlphaMap.outputs[0], nodeMulBaseColorA.inputs[0])
+            self.setNodeAttribute(nodeBlendColorMap, "blend_type", "MULTIPLY")
+            links.append((nodeMulBaseColorRGB.outputs[0], baseColorInput))
+            links.append((nodeBlendAlphaMap.outputs[0], nodeMulBaseColorA.inputs[0]))
+
+        self.reconcileLinks(links + list(extraLinks))
 
     def updateNormalLinks(self):
         nodeNormalTex = self.getNodeByName(MSFS2020_ShaderNodes.normalTex.value)
@@ -960,30 +958,27 @@ class MSFS2020_Material:
         )
         nodePrincipledBSDF = self.getNodeByName(MSFS2020_ShaderNodes.principledBSDF.value)
 
+        normalInput = nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.normal.value]
+
         # Normal
-        self.link(nodeNormalTex.outputs[0], nodeRGBCurves.inputs[1])
-        self.link(nodeRGBCurves.outputs[0], nodeNormalMapSampler.inputs[1])
-        self.link(nodeNormalMapSampler.outputs[0], nodeBlendNormalMap.inputs[1])
-        self.link(nodeDetailNormalMapSampler.outputs[0], nodeBlendNormalMap.inputs[2])
-        self.link(
-            nodeDetailNormalScale.outputs[0], nodeDetailNormalMapSampler.inputs[0]
-        )
-        self.link(nodeDetailNormalTex.outputs[0], nodeDetailNormalMapSampler.inputs[1])
+        links = [
+            (nodeNormalTex.outputs[0], nodeRGBCurves.inputs[1]),
+            (nodeRGBCurves.outputs[0], nodeNormalMapSampler.inputs[1]),
+            (nodeNormalMapSampler.outputs[0], nodeBlendNormalMap.inputs[1]),
+            (nodeDetailNormalMapSampler.outputs[0], nodeBlendNormalMap.inputs[2]),
+            (nodeDetailNormalScale.outputs[0], nodeDetailNormalMapSampler.inputs[0]),
+            (nodeDetailNormalTex.outputs[0], nodeDetailNormalMapSampler.inputs[1]),
+        ]
+        clearedInputs = []
 
         if nodeNormalTex.image and not nodeDetailNormalTex.image:
-            self.link(
-                nodeNormalMapSampler.outputs[0],
-                nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.normal.value],
-            )
+            links.append((nodeNormalMapSampler.outputs[0], normalInput))
         elif nodeNormalTex.image and nodeDetailNormalTex.image:
-            self.link(
-                nodeBlendNormalMap.outputs[0],
-                nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.normal.value],
-            )
+            links.append((nodeBlendNormalMap.outputs[0], normalInput))
         else:
-            self.unLinkNodeInput(
-                nodePrincipledBSDF, MSFS2020_PrincipledBSDFInputs.normal.value
-            )
+            clearedInputs.append(normalInput)
+
+        self.reconcileLinks(links, clearedInputs)
 
     def updateEmissiveLinks(self):
         nodeEmissiveTex = self.getNodeByName(MSFS2020_ShaderNodes.emissiveTex.value)
@@ -992,28 +987,30 @@ class MSFS2020_Material:
         nodeMulEmissive = self.getNodeByName(MSFS2020_ShaderNodes.emissiveMul.value)
         nodePrincipledBSDF = self.getNodeByName(MSFS2020_ShaderNodes.principledBSDF.value)
 
+        emissionInput = nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.emission.value]
+
         # emissive
+        links = []
+        clearedInputs = []
         if nodeEmissiveTex.image:
-            self.link(nodeEmissiveScale.outputs[0], nodeMulEmissive.inputs[0])
-            self.link(nodeEmissiveColor.outputs[0], nodeMulEmissive.inputs[1])
-            self.link(nodeEmissiveTex.outputs[0], nodeMulEmissive.inputs[2])
-            self.link(
-                nodeMulEmissive.outputs[0],
-                nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.emission.value],
-            )
+            links.append((nodeEmissiveScale.outputs[0], nodeMulEmissive.inputs[0]))
+            links.append((nodeEmissiveColor.outputs[0], nodeMulEmissive.inputs[1]))
+            links.append((nodeEmissiveTex.outputs[0], nodeMulEmissive.inputs[2]))
+            links.append((nodeMulEmissive.outputs[0], emissionInput))
         else:
-            self.link(
-                nodeEmissiveColor.outputs[0],
-                nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.emission.value],
+            links.append((nodeEmissiveColor.outputs[0], emissionInput))
+            clearedInputs.append(nodeMulEmissive.inputs[0])
+            clearedInputs.append(nodeMulEmissive.inputs[1])
+
+        links.append(
+            (
+                nodeEmissiveScale.outputs[0],
+                nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.emissionStrength.value],
             )
-            self.unLinkNodeInput(nodeMulEmissive, 0)
-            self.unLinkNodeInput(nodeMulEmissive, 1)
-
-        self.link(
-            nodeEmissiveScale.outputs[0],
-            nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.emissionStrength.value],
         )
 
+        self.reconcileLinks(links, clearedInputs)
+
     def updateCompLinks(self):
         nodeCompTex = self.getNodeByName(MSFS2020_ShaderNodes.compTex.value)
         nodeDetailCompTex = self.getNodeByName(MSFS2020_ShaderNodes.detailCompTex.value)
@@ -1026,35 +1023,29 @@ class MSFS2020_Material:
         nodeGltfSettings = self.getNodeByName(MSFS2020_ShaderNodes.glTFSettings.value)
         nodePrincipledBSDF = self.getNodeByName(MSFS2020_ShaderNodes.principledBSDF.value)
 
+        roughnessInput = nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.roughness.value]
+        metallicInput = nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.metallic.value]
+
         # occlMetalRough
-        self.link(nodeBlendCompMap.outputs[0], nodeSeparateComp.inputs[0])
-        self.link(nodeMetallicScale.outputs[0], nodeMulMetallic.inputs[0])
-        self.link(nodeRoughnessScale.outputs[0], nodeMulRoughness.inputs[0])
-        self.link(nodeSeparateComp.outputs[1], nodeMulRoughness.inputs[1])
-        self.link(nodeSeparateComp.outputs[2], nodeMulMetallic.inputs[1])
+        links = [
+            (nodeBlendCompMap.outputs[0], nodeSeparateComp.inputs[0]),
+            (nodeMetallicScale.outputs[0], nodeMulMetallic.inputs[0]),
+            (nodeRoughnessScale.outputs[0], nodeMulRoughness.inputs[0]),
+            (nodeSeparateComp.outputs[1], nodeMulRoughness.inputs[1]),
+            (nodeSeparateComp.outputs[2], nodeMulMetallic.inputs[1]),
+        ]
+        clearedInputs = []
 
         if not nodeCompTex.image and not nodeDetailCompTex.image:
-            self.link(
-                nodeRoughnessScale.outputs[0],
-                nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.roughness.value],
-            )
-            self.link(
-                nodeMetallicScale.outputs[0],
-                nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.metallic.value],
-            )
-            self.unLinkNodeInput(nodeGltfSettings, 0)
+            links.append((nodeRoughnessScale.outputs[0], roughnessInput))
+            links.append((nodeMetallicScale.outputs[0], metallicInput))
+            clearedInputs.append(nodeGltfSettings.inputs[0])
         else:  # nodeCompTex.image or nodeDetailCompTex.image (if we have both images or only one of them)
-            self.link(nodeSeparateComp.outputs[0], nodeGltfSettings.inputs[0])
-            
-            self.link(
-                nodeMulRoughness.outputs[0],
-                nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.roughness.value],
-            )
-            
-            self.link(
-                nodeMulMetallic.outputs[0],
-                nodePrincipledBSDF.inputs[MSFS2020_PrincipledBSDFInputs.metallic.value],
-            )
+            links.append((nodeSeparateComp.outputs[0], nodeGltfSettings.inputs[0]))
+            links.append((nodeMulRoughness.outputs[0], roughnessInput))
+            links.append((nodeMulMetallic.outputs[0], metallicInput))
+
+        self.reconcileLinks(links, clearedInputs)
 
     def setBlendMode(self, blendMode):
         if blendMode == "BLEND":
@@ -1073,11 +1064,19 @@ class MSFS2020_Material:
         nodeBlendMaskTex = self.getNodeByName(MSFS2020_ShaderNodes.blendMaskTex.value)
         # vertexcolor mask
         if useVertex:
-            self.link(nodeVertexColor.outputs[1], nodeBlendColorMap.inputs[0])
-            self.link(nodeVertexColor.outputs[1], nodeBlendNormalMap.inputs[0])
+            self.reconcileLinks(
+                [
+                    (nodeVertexColor.outputs[1], nodeBlendColorMap.inputs[0]),
+                    (nodeVertexColor.outputs[1], nodeBlendNormalMap.inputs[0]),
+                ]
+            )
         else:
-            self.link(nodeBlendMaskTex.outputs[0], nodeBlendColorMap.inputs[0])
-            self.link(nodeBlendMaskTex.outputs[0], nodeBlendNormalMap.inputs[0])
+            self.reconcileLinks(
+                [
+                    (nodeBlendMaskTex.outputs[0], nodeBlendColorMap.inputs[0]),
+                    (nodeBlendMaskTex.outputs[0], nodeBlendNormalMap.inputs[0]),
+                ]
+            )
 
     def makeOpaque(self):
         self.material.blend_method = "OPAQUE"
@@ -1123,6 +1122,10 @@ class MSFS2020_Material:
         if self.nodes is None:
             return
         try:
+            nodeMapIsValid = (
+                self.nodeMap is not None
+                and self.nodeMapSignature == self.getNodeTreeSignature()
+            )
             node = self.nodes.new(typeNode)
             node.name = name
             node.label = name
@@ -1140,14 +1143,43 @@ class MSFS2020_Material:
                 or typeNode == MSFS2020_ShaderNodesTypes.shaderNodeVectorMath.value
             ):
                 node.operation = operation
+
+            if nodeMapIsValid:
+                # The name is made unique by Blender, so use the one that was given
+                self.nodeMap[node.name] = node
+                self.nodeMapSignature = self.getNodeTreeSignature()
+            else:
+                self.nodeMap = None
             return node
         except ValueError:
             print("[ValueError] Type mismatch affectation.")
 
+    def getNodeTreeSignature(self):
+        # Removing or adding a node changes the node count, and a node added after a removal
+        # is the last one of the collection, so any structural change of the tree between two
+        # lookups changes the signature. Renames are caught by getNodeByName
+        nodes = self.nodes
+        nodeCount = len(nodes)
+        return (
+            self.node_tree.as_pointer(),
+            nodeCount,
+            nodes[nodeCount - 1].as_pointer() if nodeCount > 0 else 0,
+        )
+
     def getNodeByName(self, nodename):
-        if self.node_tree.nodes.find(nodename) > -1:
-            return self.node_tree.nodes[nodename]
-        return None
+        signature = self.getNodeTreeSignature()
+        if self.nodeMap is not None and self.nodeMapSignature == signature:
+            node = self.nodeMap.get(nodename)
+            # Renaming a node doesn't change the signature, check the name is still the same
+            try:
+                if node is not None and node.name == nodename:
+                    return node
+            except ReferenceError:
+                pass
+
+        self.nodeMap = {node.name: node for node in self.nodes}
+        self.nodeMapSignature = signature
+        return self.nodeMap.get(nodename)
 
     def getNodesByClassName(self, className):
         res = []
@@ -1159,6 +1191,64 @@ class MSFS2020_Material:
     def link(self, out_node, in_node):
         self.links.new(out_node, in_node)
 
+    def reconcileLinks(self, desiredLinks, clearedInputs=()):
+        """
+        Make the node tree match a description of the links an input should have,
+        only the links that differ from the existing ones are added or removed.
+
+        Every relink makes Eevee recompile the material shader, even when the link already existed.
+
+        Args:
+            desiredLinks (list(tuple(NodeSocket, NodeSocket))): Sockets to link, in any order.
+                When several links target the same input the last one is kept
+            clearedInputs (list(NodeSocket)): Inputs that must not be linked
+        """
+        existingLinks = {}
+        for link in self.links:
+            existingLinks[link.to_socket] = link
+
+        desiredInputs = {}
+        for socketA, socketB in desiredLinks:
+            if socketA.is_output:
+                desiredInputs[socketB] = socketA
+            else:
+                desiredInputs[socketA] = socketB
+
+        for inputSocket in clearedInputs:
+            link = existingLinks.get(inputSocket)
+            if link is not None and inputSocket not in desiredInputs:
+                self.links.remove(link)
+
+        for inputSocket, outputSocket in desiredInputs.items():
+            link = existingLinks.get(inputSocket)
+            if link is not None and link.from_socket == outputSocket:
+                continue
+            # Linking an input replaces its current link
+            self.links.new(outputSocket, inputSocket)
+
+    def setNodeAttribute(self, node, attribute, value):
+        if getattr(node, attribute) != value:
+            setattr(node, attribute, value)
+
+    def setSocketValue(self, socket, value):
+        currentValue = socket.default_value
+        if hasattr(currentValue, "__len__"):
+            if tuple(currentValue) == tuple(value):
+                return
+        elif currentValue == value:
+            return
+        socket.default_value = value
+
+    def setNodeImage(self, node, tex, nonColor=False):
+        if node.image != tex:
+            node.image = tex
+        if (
+            nonColor
+            and tex is not None
+            and tex.colorspace_settings.name != "Non-Color"
+        ):
+            tex.colorspace_settings.name = "Non-Color"
+
     def unLinkNodeInput(self, node, inputIndex):
         for link in node.inputs[inputIndex].links:
             self.node_tree.links.remove(link)
@@ -78,87 +78,90 @@ class MSFS2020_OT_MigrateMaterialData(bpy.types.Operator):
 
     def execute(self, context):
         active_material = context.active_object.active_material
-        for (
-            old_property,
-            new_property,
-        ) in MSFS2020_OT_MigrateMaterialData.old_property_to_new_mapping.items():
-            if active_material.get(old_property) is None:
-                continue
+
+        # The node tree is rebuilt once, after every migrated property is set
+        with MSFS2020_Material_Property_Update.batch_update():
+            for (
+                old_property,
+                new_property,
+            ) in MSFS2020_OT_MigrateMaterialData.old_property_to_new_mapping.items():
+                if active_material.get(old_property) is None:
+                    continue
             
-            # msfs_behind_glass_texture and msfs_detail_albedo_texture 
-            # are special cases as they are they write to the same property
-            if (
-                active_material.get("msfs_material_mode") == "msfs_windshield" 
-                and old_property == "msfs_behind_glass_texture"
-            ):
-                continue
+                # msfs_behind_glass_texture and msfs_detail_albedo_texture 
+                # are special cases as they are they write to the same property
+                if (
+                    active_material.get("msfs_material_mode") == "msfs_windshield" 
+                    and old_property == "msfs_behind_glass_texture"
+                ):
+                    continue
             
-            if (
-                active_material.get("msfs_material_mode") == "msfs_parallax" 
-                and old_property == "msfs_detail_albedo_texture"
-            ):
-                continue
-            active_material[new_property] = active_material[old_property]
-
-            del active_material[old_property]
-
-        # Base color is a special case - can only have 3 values, we need 4
-        base_color = [1,1,1,1]
-        alpha = 1
-        if active_material.get("msfs_color_alpha_mix"):
-            alpha = active_material.get("msfs_color_alpha_mix")
-            base_color[3] = alpha
+                if (
+                    active_material.get("msfs_material_mode") == "msfs_parallax" 
+                    and old_property == "msfs_detail_albedo_texture"
+                ):
+                    continue
+                active_material[new_property] = active_material[old_property]
+
+                del active_material[old_property]
+
+            # Base color is a special case - can only have 3 values, we need 4
+            base_color = [1,1,1,1]
+            alpha = 1
+            if active_material.get("msfs_color_alpha_mix"):
+                alpha = active_material.get("msfs_color_alpha_mix")
+                base_color[3] = alpha
             
-        if active_material.get("msfs_color_albedo_mix"):
-            base_color = list(active_material.get("msfs_color_albedo_mix"))
-            if len(base_color) == 3:
-                base_color.append(alpha)
+            if active_material.get("msfs_color_albedo_mix"):
+                base_color = list(active_material.get("msfs_color_albedo_mix"))
+                if len(base_color) == 3:
+                    base_color.append(alpha)
                 
-        active_material.msfs_base_color_factor = base_color
-
-        # Emissive factor is also a special case - old material system had 4 floats, we only need 3
-        if active_material.get("msfs_color_emissive_mix"):
-            active_material.msfs_emissive_factor = active_material.get("msfs_color_emissive_mix")[0:3]
-
-        # Do our enums manually as only their index of the value are stored - not the string
-        if active_material.get("msfs_blend_mode"):
-            old_alpha_order = [
-                "OPAQUE",
-                "MASK",  # Changed from old version - matches new name
-                "BLEND",
-                "DITHER",
-            ]
-            active_material.msfs_alpha_mode = old_alpha_order[active_material["msfs_blend_mode"]]
+            active_material.msfs_base_color_factor = base_color
+
+            # Emissive factor is also a special case - old material system had 4 floats, we only need 3
+            if active_material.get("msfs_color_emissive_mix"):
+                active_material.msfs_emissive_factor = active_material.get("msfs_color_emissive_mix")[0:3]
+
+            # Do our enums manually as only their index of the value are stored - not the string
+            if active_material.get("msfs_blend_mode"):
+                old_alpha_order = [
+                    "OPAQUE",
+                    "MASK",  # Changed from old version - matches new name
+                    "BLEND",
+                    "DITHER",
+                ]
+                active_material.msfs_alpha_mode = old_alpha_order[active_material["msfs_blend_mode"]]
 
-            del active_material["msfs_blend_mode"]
+                del active_material["msfs_blend_mode"]
 
-        if active_material.get("msfs_material_mode"):
-            # Assuming the user uninstalled the old plugin, the index of the 
-            # value will be stored instead of the name of the current material. 
-            # Replicate the order here
-            old_material_older = [
-                "NONE",
-                "msfs_standard",
-                "msfs_anisotropic",
-                "msfs_sss",
-                "msfs_glass",
-                "msfs_geo_decal",  # Changed from old version - matches new name
-                "msfs_clearcoat",
-                "msfs_environment_occluder",  # Changed from old version - matches new name
-                "msfs_fake_terrain",
-                "msfs_fresnel_fade",  # Changed from old version - matches new name
-                "msfs_windshield",
-                "msfs_porthole",
-                "msfs_parallax",
-                "msfs_geo_decal_frosted",  # Changed from old version - matches new name
-                "msfs_hair",
-                "msfs_invisible",
-            ]
-            active_material.msfs_material_type = old_material_older[active_material["msfs_material_mode"]]
+            if active_material.get("msfs_material_mode"):
+                # Assuming the user uninstalled the old plugin, the index of the 
+                # value will be stored instead of the name of the current material. 
+                # Replicate the order here
+                old_material_older = [
+                    "NONE",
+                    "msfs_standard",
+                    "msfs_anisotropic",
+                    "msfs_sss",
+                    "msfs_glass",
+                    "msfs_geo_decal",  # Changed from old version - matches new name
+                    "msfs_clearcoat",
+                    "msfs_environment_occluder",  # Changed from old version - matches new name
+                    "msfs_fake_terrain",
+                    "msfs_fresnel_fade",  # Changed from old version - matches new name
+                    "msfs_windshield",
+                    "msfs_porthole",
+                    "msfs_parallax",
+                    "msfs_geo_decal_frosted",  # Changed from old version - matches new name
+                    "msfs_hair",
+                    "msfs_invisible",
+                ]
+                active_material.msfs_material_type = old_material_older[active_material["msfs_material_mode"]]
 
-            del active_material["msfs_material_mode"]
+                del active_material["msfs_material_mode"]
 
-        MSFS2020_Material_Property_Update.update_msfs_material_type(active_material, context)
+            MSFS2020_Material_Property_Update.update_msfs_material_type(active_material, context)
 
         return {"FINISHED"}
 
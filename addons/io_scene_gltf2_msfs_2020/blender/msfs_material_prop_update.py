@@ -12,6 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import contextlib
+
+import bpy
+
 from .material.msfs_material_anisotropic import MSFS2020_Anisotropic
 from .material.msfs_material_clearcoat import MSFS2020_Clearcoat
 from .material.msfs_material_environment_occluder import MSFS2020_Environment_Occluder
@@ -34,175 +38,254 @@ from .msfs_material_function import MSFS2020_Material
 class MSFS2020_Material_Property_Update:
 
     @staticmethod
-    def getMaterial(material):
+    def getMaterialClass(material):
         if material.msfs_material_type == "msfs_standard":
-            return MSFS2020_Standard(material)
+            return MSFS2020_Standard
         elif material.msfs_material_type == "msfs_geo_decal":
-            return MSFS2020_Geo_Decal(material)
+            return MSFS2020_Geo_Decal
         elif material.msfs_material_type == "msfs_geo_decal_frosted":
-            return MSFS2020_Geo_Decal_Frosted(material)
+            return MSFS2020_Geo_Decal_Frosted
         elif material.msfs_material_type == "msfs_windshield":
-            return MSFS2020_Windshield(material)
+            return MSFS2020_Windshield
         elif material.msfs_material_type == "msfs_porthole":
-            return MSFS2020_Porthole(material)
+            return MSFS2020_Porthole
         elif material.msfs_material_type == "msfs_glass":
-            return MSFS2020_Glass(material)
+            return MSFS2020_Glass
         elif material.msfs_material_type == "msfs_clearcoat":
-            return MSFS2020_Clearcoat(material)
+            return MSFS2020_Clearcoat
         elif material.msfs_material_type == "msfs_parallax":
-            return MSFS2020_Parallax(material)
+            return MSFS2020_Parallax
         elif material.msfs_material_type == "msfs_anisotropic":
-            return MSFS2020_Anisotropic(material)
+            return MSFS2020_Anisotropic
         elif material.msfs_material_type == "msfs_hair":
-            return MSFS2020_Hair(material)
+            return MSFS2020_Hair
         elif material.msfs_material_type == "msfs_sss":
-            return MSFS2020_SSS(material)
+            return MSFS2020_SSS
         elif material.msfs_material_type == "msfs_invisible":
-            return MSFS2020_Invisible(material)
+            return MSFS2020_Invisible
         elif material.msfs_material_type == "msfs_fake_terrain":
-            return MSFS2020_Fake_Terrain(material)
+            return MSFS2020_Fake_Terrain
         elif material.msfs_material_type == "msfs_fresnel_fade":
-            return MSFS2020_Fresnel_Fade(material)
+            return MSFS2020_Fresnel_Fade
         elif material.msfs_material_type == "msfs_environment_occluder":
-            return MSFS2020_Environment_Occluder(material)
+            return MSFS2020_Environment_Occluder
         elif material.msfs_material_type == "msfs_ghost":
-            return MSFS2020_Ghost(material)
+            return MSFS2020_Ghost
+        return None
+
+    # Material key -> MSFS2020_Material wrapper, reused by the property updates
+    # so the node lookups of a material are only resolved once
+    material_cache = {}
+    # Number of materials when the depsgraph was last updated, to notice removed materials
+    material_count = 0
 
     @staticmethod
-    def update_msfs_material_type(self, context):
-        material = None
-        if self.msfs_material_type == "msfs_standard":
-            material = MSFS2020_Standard(self, buildTree=True)
+    def get_material_key(material):
+        # The memory of a removed material can be reused by a new one, the session UID
+        # (Blender 2.91+) is never reused within a session
+        return (material.as_pointer(), getattr(material, "session_uid", 0))
+
+    @staticmethod
+    def getMaterial(material):
+        material_class = MSFS2020_Material_Property_Update.getMaterialClass(material)
+        if material_class is None:
+            return None
+
+        key = MSFS2020_Material_Property_Update.get_material_key(material)
+        wrapper = MSFS2020_Material_Property_Update.material_cache.get(key)
+        if type(wrapper) is not material_class:
+            wrapper = material_class(material)
+            MSFS2020_Material_Property_Update.material_cache[key] = wrapper
+        else:
+            wrapper.bindMaterial(material)
+        return wrapper
+
+    @staticmethod
+    def clear_material_cache():
+        MSFS2020_Material_Property_Update.material_cache.clear()
+
+    # Number of nested batch_update blocks currently running
+    batch_depth = 0
+    # Materials waiting for their node tree to be updated at the end of the batch,
+    # mapped to True when the whole tree has to be rebuilt
+    pending_materials = {}
+
+    @staticmethod
+    @contextlib.contextmanager
+    def batch_update():
+        """
+        Defer the property update callbacks of the MSFS materials.
+
+        Properties set inside the block only mark their material as modified, every
+        modified material has its node tree rebuilt or updated once when the outermost block exits.
+        """
+        MSFS2020_Material_Property_Update.batch_depth += 1
+        try:
+            yield
+        finally:
+            MSFS2020_Material_Property_Update.batch_depth -= 1
+            if MSFS2020_Material_Property_Update.batch_depth == 0:
+                MSFS2020_Material_Property_Update.flush_pending_materials()
+
+    @staticmethod
+    def defer_update(material, rebuild=False):
+        """
+        Returns:
+            bool: True if the update of the material has been postponed to the end of the batch
+        """
+        if MSFS2020_Material_Property_Update.batch_depth == 0:
+            return False
+
+        pending_materials = MSFS2020_Material_Property_Update.pending_materials
+        pending_materials[material] = pending_materials.get(material, False) or rebuild
+        return True
+
+    @staticmethod
+    def flush_pending_materials():
+        pending_materials = MSFS2020_Material_Property_Update.pending_materials
+        MSFS2020_Material_Property_Update.pending_materials = {}
+
+        for material, rebuild in pending_materials.items():
+            try:
+                if rebuild:
+                    MSFS2020_Material_Property_Update.build_material_tree(material)
+                else:
+                    MSFS2020_Material(material).force_update_properties()
+            except ReferenceError:
+                # Material removed during the batch
+                continue
+
+    @staticmethod
+    def build_material_tree(material):
+        material_class = MSFS2020_Material_Property_Update.getMaterialClass(material)
+        key = MSFS2020_Material_Property_Update.get_material_key(material)
+        if material_class is None:
+            MSFS2020_Material_Property_Update.material_cache.pop(key, None)
+            MSFS2020_Material(material).revertToPBRShaderTree()
+            return
+
+        # Keep the wrapper of the new tree, its node lookups are already resolved
+        MSFS2020_Material_Property_Update.material_cache[key] = material_class(
+            material, buildTree=True
+        )
+
+    @staticmethod
+    def set_material_type_defaults(self):
+        if self.msfs_material_type in (
+            "msfs_standard",
+            "msfs_porthole",
+            "msfs_clearcoat",
+            "msfs_anisotropic",
+            "msfs_hair",
+            "msfs_sss",
+            "msfs_fake_terrain",
+        ):
             self.msfs_alpha_mode = "OPAQUE"
-        elif self.msfs_material_type == "msfs_geo_decal":
-            material = MSFS2020_Geo_Decal(self, buildTree=True)
-            self.msfs_alpha_mode = "BLEND"
-        elif self.msfs_material_type == "msfs_geo_decal_frosted":
-            material = MSFS2020_Geo_Decal_Frosted(self, buildTree=True)
+        elif self.msfs_material_type in (
+            "msfs_geo_decal",
+            "msfs_geo_decal_frosted",
+            "msfs_fresnel_fade",
+        ):
             self.msfs_alpha_mode = "BLEND"
-        elif self.msfs_material_type == "msfs_windshield":
-            material = MSFS2020_Windshield(self, buildTree=True)
+        elif self.msfs_material_type in ("msfs_windshield", "msfs_glass"):
             self.msfs_alpha_mode = "BLEND"
             self.msfs_metallic_factor = 0.0
-        elif self.msfs_material_type == "msfs_porthole":
-            material = MSFS2020_Porthole(self, buildTree=True)
-            self.msfs_alpha_mode = "OPAQUE"
-        elif self.msfs_material_type == "msfs_glass":
-            material = MSFS2020_Glass(self, buildTree=True)
-            self.msfs_alpha_mode = "BLEND"
-            self.msfs_metallic_factor = 0.0
-        elif self.msfs_material_type == "msfs_clearcoat":
-            material = MSFS2020_Clearcoat(self, buildTree=True)
-            self.msfs_alpha_mode = "OPAQUE"
         elif self.msfs_material_type == "msfs_parallax":
-            material = MSFS2020_Parallax(self, buildTree=True)
             self.msfs_alpha_mode = "MASK"
-        elif self.msfs_material_type == "msfs_anisotropic":
-            material = MSFS2020_Anisotropic(self, buildTree=True)
-            self.msfs_alpha_mode = "OPAQUE"
-        elif self.msfs_material_type == "msfs_hair":
-            material = MSFS2020_Hair(self, buildTree=True)
-            self.msfs_alpha_mode = "OPAQUE"
-        elif self.msfs_material_type == "msfs_sss":
-            material = MSFS2020_SSS(self, buildTree=True)
-            self.msfs_alpha_mode = "OPAQUE"
-        elif self.msfs_material_type == "msfs_invisible":
-            material = MSFS2020_Invisible(self, buildTree=True)
-            self.msfs_no_cast_shadow = True
-            self.msfs_alpha_mode = "BLEND"
-        elif self.msfs_material_type == "msfs_fake_terrain":
-            material = MSFS2020_Fake_Terrain(self, buildTree=True)
-            self.msfs_alpha_mode = "OPAQUE"
-        elif self.msfs_material_type == "msfs_fresnel_fade":
-            material = MSFS2020_Fresnel_Fade(self, buildTree=True)
-            self.msfs_alpha_mode = "BLEND"
-        elif self.msfs_material_type == "msfs_environment_occluder":
-            material = MSFS2020_Environment_Occluder(self, buildTree=True)
-            self.msfs_no_cast_shadow = True
-            self.msfs_alpha_mode = "BLEND"
-        elif self.msfs_material_type == "msfs_ghost":
-            material = MSFS2020_Ghost(self, buildTree=True)
+        elif self.msfs_material_type in (
+            "msfs_invisible",
+            "msfs_environment_occluder",
+            "msfs_ghost",
+        ):
             self.msfs_no_cast_shadow = True
             self.msfs_alpha_mode = "BLEND"
         else:
             MSFS2020_Material_Property_Update.reset_material_prop_object(self)
-            material = MSFS2020_Material(self)
-            material.revertToPBRShaderTree()
-            self.msfs_alpha_mode = "OPAQUE"
+
+    @staticmethod
+    def update_msfs_material_type(self, context):
+        if MSFS2020_Material_Property_Update.defer_update(self, rebuild=True):
+            MSFS2020_Material_Property_Update.set_material_type_defaults(self)
             return
+
+        MSFS2020_Material_Property_Update.build_material_tree(self)
+        MSFS2020_Material_Property_Update.set_material_type_defaults(self)
     
     @staticmethod
     def reset_material_prop_object(self):
-        self.msfs_alpha_cutoff = 0.5
-        self.msfs_base_color_blend_factor = 1.0
-        self.msfs_base_color_factor = [1.0, 1.0, 1.0, 1.0]
-        self.msfs_base_color_texture = None
-        self.msfs_blend_mask_texture = None
-        self.msfs_clamp_uv_x = False
-        self.msfs_clamp_uv_y = False
-        self.msfs_collision_material = False
-        self.msfs_day_night_cycle = False
-        self.msfs_detail_blend_threshold = 0.1
-        self.msfs_detail_color_texture = None
-        self.msfs_detail_occlusion_metallic_roughness_texture = None
-        self.msfs_detail_normal_texture = None
-        self.msfs_detail_uv_offset_u = 0.0
-        self.msfs_detail_uv_offset_v = 0.0
-        self.msfs_detail_uv_scale = 1.0
-        self.msfs_dirt_texture = None
-        self.msfs_disable_motion_blur = False
-        self.msfs_double_sided = False
-        self.msfs_draw_order_offset = 0
-        self.msfs_emissive_blend_factor = 1.0
-        self.msfs_emissive_factor = [0.0, 0.0, 0.0]
-        self.msfs_emissive_scale = 1.0
-        self.msfs_emissive_texture = None
-        self.msfs_extra_slot1_texture = None
-        self.msfs_fresnel_factor = 1.0
-        self.msfs_fresnel_opacity_offset = 1.0
-        self.msfs_ghost_bias = 1.0
-        self.msfs_ghost_power = 1.0
-        self.msfs_ghost_scale = 1.0
-        self.msfs_glass_deformation_factor = 0.0
-        self.msfs_glass_reflection_mask_factor = 0.0
-        self.msfs_metallic_blend_factor = 0.0
-        self.msfs_metallic_factor = 1.0
-        self.msfs_no_cast_shadow = False
-        self.msfs_normal_blend_factor = 1.0
-        self.msfs_normal_scale = 1.0
-        self.msfs_normal_texture = None
-        self.msfs_occlusion_blend_factor = 1.0
-        self.msfs_occlusion_metallic_roughness_texture = None
-        self.msfs_opacity_texture = None
-        self.msfs_parallax_corridor = False
-        self.msfs_parallax_room_number_xy = 1
-        self.msfs_parallax_room_size_x = 1.0
-        self.msfs_parallax_room_size_y = 1.0
-        self.msfs_parallax_scale = 0.0
-        self.msfs_pearl_brightness = 0.0
-        self.msfs_pearl_range = 0.0
-        self.msfs_pearl_shift = 0.0
-        self.msfs_rain_drop_scale = 1.0
-        self.msfs_responsive_aa = False
-        self.msfs_road_collision_material = False
-        self.msfs_roughness_blend_factor = 1.0
-        self.msfs_roughness_factor = 1.0
-        self.msfs_sss_color = [1.0, 1.0, 1.0, 1.0]
-        self.msfs_use_pearl = False
-        self.msfs_uv_offset_u = 0.0
-        self.msfs_uv_offset_v = 0.0
-        self.msfs_uv_rotation = 0.0
-        self.msfs_uv_tiling_u = 1.0
-        self.msfs_uv_tiling_v = 1.0
-        self.msfs_wiper_1_state = 0.0
-        self.msfs_wiper_2_state = 0.0
-        self.msfs_wiper_3_state = 0.0
-        self.msfs_wiper_4_state = 0.0
-        self.msfs_alpha_mode = "OPAQUE"
-        return
+        with MSFS2020_Material_Property_Update.batch_update():
+            self.msfs_alpha_cutoff = 0.5
+            self.msfs_base_color_blend_factor = 1.0
+            self.msfs_base_color_factor = [1.0, 1.0, 1.0, 1.0]
+            self.msfs_base_color_texture = None
+            self.msfs_blend_mask_texture = None
+            self.msfs_clamp_uv_x = False
+            self.msfs_clamp_uv_y = False
+            self.msfs_collision_material = False
+            self.msfs_day_night_cycle = False
+            self.msfs_detail_blend_threshold = 0.1
+            self.msfs_detail_color_texture = None
+            self.msfs_detail_occlusion_metallic_roughness_texture = None
+            self.msfs_detail_normal_texture = None
+            self.msfs_detail_uv_offset_u = 0.0
+            self.msfs_detail_uv_offset_v = 0.0
+            self.msfs_detail_uv_scale = 1.0
+            self.msfs_dirt_texture = None
+            self.msfs_disable_motion_blur = False
+            self.msfs_double_sided = False
+            self.msfs_draw_order_offset = 0
+            self.msfs_emissive_blend_factor = 1.0
+            self.msfs_emissive_factor = [0.0, 0.0, 0.0]
+            self.msfs_emissive_scale = 1.0
+            self.msfs_emissive_texture = None
+            self.msfs_extra_slot1_texture = None
+            self.msfs_fresnel_factor = 1.0
+            self.msfs_fresnel_opacity_offset = 1.0
+            self.msfs_ghost_bias = 1.0
+            self.msfs_ghost_power = 1.0
+            self.msfs_ghost_scale = 1.0
+            self.msfs_glass_deformation_factor = 0.0
+            self.msfs_glass_reflection_mask_factor = 0.0
+            self.msfs_metallic_blend_factor = 0.0
+            self.msfs_metallic_factor = 1.0
+            self.msfs_no_cast_shadow = False
+            self.msfs_normal_blend_factor = 1.0
+            self.msfs_normal_scale = 1.0
+            self.msfs_normal_texture = None
+            self.msfs_occlusion_blend_factor = 1.0
+            self.msfs_occlusion_metallic_roughness_texture = None
+            self.msfs_opacity_texture = None
+            self.msfs_parallax_corridor = False
+            self.msfs_parallax_room_number_xy = 1
+            self.msfs_parallax_room_size_x = 1.0
+            self.msfs_parallax_room_size_y = 1.0
+            self.msfs_parallax_scale = 0.0
+            self.msfs_pearl_brightness = 0.0
+            self.msfs_pearl_range = 0.0
+            self.msfs_pearl_shift = 0.0
+            self.msfs_rain_drop_scale = 1.0
+            self.msfs_responsive_aa = False
+            self.msfs_road_collision_material = False
+            self.msfs_roughness_blend_factor = 1.0
+            self.msfs_roughness_factor = 1.0
+            self.msfs_sss_color = [1.0, 1.0, 1.0, 1.0]
+            self.msfs_use_pearl = False
+            self.msfs_uv_offset_u = 0.0
+            self.msfs_uv_offset_v = 0.0
+            self.msfs_uv_rotation = 0.0
+            self.msfs_uv_tiling_u = 1.0
+            self.msfs_uv_tiling_v = 1.0
+            self.msfs_wiper_1_state = 0.0
+            self.msfs_wiper_2_state = 0.0
+            self.msfs_wiper_3_state = 0.0
+            self.msfs_wiper_4_state = 0.0
+            self.msfs_alpha_mode = "OPAQUE"
 
     @staticmethod
     def update_base_color_texture(self, context):
+        if MSFS2020_Material_Property_Update.defer_update(self):
+            return
+
         material = MSFS2020_Material_Property_Update.getMaterial(self)
         if (
             material is not None 
@@ -212,6 +295,9 @@ class MSFS2020_Material_Property_Update:
 
     @staticmethod
     def update_comp_texture(self, context):
+        if MSFS2020_Material_Property_Update.defer_update(self):
+            return
+
         material = MSFS2020_Material_Property_Update.getMaterial(self)
         if (
             material is not None 
@@ -221,6 +307,9 @@ class MSFS2020_Material_Property_Update:
 
     @staticmethod
     def update_normal_texture(self, context):
+        if MSFS2020_Material_Property_Update.defer_update(self):
+            return
+
         material = MSFS2020_Material_Property_Update.getMaterial(self)
         if (
             material is not None 
@@ -230,6 +319,9 @@ class MSFS2020_Material_Property_Update:
 
     @staticmethod
     def update_emissive_texture(self, context):
+        if MSFS2020_Material_Property_Update.defer_update(self):
+            return
+
         material = MSFS2020_Material_Property_Update.getMaterial(self)
         if (
             material is not None 
@@ -239,6 +331,9 @@ class MSFS2020_Material_Property_Update:
 
     @staticmethod
     def update_detail_color_texture(self, context):
+        if MSFS2020_Material_Property_Update.defer_update(self):
+            return
+
         material = MSFS2020_Material_Property_Update.getMaterial(self)
         if (
             material is not None 
@@ -248,6 +343,9 @@ class MSFS2020_Material_Property_Update:
 
     @staticmethod
     def update_detail_comp_texture(self, context):
+        if MSFS2020_Material_Property_Update.defer_update(self):
+            return
+
         material = MSFS2020_Material_Property_Update.getMaterial(self)
         if (
             material is not None 
@@ -257,6 +355,9 @@ class MSFS2020_Material_Property_Update:
 
     @staticmethod
     def update_detail_normal_texture(self, context):
+        if MSFS2020_Material_Property_Update.defer_update(self):
+            return
+
         material = MSFS2020_Material_Property_Update.getMaterial(self)
         if (
             material is not None 
@@ -266,6 +367,9 @@ class MSFS2020_Material_Property_Update:
 
     @staticmethod
     def update_blend_mask_texture(self, context):
+        if MSFS2020_Material_Property_Update.defer_update(self):
+            return
+
         material = MSFS2020_Material_Property_Update.getMaterial(self)
         if material is not None and type(material) is MSFS2020_Standard:
             material.setBlendMaskTex(self.msfs_blend_mask_texture)
@@ -273,74 +377,113 @@ class MSFS2020_Material_Property_Update:
 
     @staticmethod
     def update_extra_slot1_texture(self, context):
+        if MSFS2020_Material_Property_Update.defer_update(self):
+            return
+
         material = MSFS2020_Material_Property_Update.getMaterial(self)
         if material is not None and (type(material) is MSFS2020_Anisotropic or type(material) is MSFS2020_Hair):
             material.setAnisotropicTex(self.msfs_extra_slot1_texture)
 
     @staticmethod
     def update_dirt_texture(self, context):
+        if MSFS2020_Material_Property_Update.defer_update(self):
+            return
+
         material = MSFS2020_Material_Property_Update.getMaterial(self)
         if material is not None and type(material) is MSFS2020_Clearcoat:
             material.setClearcoatDirtTexture(self.msfs_dirt_texture)
 
     @staticmethod
     def update_alpha_mode(self, context):
+        if MSFS2020_Material_Property_Update.defer_update(self):
+            return
+
         material = MSFS2020_Material(self)
         material.setBlendMode(self.msfs_alpha_mode)
 
     # Update functions for the "tint" parameters:
     @staticmethod
     def update_base_color(self, context):
+        if MSFS2020_Material_Property_Update.defer_update(self):
+            return
+
         material = MSFS2020_Material_Property_Update.getMaterial(self)
         if material is not None:
             material.setBaseColor(self.msfs_base_color_factor)
 
     @staticmethod
     def update_emissive_color(self, context):
+        if MSFS2020_Material_Property_Update.defer_update(self):
+            return
+
         material = MSFS2020_Material_Property_Update.getMaterial(self)
         if material is not None:
             material.setEmissiveColor(self.msfs_emissive_factor)
 
     @staticmethod
     def update_emissive_scale(self, context):
+        if MSFS2020_Material_Property_Update.defer_update(self):
+            return
+
         material = MSFS2020_Material_Property_Update.getMaterial(self)
         if material is not None:
             material.setEmissiveScale(self.msfs_emissive_scale)
 
     @staticmethod
     def update_metallic_scale(self, context):
+        if MSFS2020_Material_Property_Update.defer_update(self):
+            return
+
         material = MSFS2020_Material_Property_Update.getMaterial(self)
         if material is not None:
             material.setMetallicScale(self.msfs_metallic_factor)
 
     @staticmethod
     def update_roughness_scale(self, context):
+        if MSFS2020_Material_Property_Update.defer_update(self):
+            return
+
         material = MSFS2020_Material_Property_Update.getMaterial(self)
         if material is not None:
             material.setRoughnessScale(self.msfs_roughness_factor)
 
     @staticmethod
     def update_normal_scale(self, context):
+        if MSFS2020_Material_Property_Update.defer_update(self):
+            return
+
         material = MSFS2020_Material_Property_Update.getMaterial(self)
         if material is not None:
             material.setNormalScale(self.msfs_normal_scale)
 
     @staticmethod
     def update_color_sss(self, context):
+        if MSFS2020_Material_Property_Update.defer_update(self):
+            return
+
         material = MSFS2020_Material_Property_Update.getMaterial(self)
         if material is not None and type(material) is MSFS2020_SSS:
             material.setSSSColor(self.msfs_sss_color)
 
     @staticmethod
     def update_double_sided(self, context):
+        if MSFS2020_Material_Property_Update.defer_update(self):
+            return
+
         self.use_backface_culling = not self.msfs_double_sided
 
     @staticmethod
     def update_alpha_cutoff(self, context):
+        if MSFS2020_Material_Property_Update.defer_update(self):
+            return
+
         self.alpha_threshold = self.msfs_alpha_cutoff
         
     @staticmethod
     def update_detail_uv(self, context):
+        if MSFS2020_Material_Property_Update.defer_update(self):
+            return
+
         material = MSFS2020_Material_Property_Update.getMaterial(self)
         if material is None:
             return
@@ -351,3 +494,42 @@ class MSFS2020_Material_Property_Update:
             self.msfs_detail_uv_offset_v, 
             self.msfs_detail_normal_scale
         )
+
+
+@bpy.app.handlers.persistent
+def clear_material_cache(*args):
+    # Undo and file loading reallocate every material, drop the wrappers of the old ones
+    MSFS2020_Material_Property_Update.clear_material_cache()
+
+
+@bpy.app.handlers.persistent
+def clear_removed_material_cache(scene, depsgraph):
+    # Removed materials are not listed by the depsgraph updates, they show up as a lower count
+    material_count = len(bpy.data.materials)
+    if material_count < MSFS2020_Material_Property_Update.material_count:
+        MSFS2020_Material_Property_Update.clear_material_cache()
+    MSFS2020_Material_Property_Update.material_count = material_count
+
+
+MATERIAL_CACHE_HANDLERS = (
+    bpy.app.handlers.load_post,
+    bpy.app.handlers.undo_post,
+    bpy.app.handlers.redo_post,
+)
+
+
+def register():
+    for handlers in MATERIAL_CACHE_HANDLERS:
+        if clear_material_cache not in handlers:
+            handlers.append(clear_material_cache)
+    if clear_removed_material_cache not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(clear_removed_material_cache)
+
+
+def unregister():
+    for handlers in MATERIAL_CACHE_HANDLERS:
+        if clear_material_cache in handlers:
+            handlers.remove(clear_material_cache)
+    if clear_removed_material_cache in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(clear_removed_material_cache)
+    MSFS2020_Material_Property_Update.clear_material_cache()
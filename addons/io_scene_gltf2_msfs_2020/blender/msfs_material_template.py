@@ -0,0 +1,269 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS-2020 authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import bpy
+
+TEMPLATE_MATERIAL_NAME = ".MSFS2020 Template Material"
+
+# Node properties restored explicitly or that must not be copied
+SKIPPED_NODE_PROPERTIES = {
+    "name",
+    "location",
+    "parent",
+    "select",
+    "dimensions",
+    "width_hidden",
+}
+
+
+def get_value(value):
+    if hasattr(value, "__len__") and not isinstance(value, (str, set)):
+        return tuple(value)
+    return value
+
+
+def get_socket_values(sockets):
+    return [
+        get_value(socket.default_value) if hasattr(socket, "default_value") else None
+        for socket in sockets
+    ]
+
+
+def get_socket_index(sockets, socket):
+    for i, node_socket in enumerate(sockets):
+        if node_socket == socket:
+            return i
+    return -1
+
+
+class MSFS2020_MaterialTemplate:
+    """
+    Snapshot of the node tree built by an MSFS material class.
+
+    The first material of a type is built node by node as usual, on a temporary material.
+    The result is recorded as plain python data (node types, properties that differ from
+    a new node, socket values, curves and links) and every following material of the same
+    type is rebuilt from that snapshot, skipping all the node lookups of the tree builders.
+    Templates are keyed by addon and Blender version.
+    """
+
+    # Material class -> template
+    templates = {}
+    # Addon and Blender versions the templates were built with
+    templates_version = None
+    # Node bl_idname -> (properties, input values, output values) of a new node
+    node_defaults = {}
+
+    def __init__(self, node_tree):
+        self.nodes = []
+        self.links = []
+
+        for node in list(node_tree.nodes):
+            self.nodes.append(self.snapshot_node(node_tree, node))
+
+        for link in node_tree.links:
+            self.links.append(
+                (
+                    link.from_node.name,
+                    get_socket_index(link.from_node.outputs, link.from_socket),
+                    link.to_node.name,
+                    get_socket_index(link.to_node.inputs, link.to_socket),
+                )
+            )
+
+    # region Snapshot
+    @staticmethod
+    def get_node_properties(node):
+        properties = {}
+        for prop in node.bl_rna.properties:
+            if (
+                prop.is_readonly
+                or prop.type in ("POINTER", "COLLECTION")
+                or prop.identifier.startswith("bl_")
+                or prop.identifier in SKIPPED_NODE_PROPERTIES
+            ):
+                continue
+            properties[prop.identifier] = get_value(getattr(node, prop.identifier))
+        return properties
+
+    @staticmethod
+    def get_node_defaults(node_tree, bl_idname):
+        defaults = MSFS2020_MaterialTemplate.node_defaults.get(bl_idname)
+        if defaults is None:
+            node = node_tree.nodes.new(bl_idname)
+            defaults = (
+                MSFS2020_MaterialTemplate.get_node_properties(node),
+                get_socket_values(node.inputs),
+                get_socket_values(node.outputs),
+            )
+            node_tree.nodes.remove(node)
+            MSFS2020_MaterialTemplate.node_defaults[bl_idname] = defaults
+        return defaults
+
+    @staticmethod
+    def get_modified_socket_values(values, default_values):
+        return [
+            (i, value)
+            for i, value in enumerate(values)
+            if value is not None
+            and (i >= len(default_values) or value != default_values[i])
+        ]
+
+    def snapshot_node(self, node_tree, node):
+        default_properties, default_inputs, default_outputs = (
+            MSFS2020_MaterialTemplate.get_node_defaults(node_tree, node.bl_idname)
+        )
+
+        properties = MSFS2020_MaterialTemplate.get_node_properties(node)
+        data = {
+            "bl_idname": node.bl_idname,
+            "name": node.name,
+            "location": tuple(node.location),
+            "parent": node.parent.name if node.parent else None,
+            "properties": [
+                (identifier, value)
+                for identifier, value in properties.items()
+                if default_properties.get(identifier) != value
+            ],
+            "node_tree": None,
+            "inputs": [],
+            "outputs": [],
+            "curves": None,
+        }
+
+        # Group sockets only exist once the node tree is set, so the values are taken after
+        if getattr(node, "node_tree", None) is not None:
+            data["node_tree"] = node.node_tree.name
+
+        data["inputs"] = MSFS2020_MaterialTemplate.get_modified_socket_values(
+            get_socket_values(node.inputs), default_inputs
+        )
+        data["outputs"] = MSFS2020_MaterialTemplate.get_modified_socket_values(
+            get_socket_values(node.outputs), default_outputs
+        )
+
+        if getattr(node, "mapping", None) is not None and hasattr(node.mapping, "curves"):
+            data["curves"] = [
+                [(tuple(point.location), point.handle_type) for point in curve.points]
+                for curve in node.mapping.curves
+            ]
+
+        return data
+    # endregion
+
+    # region Replay
+    def apply(self, node_tree):
+        nodes = node_tree.nodes
+        created_nodes = {}
+
+        for data in self.nodes:
+            node = nodes.new(data["bl_idname"])
+            node.name = data["name"]
+            created_nodes[data["name"]] = node
+
+            if data["node_tree"] is not None:
+                group = bpy.data.node_groups.get(data["node_tree"])
+                if group is None:
+                    return False
+                node.node_tree = group
+
+            for identifier, value in data["properties"]:
+                setattr(node, identifier, value)
+
+            for i, value in data["inputs"]:
+                node.inputs[i].default_value = value
+
+            for i, value in data["outputs"]:
+                node.outputs[i].default_value = value
+
+            if data["curves"] is not None:
+                for curve, points in zip(node.mapping.curves, data["curves"]):
+                    while len(curve.points) < len(points):
+                        curve.points.new(0.0, 0.0)
+                    for point, (location, handle_type) in zip(curve.points, points):
+                        point.location = location
+                        point.handle_type = handle_type
+                node.mapping.update()
+
+        # Attaching a node to a frame converts its location, so the recorded
+        # locations are only set once every node has its parent
+        for data in self.nodes:
+            if data["parent"] is not None:
+                created_nodes[data["name"]].parent = created_nodes[data["parent"]]
+
+        for data in self.nodes:
+            created_nodes[data["name"]].location = data["location"]
+
+        links = node_tree.links
+        for from_node, from_index, to_node, to_index in self.links:
+            links.new(
+                created_nodes[from_node].outputs[from_index],
+                created_nodes[to_node].inputs[to_index],
+            )
+
+        return True
+    # endregion
+
+    @staticmethod
+    def get_version():
+        from .. import get_version_string
+
+        return (get_version_string(), bpy.app.version)
+
+    @staticmethod
+    def build(material_class):
+        material = bpy.data.materials.new(TEMPLATE_MATERIAL_NAME)
+        try:
+            material.use_nodes = True
+            wrapper = material_class(material)
+            wrapper.cleanNodeTree()
+            wrapper.createNodetree()
+            return MSFS2020_MaterialTemplate(material.node_tree)
+        finally:
+            bpy.data.materials.remove(material)
+
+    @staticmethod
+    def get(material_class):
+        version = MSFS2020_MaterialTemplate.get_version()
+        if MSFS2020_MaterialTemplate.templates_version != version:
+            MSFS2020_MaterialTemplate.templates.clear()
+            MSFS2020_MaterialTemplate.node_defaults.clear()
+            MSFS2020_MaterialTemplate.templates_version = version
+
+        template = MSFS2020_MaterialTemplate.templates.get(material_class)
+        if template is None:
+            template = MSFS2020_MaterialTemplate.build(material_class)
+            MSFS2020_MaterialTemplate.templates[material_class] = template
+        return template
+
+    @staticmethod
+    def build_node_tree(wrapper):
+        """
+        Build the node tree of an MSFS material from the template of its class.
+
+        Returns:
+            bool: False if the template could not be used, the tree is then left empty
+        """
+        material_class = type(wrapper)
+        try:
+            template = MSFS2020_MaterialTemplate.get(material_class)
+            if template.apply(wrapper.node_tree):
+                return True
+        except (AttributeError, IndexError, KeyError, TypeError, ValueError) as e:
+            print("[ASOBO] Could not use the node tree template of " + material_class.__name__ + ": " + str(e))
+
+        # Stale template (node group removed, API change...), build it again next time
+        MSFS2020_MaterialTemplate.templates.pop(material_class, None)
+        wrapper.cleanNodeTree()
+        return False
@@ -17,9 +17,38 @@ from io_scene_gltf2.io.com.gltf2_io_extensions import Extension
 
 from ..blender.msfs_material_prop_update import MSFS2020_Material_Property_Update
 
+# Items of msfs_material_type.
+# Each extension lists in MaterialTypes the material types it can be exported for (None for all of them)
+MATERIAL_TYPES = (
+    ("NONE", "Disabled", ""),
+    ("msfs_standard", "Standard", ""),
+    ("msfs_geo_decal", "Decal", ""),
+    ("msfs_geo_decal_frosted", "Geo Decal Frosted", ""),
+    ("msfs_windshield", "Windshield", ""),
+    ("msfs_porthole", "Porthole", ""),
+    ("msfs_glass", "Glass", ""),
+    ("msfs_clearcoat", "Clearcoat", ""),
+    ("msfs_parallax", "Parallax", ""),
+    ("msfs_anisotropic", "Anisotropic", ""),
+    ("msfs_hair", "Hair", ""),
+    ("msfs_sss", "Sub-surface Scattering", ""),
+    ("msfs_invisible", "Invisible", ""),
+    ("msfs_fake_terrain", "Fake Terrain", ""),
+    ("msfs_fresnel_fade", "Fresnel Fade", ""),
+    ("msfs_environment_occluder", "Environment Occluder", ""),
+    ("msfs_ghost", "Ghost", ""),
+)
+
+
+def get_material_types_except(*excluded_material_types):
+    return tuple(
+        item[0] for item in MATERIAL_TYPES if item[0] not in excluded_material_types
+    )
+
 
 class AsoboMaterialCommon:
     SerializedName = ""
+    MaterialTypes = None
     class Defaults:
         BaseColorFactor = [1.0, 1.0, 1.0, 1.0]
         EmissiveFactor = [0.0, 0.0, 0.0]
@@ -33,25 +62,7 @@ class AsoboMaterialCommon:
 
     bpy.types.Material.msfs_material_type = bpy.props.EnumProperty(
         name="Type",
-        items=(
-            ("NONE", "Disabled", ""),
-            ("msfs_standard", "Standard", ""),
-            ("msfs_geo_decal", "Decal", ""),
-            ("msfs_geo_decal_frosted", "Geo Decal Frosted", ""),
-            ("msfs_windshield", "Windshield", ""),
-            ("msfs_porthole", "Porthole", ""),
-            ("msfs_glass", "Glass", ""),
-            ("msfs_clearcoat", "Clearcoat", ""),
-            ("msfs_parallax", "Parallax", ""),
-            ("msfs_anisotropic", "Anisotropic", ""),
-            ("msfs_hair", "Hair", ""),
-            ("msfs_sss", "Sub-surface Scattering", ""),
-            ("msfs_invisible", "Invisible", ""),
-            ("msfs_fake_terrain", "Fake Terrain", ""),
-            ("msfs_fresnel_fade", "Fresnel Fade", ""),
-            ("msfs_environment_occluder", "Environment Occluder", ""),
-            ("msfs_ghost", "Ghost", ""),
-        ),
+        items=MATERIAL_TYPES,
         default="NONE",
         update=MSFS2020_Material_Property_Update.update_msfs_material_type,
         options=set(),  # ANIMATABLE is a default item in options, so for properties that shouldn't be animatable, we have to overwrite this.
@@ -305,6 +316,7 @@ class AsoboMaterialCommon:
 class AsoboMaterialGeometryDecal:
 
     SerializedName = "ASOBO_material_blend_gbuffer"
+    MaterialTypes = ("msfs_geo_decal", "msfs_geo_decal_frosted")
 
     class Defaults:
         baseColorBlendFactor = 1.0
@@ -413,6 +425,7 @@ class AsoboMaterialGeometryDecal:
 class AsoboMaterialGhostEffect:
 
     SerializedName = "ASOBO_material_ghost_effect"
+    MaterialTypes = ("msfs_ghost",)
 
     class Defaults:
         bias = 1.0
@@ -479,6 +492,7 @@ class AsoboMaterialGhostEffect:
 class AsoboMaterialDrawOrder:
 
     SerializedName = "ASOBO_material_draw_order"
+    MaterialTypes = get_material_types_except("msfs_invisible", "msfs_environment_occluder")
 
     class Defaults:
         drawOrderOffset = 0
@@ -526,6 +540,7 @@ class AsoboMaterialDrawOrder:
 class AsoboDayNightCycle:
 
     SerializedName = "ASOBO_material_day_night_switch"
+    MaterialTypes = ("msfs_standard",)
 
     bpy.types.Material.msfs_day_night_cycle = bpy.props.BoolProperty(
         name="Day Night Cycle",
@@ -565,6 +580,7 @@ class AsoboDayNightCycle:
 class AsoboDisableMotionBlur:
 
     SerializedName = "ASOBO_material_disable_motion_blur"
+    MaterialTypes = get_material_types_except("msfs_invisible", "msfs_environment_occluder")
 
     bpy.types.Material.msfs_disable_motion_blur = bpy.props.BoolProperty(
         name="Disable Motion Blur",
@@ -606,6 +622,7 @@ class AsoboDisableMotionBlur:
 class AsoboPearlescent:
 
     SerializedName = "ASOBO_material_pearlescent"
+    MaterialTypes = ("msfs_standard",)
 
     class Defaults:
         pearlShift = 0.0
@@ -681,6 +698,7 @@ class AsoboPearlescent:
 class AsoboAlphaModeDither:
 
     SerializedName = "ASOBO_material_alphamode_dither"
+    MaterialTypes = None
 
     @staticmethod
     def from_dict(blender_material, gltf2_material, import_settings):
@@ -713,6 +731,7 @@ class AsoboAlphaModeDither:
 class AsoboMaterialInvisible:
 
     SerializedName = "ASOBO_material_invisible"
+    MaterialTypes = ("msfs_invisible",)
 
     @staticmethod
     def from_dict(blender_material, gltf2_material, import_settings):
@@ -743,6 +762,7 @@ class AsoboMaterialInvisible:
 class AsoboMaterialEnvironmentOccluder:
 
     SerializedName = "ASOBO_material_environment_occluder"
+    MaterialTypes = ("msfs_environment_occluder",)
 
     @staticmethod
     def from_dict(blender_material, gltf2_material, import_settings):
@@ -773,6 +793,7 @@ class AsoboMaterialEnvironmentOccluder:
 class AsoboMaterialUVOptions:
 
     SerializedName = "ASOBO_material_UV_options"
+    MaterialTypes = get_material_types_except("msfs_invisible", "msfs_environment_occluder")
 
     class Defaults:
         clampUVX = False
@@ -900,6 +921,7 @@ class AsoboMaterialUVOptions:
 class AsoboMaterialShadowOptions:
 
     SerializedName = "ASOBO_material_shadow_options"
+    MaterialTypes = None
 
     class Defaults:
         noCastShadow = False
@@ -940,6 +962,7 @@ class AsoboMaterialShadowOptions:
 class AsoboMaterialResponsiveAAOptions:
 
     SerializedName = "ASOBO_material_antialiasing_options"
+    MaterialTypes = None
 
     class Defaults:
         responsiveAA = False
@@ -980,6 +1003,15 @@ class AsoboMaterialResponsiveAAOptions:
 class AsoboMaterialDetail:
 
     SerializedName = "ASOBO_material_detail_map"
+    MaterialTypes = get_material_types_except(
+        "NONE",
+        "msfs_parallax",
+        "msfs_invisible",
+        "msfs_environment_occluder",
+        "msfs_sss",
+        "msfs_hair",
+        "msfs_fresnel_fade",
+    )
 
     class Defaults:
         UVScale = 1.0
@@ -1139,6 +1171,7 @@ class AsoboMaterialDetail:
 class AsoboMaterialFakeTerrain:
 
     SerializedName = "ASOBO_material_fake_terrain"
+    MaterialTypes = ("msfs_fake_terrain",)
 
     @staticmethod
     def from_dict(blender_material, gltf2_material, import_settings):
@@ -1169,6 +1202,7 @@ class AsoboMaterialFakeTerrain:
 class AsoboMaterialFresnelFade:
 
     SerializedName = "ASOBO_material_fresnel_fade"
+    MaterialTypes = ("msfs_fresnel_fade",)
 
     class Defaults:
         fresnelFactor = 1.0
@@ -1225,6 +1259,7 @@ class AsoboMaterialFresnelFade:
 class AsoboSSS:
 
     SerializedName = "ASOBO_material_SSS"  # This entire extension is disabled for the time being. Keeping just in case
+    MaterialTypes = ("msfs_sss", "msfs_hair")
 
     class Defaults:
         SSSColor = [1.0, 1.0, 1.0, 1.0]
@@ -1295,6 +1330,7 @@ class AsoboSSS:
 class AsoboAnisotropic:
 
     SerializedName = "ASOBO_material_anisotropic"
+    MaterialTypes = ("msfs_anisotropic", "msfs_hair")
 
     @staticmethod
     def from_dict(blender_material, gltf2_material, import_settings):
@@ -1345,6 +1381,7 @@ class AsoboAnisotropic:
 class AsoboWindshield:
 
     SerializedName = "ASOBO_material_windshield"
+    MaterialTypes = ("msfs_windshield",)
 
     class Defaults:
         rainDropScale = 1.0
@@ -1453,6 +1490,7 @@ class AsoboWindshield:
 class AsoboClearCoat:
 
     SerializedName = "ASOBO_material_clear_coat"
+    MaterialTypes = ("msfs_clearcoat",)
 
     @staticmethod
     def from_dict(blender_material, gltf2_material, import_settings):
@@ -1501,6 +1539,7 @@ class AsoboClearCoat:
 class AsoboParallaxWindow:
 
     SerializedName = "ASOBO_material_parallax_window"
+    MaterialTypes = ("msfs_parallax",)
 
     class Defaults:
         parallaxScale = 0.0
@@ -1610,6 +1649,7 @@ class AsoboGlass:
 
     SerializedName = "ASOBO_material_glass"
     AlternateSerializedName = "ASOBO_material_kitty_glass"
+    MaterialTypes = ("msfs_glass",)
 
     class Defaults:
         glassReflectionMaskFactor = 0.0
@@ -1671,6 +1711,7 @@ class AsoboGlass:
 class AsoboTags:
 
     SerializedName = "ASOBO_tags"
+    MaterialTypes = get_material_types_except("msfs_environment_occluder")
 
     class AsoboTag:
         Collision = "Collision"
@@ -1729,6 +1770,7 @@ class AsoboTags:
 class AsoboMaterialCode:
 
     SerializedName = "ASOBO_material_code"
+    MaterialTypes = ("msfs_windshield", "msfs_porthole", "msfs_geo_decal_frosted", "msfs_clearcoat")
 
     class MaterialCode:
         Windshield = "Windshield"
@@ -20,6 +20,8 @@ from .. import get_version_string
 from .msfs_gizmo import MSFS2020Gizmo
 from .msfs_light import MSFS2020Light
 from .msfs_material import MSFS2020_Material_IO
+from .msfs_material_snapshot import MSFS2020_MaterialSnapshot
+from .msfs_profiler import profiled
 from .msfs_unique_id import MSFS2020_unique_id
 
 def get_blender_version_string() -> str:
@@ -39,6 +41,7 @@ class Export:
         self.Extension = Extension
         self.properties = bpy.context.scene.msfs_exporter_settings
         
+    @profiled("hook")
     def gather_asset_hook(
         self,
         gltf2_asset,
@@ -59,17 +62,25 @@ class Export:
         gltf2_asset.generator += f" and Asobo Studio MSFS2020 Blender I/O v{get_version_string()}" 
         gltf2_asset.generator += f" with Blender v{get_blender_version_string()}"
 
+    @profiled("hook")
     def gather_gltf_extensions_hook(
         self,
         gltf2_plan,
         export_settings
     ):
+        # Every material has been gathered at this point
+        MSFS2020_Material_IO.remove_scratch_material(export_settings)
+        MSFS2020_MaterialSnapshot.clear(export_settings)
+        # Every node has been gathered too
+        MSFS2020_unique_id.report_duplicates(export_settings)
+
         if not self.properties.enable_msfs_extension:
             return
         
         for image in gltf2_plan.images:
             image.uri = os.path.basename(urllib.parse.unquote(image.uri))
 
+    @profiled("hook")
     def gather_node_hook(
         self,
         gltf2_object,
@@ -83,11 +94,12 @@ class Export:
             gltf2_object.extensions = {}
 
         if self.properties.use_unique_id:
-            MSFS2020_unique_id.export(gltf2_object, blender_object)
+            MSFS2020_unique_id.export(gltf2_object, blender_object, export_settings)
 
         if blender_object.type == "LIGHT":
             MSFS2020Light.export(gltf2_object, blender_object)
     
+    @profiled("hook")
     def gather_joint_hook(
         self,
         gltf2_node,
@@ -101,8 +113,9 @@ class Export:
             gltf2_node.extensions = {}
 
         if self.properties.use_unique_id:
-            MSFS2020_unique_id.export(gltf2_node, blender_bone)
+            MSFS2020_unique_id.export_bone(gltf2_node, blender_bone, export_settings)
 
+    @profiled("hook")
     def gather_scene_hook(
         self,
         gltf2_scene,
@@ -118,6 +131,7 @@ class Export:
             export_settings
         )
 
+    @profiled("hook")
     def gather_material_hook(
         self,
         gltf2_material,
@@ -131,6 +131,70 @@ class MSFS2020Gizmo:
         # The Khronos importer auto-calculates the empty display size, so we need to reset it to 1
         blender_object.empty_display_size = 1.0
 
+    @staticmethod
+    def get_gizmo_objects(blender_scene):
+        """
+        Index the collision gizmos of the scene by name, the only ones exported are parented to a mesh.
+        """
+        gizmo_objects = {}
+        for blender_object in blender_scene.objects:
+            if (
+                blender_object.msfs_gizmo_type != "NONE"
+                and blender_object.parent is not None
+                and blender_object.parent.type == "MESH"
+            ):
+                gizmo_objects.setdefault(blender_object.name, blender_object)
+        return gizmo_objects
+
+    @staticmethod
+    def get_gizmo_object(child, blender_object, export_settings):
+        result = {}
+        result["type"] = blender_object.msfs_gizmo_type
+        result["translation"] = child.translation
+        
+        if child.rotation:
+            result["rotation"] = child.rotation
+
+        if child.scale is None: # If the scale is default, it will be exported as None which will raise an error here
+            child.scale = [1.0, 1.0, 1.0]
+
+        # Flip scale to match MSFS2020 gizmo scale system
+        if export_settings["gltf_yup"]:
+            child.scale = [child.scale[2], child.scale[0], child.scale[1]]
+        else:
+            child.scale = [child.scale[1], child.scale[0], child.scale[2]]
+
+        # Calculate scale per gizmo type
+        scale = {}
+        if blender_object.msfs_gizmo_type == "sphere":
+            scale["radius"] = abs(child.scale[0] * child.scale[1] * child.scale[2])
+            
+        elif blender_object.msfs_gizmo_type == "box":
+            scale["length"] = abs(child.scale[0]) * 2
+            scale["width"] = abs(child.scale[1]) * 2
+            scale["height"] = abs(child.scale[2]) * 2
+            
+        elif blender_object.msfs_gizmo_type == "cylinder":
+            scale["radius"] = abs(child.scale[0] * child.scale[1])
+            scale["height"] = abs(child.scale[2])
+
+        result["params"] = scale
+
+        # Collision type
+        tags = ["Collision"]
+        if blender_object.msfs_collision_is_road_collider:
+            tags.append("Road")
+
+        result["extensions"] = {
+            "ASOBO_tags": Extension(
+                name="ASOBO_tags", 
+                extension={"tags": tags}, 
+                required=False
+            )
+        }
+
+        return result
+
     @staticmethod
     def export(nodes, blender_scene, export_settings):
         """
@@ -139,74 +203,37 @@ class MSFS2020Gizmo:
         then remove the gizmo from the collected nodes 
         and set the proper mesh extensions
         """
-        for node in nodes:
+        gizmo_objects = MSFS2020Gizmo.get_gizmo_objects(blender_scene)
+        if not gizmo_objects:
+            return
+
+        # Walk the node tree with a stack, deep hierarchies would go over the recursion limit
+        stack = list(nodes)
+        while stack:
+            node = stack.pop()
+            if not node.children:
+                continue
+
             collisions = []  # TODO: make sure node is mesh?
-            for child in list(node.children):
-                # The glTF exporter will ALWAYS set the node name as the blender name
-                blender_object = blender_scene.objects.get(child.name)
-                
+            children = []
+            for child in node.children:
+                # The glTF exporter will ALWAYS set the node name as the blender name.
                 # However, there are cases where the exporter creates fake nodes that don't exist in the scene
-                if blender_object is None: 
-                    continue
-                
-                # We only need the collision gizmos that are parented to a mesh
-                if (blender_object.parent is None or blender_object.parent.type != "MESH"):  
+                blender_object = gizmo_objects.get(child.name)
+                if blender_object is None:
+                    children.append(child)
                     continue
 
-                if blender_object.msfs_gizmo_type != "NONE":
-                    result = {}
-                    result["type"] = blender_object.msfs_gizmo_type
-                    result["translation"] = child.translation
-                    
-                    if child.rotation:
-                        result["rotation"] = child.rotation
-
-                    if child.scale is None: # If the scale is default, it will be exported as None which will raise an error here
-                        child.scale = [1.0, 1.0, 1.0]
-
-                    # Flip scale to match MSFS2020 gizmo scale system
-                    if export_settings["gltf_yup"]:
-                        child.scale = [child.scale[2], child.scale[0], child.scale[1]]
-                    else:
-                        child.scale = [child.scale[1], child.scale[0], child.scale[2]]
-
-                    # Calculate scale per gizmo type
-                    scale = {}
-                    if blender_object.msfs_gizmo_type == "sphere":
-                        scale["radius"] = abs(child.scale[0] * child.scale[1] * child.scale[2])
-                        
-                    elif blender_object.msfs_gizmo_type == "box":
-                        scale["length"] = abs(child.scale[0]) * 2
-                        scale["width"] = abs(child.scale[1]) * 2
-                        scale["height"] = abs(child.scale[2]) * 2
-                        
-                    elif blender_object.msfs_gizmo_type == "cylinder":
-                        scale["radius"] = abs(child.scale[0] * child.scale[1])
-                        scale["height"] = abs(child.scale[2])
-
-                    result["params"] = scale
-
-                    # Collision type
-                    tags = ["Collision"]
-                    if blender_object.msfs_collision_is_road_collider:
-                        tags.append("Road")
-
-                    result["extensions"] = {
-                        "ASOBO_tags": Extension(
-                            name="ASOBO_tags", 
-                            extension={"tags": tags}, 
-                            required=False
-                        )
-                    }
-
-                    collisions.append(result)
-                    node.children.remove(child)
+                collisions.append(
+                    MSFS2020Gizmo.get_gizmo_object(child, blender_object, export_settings)
+                )
 
             if collisions:
+                node.children = children
                 node.mesh.extensions[MSFS2020Gizmo.extension_name] = Extension(
                     name=MSFS2020Gizmo.extension_name,
                     extension={"gizmo_objects": collisions},
                     required=False,
                 )
 
-            MSFS2020Gizmo.export(node.children, blender_scene, export_settings)
+            stack.extend(children)
@@ -0,0 +1,100 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS-2020 authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import re
+
+# Patterns separated by semicolons, the first group of a pattern that matches is the LOD index
+DEFAULT_LOD_PATTERNS = r"^x([0-9])_;_LOD([0-9]+)"
+
+
+class MSFS2020_LODNaming:
+    """
+    Split object and collection names into a LOD group name and a LOD index.
+
+    Patterns are compiled once per pattern string and every parsed name is memoized,
+    a renamed object or collection is simply parsed again under its new name.
+    """
+
+    # Pattern string -> compiled patterns
+    compiled_patterns = {}
+    # (pattern string, name) -> (group name, LOD index)
+    parsed_names = {}
+    # The memo is dropped when it grows past this size, names of deleted data are never reused
+    MAX_PARSED_NAMES = 100000
+
+    @staticmethod
+    def compile_patterns(pattern_string):
+        patterns = MSFS2020_LODNaming.compiled_patterns.get(pattern_string)
+        if patterns is None:
+            patterns = []
+            for pattern in pattern_string.split(";"):
+                pattern = pattern.strip()
+                if not pattern:
+                    continue
+
+                try:
+                    patterns.append(re.compile(pattern))
+                except re.error as e:
+                    print("[ASOBO] Invalid LOD naming pattern " + pattern + ": " + str(e))
+
+            MSFS2020_LODNaming.compiled_patterns[pattern_string] = patterns
+        return patterns
+
+    @staticmethod
+    def parse_name(name, patterns):
+        # Like the original naming convention, only the last match in the name is removed,
+        # so "x0_Foo_LOD0" belongs to the "x0_Foo" group
+        last_match = None
+        for pattern in patterns:
+            for match in pattern.finditer(name):
+                if last_match is None or match.start() > last_match.start():
+                    last_match = match
+
+        if last_match is None:
+            return name, None
+
+        lod_index = None
+        for group in last_match.groups():
+            if group is not None and group.isdigit():
+                lod_index = int(group)
+                break
+
+        group_name = name.replace(last_match.group(0), "")
+
+        # A name made only of a LOD prefix or suffix is its own group
+        if not group_name:
+            group_name = name
+        return group_name, lod_index
+
+    @staticmethod
+    def parse(name, pattern_string=DEFAULT_LOD_PATTERNS):
+        """
+        Returns:
+            tuple(str, int): The LOD group name, and the LOD index or None if the name has no LOD pattern
+        """
+        key = (pattern_string, name)
+        result = MSFS2020_LODNaming.parsed_names.get(key)
+        if result is None:
+            if len(MSFS2020_LODNaming.parsed_names) >= MSFS2020_LODNaming.MAX_PARSED_NAMES:
+                MSFS2020_LODNaming.parsed_names.clear()
+
+            result = MSFS2020_LODNaming.parse_name(
+                name, MSFS2020_LODNaming.compile_patterns(pattern_string)
+            )
+            MSFS2020_LODNaming.parsed_names[key] = result
+        return result
+
+    @staticmethod
+    def get_pattern_string(context):
+        return context.scene.multi_exporter_lod_patterns or DEFAULT_LOD_PATTERNS
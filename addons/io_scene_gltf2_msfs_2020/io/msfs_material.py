@@ -12,8 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
+
 import bpy
-import os
 
 if bpy.app.version >= (4, 5, 0):
     from io_scene_gltf2.blender.imp.image import BlenderImage
@@ -43,7 +44,16 @@ else:
             gather_texture_info
         )
 
+from ..blender.msfs_material_prop_update import MSFS2020_Material_Property_Update
 from ..com import msfs_material_props as MSFS2020_MaterialExtensions
+from .msfs_material_snapshot import MSFS2020_MaterialSnapshot
+from .msfs_profiler import profile_section, profiled
+
+# Hidden material holding the nodes used to gather texture infos during an export
+SCRATCH_MATERIAL_NAME = ".MSFS2020 Export Scratch Material"
+SCRATCH_MATERIAL_KEY = "msfs_scratch_material"
+SCRATCH_SOCKETS_KEY = "msfs_scratch_sockets"
+TEXTURE_INFOS_KEY = "msfs_texture_infos"
 
 
 class MSFS2020_Material_IO:
@@ -76,9 +86,82 @@ class MSFS2020_Material_IO:
         MSFS2020_MaterialExtensions.AsoboMaterialCode,
     ]
 
+    # msfs_material_type -> extensions to export, in the order of the extensions list
+    export_table = None
+    # glTF extension or extras key -> indices of the extensions reading it
+    import_table = None
+    # Indices of the extensions imported for every material
+    import_always = None
+    # Keys found in a material -> extensions to import
+    import_extensions_cache = {}
+
     def __new__(cls, *args, **kwargs):
         raise RuntimeError(f"{cls} should not be instantiated")
 
+    @staticmethod
+    def get_import_keys(extension):
+        return tuple(
+            key
+            for key in (
+                extension.SerializedName,
+                getattr(extension, "AlternateSerializedName", ""),
+            )
+            if key
+        )
+
+    @staticmethod
+    def build_dispatch_tables():
+        extensions = MSFS2020_Material_IO.extensions
+
+        export_table = {}
+        for material_type, _name, _description in MSFS2020_MaterialExtensions.MATERIAL_TYPES:
+            export_table[material_type] = tuple(
+                extension
+                for extension in extensions
+                if extension.MaterialTypes is None or material_type in extension.MaterialTypes
+            )
+
+        import_table = {}
+        import_always = []
+        for i, extension in enumerate(extensions):
+            keys = MSFS2020_Material_IO.get_import_keys(extension)
+            if not keys:
+                import_always.append(i)
+            for key in keys:
+                import_table.setdefault(key, []).append(i)
+
+        MSFS2020_Material_IO.export_table = export_table
+        MSFS2020_Material_IO.import_table = import_table
+        MSFS2020_Material_IO.import_always = tuple(import_always)
+        MSFS2020_Material_IO.import_extensions_cache.clear()
+
+    @staticmethod
+    def get_export_extensions(material_type):
+        if MSFS2020_Material_IO.export_table is None:
+            MSFS2020_Material_IO.build_dispatch_tables()
+        return MSFS2020_Material_IO.export_table.get(material_type, MSFS2020_Material_IO.extensions)
+
+    @staticmethod
+    def get_import_extensions(gltf2_material):
+        if MSFS2020_Material_IO.import_table is None:
+            MSFS2020_Material_IO.build_dispatch_tables()
+
+        keys = []
+        for data in (gltf2_material.extensions, gltf2_material.extras):
+            if isinstance(data, dict):
+                keys.extend(data.keys())
+        keys = frozenset(keys)
+
+        extensions = MSFS2020_Material_IO.import_extensions_cache.get(keys)
+        if extensions is None:
+            indices = set(MSFS2020_Material_IO.import_always)
+            for key in keys:
+                indices.update(MSFS2020_Material_IO.import_table.get(key, ()))
+            # Some readers rely on the result of the previous ones (anisotropic after SSS...)
+            extensions = tuple(MSFS2020_Material_IO.extensions[i] for i in sorted(indices))
+            MSFS2020_Material_IO.import_extensions_cache[keys] = extensions
+        return extensions
+
     @staticmethod
     def create_image(index, import_settings):
         pytexture = import_settings.data.textures[index]
@@ -91,91 +174,104 @@ class MSFS2020_Material_IO:
             return bpy.data.images[blender_image_name]
 
     @staticmethod
-    def export_image(blender_material, blender_image, image_type, export_settings):
-        nodes = blender_material.node_tree.nodes
-        links = blender_material.node_tree.links
+    def get_scratch_material(export_settings):
+        material = export_settings.get(SCRATCH_MATERIAL_KEY)
+        if material is not None:
+            return material
+
+        # Leftover of an export that did not finish
+        leftover_material = bpy.data.materials.get(SCRATCH_MATERIAL_NAME)
+        if leftover_material is not None:
+            bpy.data.materials.remove(leftover_material)
+
+        material = bpy.data.materials.new(SCRATCH_MATERIAL_NAME)
+        material.use_nodes = True
+        material.node_tree.nodes.clear()
+
+        export_settings[SCRATCH_MATERIAL_KEY] = material
+        export_settings[SCRATCH_SOCKETS_KEY] = {}
+        return material
+
+    @staticmethod
+    def get_scratch_socket(blender_image, image_type, export_settings):
+        """
+        Get the Principled BSDF input the image is plugged into in the scratch material of the export.
+
+        The Khronos exporter caches texture infos by socket,
+        so every image and image type combination gets its own nodes, created once per export.
+        """
+        material = MSFS2020_Material_IO.get_scratch_material(export_settings)
+        sockets = export_settings[SCRATCH_SOCKETS_KEY]
+
+        key = (blender_image, image_type)
+        socket = sockets.get(key)
+        if socket is not None:
+            return socket
+
+        nodes = material.node_tree.nodes
+        links = material.node_tree.links
 
-        # Create a fake texture node temporarily (unfortunately this is the only solid way of doing this)
         texture_node = nodes.new("ShaderNodeTexImage")
-        texture_node.name = "Texture Output"
         texture_node.image = blender_image
 
-        # Save image path before converting it to an absolute path
-        saved_image_path = blender_image.filepath
+        principled_bsdf_node = nodes.new("ShaderNodeBsdfPrincipled")
 
-        # Make sure that the path of the image is absolute
-        texture_node.image.filepath = bpy.path.abspath(texture_node.image.filepath)
-        texture_node.image.filepath = os.path.realpath(texture_node.image.filepath)
+        if image_type == "NORMAL":
+            normal_node = nodes.new("ShaderNodeNormalMap")
+            links.new(texture_node.outputs[0], normal_node.inputs["Color"])
+            links.new(normal_node.outputs[0], principled_bsdf_node.inputs["Normal"])
+            socket = principled_bsdf_node.inputs["Normal"]
+        else:
+            links.new(texture_node.outputs[0], principled_bsdf_node.inputs["Base Color"])
+            socket = principled_bsdf_node.inputs["Base Color"]
 
-        # Create shader to plug texture into
-        principled_bsdf_node = nodes.new("ShaderNodeBsdfPrincipled")
-        principled_bsdf_node.name = "Principled BSDF Temp Node"
+        sockets[key] = socket
+        return socket
 
-        texture_info = None
+    @staticmethod
+    def remove_scratch_material(export_settings):
+        material = export_settings.pop(SCRATCH_MATERIAL_KEY, None)
+        export_settings.pop(SCRATCH_SOCKETS_KEY, None)
+        export_settings.pop(TEXTURE_INFOS_KEY, None)
 
-        # region Gather texture info
-        if image_type == "DEFAULT":
-            node_link = links.new(
-                texture_node.outputs[0],
-                principled_bsdf_node.inputs["Base Color"]
-            )
+        if material is not None:
+            bpy.data.materials.remove(material)
 
-            if bpy.app.version >= (4, 2, 0):
-                node_socket = NodeSocket(
-                    principled_bsdf_node.inputs["Base Color"],
-                    [blender_material.node_tree]
-                )
-
-                texture_info = gather_texture_info(
-                    node_socket,
-                    (node_socket,),
-                    export_settings
-                )
-            else:
-                texture_info = gather_texture_info(
-                    principled_bsdf_node.inputs["Base Color"],
-                    (principled_bsdf_node.inputs["Base Color"],),
-                    export_settings
-                )
-
-        elif image_type == "NORMAL":
-            normal_node = nodes.new("ShaderNodeNormalMap")
-            normal_node.name = "Normal Texture Output"
+    @staticmethod
+    @profiled("material")
+    def export_image(blender_material, blender_image, image_type, export_settings):
+        if image_type not in ("DEFAULT", "NORMAL"):
+            return None
 
-            links.new(
-                texture_node.outputs[0],
-                normal_node.inputs["Color"]
-            )
+        # Images shared by several materials only go through the Khronos image pipeline once.
+        # The scratch nodes always use the default sampler, so the image and type are enough
+        # to identify a texture info. Callers set per material values (scale...) on it, hence the copy
+        texture_infos = export_settings.setdefault(TEXTURE_INFOS_KEY, {})
+        key = (blender_image, image_type)
+        if key in texture_infos:
+            texture_info = texture_infos[key]
+            return copy.copy(texture_info) if texture_info is not None else None
 
-            links.new(
-                normal_node.outputs[0],
-                principled_bsdf_node.inputs["Normal"]
-            )
+        # Texture infos can only be gathered from a node tree, use a scratch material
+        # so the material being exported and its images are left untouched
+        socket = MSFS2020_Material_IO.get_scratch_socket(
+            blender_image, image_type, export_settings
+        )
 
-            if bpy.app.version >= (4, 2, 0):
-                node_socket = NodeSocket(
-                    principled_bsdf_node.inputs["Normal"],
-                    [blender_material.node_tree]
-                )
-
-                texture_info = gather_material_normal_texture_info_class(
-                    node_socket,
-                    (node_socket,),
-                    export_settings
-                )
-            else:
-                texture_info = gather_material_normal_texture_info_class(
-                    principled_bsdf_node.inputs["Normal"],
-                    (principled_bsdf_node.inputs["Normal"],),
-                    export_settings
-                )
+        if bpy.app.version >= (4, 2, 0):
+            socket = NodeSocket(socket, [socket.id_data])
 
+        # region Gather texture info
+        if image_type == "DEFAULT":
+            texture_info = gather_texture_info(socket, (socket,), export_settings)
+        else:
+            texture_info = gather_material_normal_texture_info_class(
+                socket, (socket,), export_settings
+            )
         # endregion
 
-        # Restore saved image file path
-        blender_image.filepath = saved_image_path
-
         if texture_info is None:
+            texture_infos[key] = None
             return None
 
         # Some versions of the Khronos exporter have gather_texture_info return a tuple
@@ -184,25 +280,25 @@ class MSFS2020_Material_IO:
 
         if hasattr(texture_info, "tex_coord"):
             texture_info.tex_coord = None
-            
-        # region Delete temp nodes
-        nodes.remove(principled_bsdf_node)
-        nodes.remove(texture_node)
-        
-        if image_type == "NORMAL":
-            nodes.remove(normal_node)
-        # endregion
-        
-        return texture_info
+
+        texture_infos[key] = texture_info
+        return copy.copy(texture_info)
 
     @staticmethod
     def create(gltf2_material, blender_material, import_settings):
-        for extension in MSFS2020_Material_IO.extensions:
-            extension.from_dict(blender_material, gltf2_material, import_settings)
+        # Build the node tree once all the properties of the material are set
+        with MSFS2020_Material_Property_Update.batch_update():
+            for extension in MSFS2020_Material_IO.get_import_extensions(gltf2_material):
+                extension.from_dict(blender_material, gltf2_material, import_settings)
 
     @staticmethod
     def export(gltf2_material, blender_material, export_settings):
-        gltf2_material.alpha_mode = blender_material.msfs_alpha_mode
+        # The writers read the snapshot of the material instead of its properties
+        with profile_section("MSFS2020_MaterialSnapshot.get", "material_extension"):
+            material_snapshot = MSFS2020_MaterialSnapshot.get(blender_material, export_settings)
+
+        gltf2_material.alpha_mode = material_snapshot.msfs_alpha_mode
         
-        for extension in MSFS2020_Material_IO.extensions:
-            extension.to_extension(blender_material, gltf2_material, export_settings)
+        for extension in MSFS2020_Material_IO.get_export_extensions(material_snapshot.msfs_material_type):
+            with profile_section(extension.__name__ + ".to_extension", "material_extension"):
+                extension.to_extension(material_snapshot, gltf2_material, export_settings)
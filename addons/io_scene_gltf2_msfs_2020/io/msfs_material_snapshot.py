@@ -0,0 +1,103 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS-2020 authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import operator
+
+import bpy
+
+# Key of the snapshots of the current export in the export settings
+MATERIAL_SNAPSHOTS_KEY = "msfs_material_snapshots"
+SNAPSHOT_CLASS_KEY = "msfs_material_snapshot_class"
+
+
+class MSFS2020_MaterialSnapshot:
+    """
+    Values of the MSFS properties of a material, read once per export.
+
+    The extension writers only read msfs_* properties, so a snapshot exposes them under
+    the same names and can be handed to the writers in place of the material.
+    Arrays are stored as tuples and images as references to the images.
+    """
+
+    __slots__ = ()
+
+    # Property names -> (snapshot class, getter reading all the properties at once)
+    snapshot_classes = {}
+
+    @staticmethod
+    def get_property_names():
+        return tuple(
+            prop.identifier
+            for prop in bpy.types.Material.bl_rna.properties
+            if prop.identifier.startswith("msfs_")
+        )
+
+    @staticmethod
+    def get_snapshot_class():
+        property_names = MSFS2020_MaterialSnapshot.get_property_names()
+        snapshot_class = MSFS2020_MaterialSnapshot.snapshot_classes.get(property_names)
+        if snapshot_class is None:
+            array_names = frozenset(
+                prop.identifier
+                for prop in bpy.types.Material.bl_rna.properties
+                if prop.identifier in property_names and getattr(prop, "is_array", False)
+            )
+            snapshot_class = type(
+                "MSFS2020_MaterialSnapshotValues",
+                (MSFS2020_MaterialSnapshot,),
+                {
+                    "__slots__": property_names,
+                    "property_names": property_names,
+                    "array_names": array_names,
+                    "read_properties": operator.attrgetter(*property_names),
+                },
+            )
+            MSFS2020_MaterialSnapshot.snapshot_classes[property_names] = snapshot_class
+        return snapshot_class
+
+    @classmethod
+    def create(cls, blender_material):
+        snapshot = cls()
+        values = cls.read_properties(blender_material)
+        if len(cls.property_names) == 1:
+            values = (values,)
+
+        for name, value in zip(cls.property_names, values):
+            if name in cls.array_names:
+                value = tuple(value)
+            setattr(snapshot, name, value)
+        return snapshot
+
+    @staticmethod
+    def get(blender_material, export_settings):
+        """
+        Get the snapshot of a material, shared by all the meshes using it during the export.
+        """
+        snapshots = export_settings.get(MATERIAL_SNAPSHOTS_KEY)
+        if snapshots is None:
+            snapshots = export_settings[MATERIAL_SNAPSHOTS_KEY] = {}
+            export_settings[SNAPSHOT_CLASS_KEY] = MSFS2020_MaterialSnapshot.get_snapshot_class()
+
+        key = blender_material.as_pointer()
+        snapshot = snapshots.get(key)
+        if snapshot is None:
+            snapshot = export_settings[SNAPSHOT_CLASS_KEY].create(blender_material)
+            snapshots[key] = snapshot
+        return snapshot
+
+    @staticmethod
+    def clear(export_settings):
+        export_settings.pop(MATERIAL_SNAPSHOTS_KEY, None)
+        export_settings.pop(SNAPSHOT_CLASS_KEY, None)
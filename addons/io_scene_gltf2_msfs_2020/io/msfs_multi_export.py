@@ -12,13 +12,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import fnmatch
+import json
 import os
+import tempfile
+import time
 import uuid
 import xml.dom.minidom
 import xml.etree.ElementTree as etree
 
 import bpy
 
+from .msfs_profiler import MSFS2020_Profiler, profile_section
+from .msfs_scene_index import MSFS2020_SceneIndex
+from .msfs_unique_id import MSFS2020_UniqueIDResolver, MSFS2020_unique_id
+
 
 def export_blender_under_3_3(file_path, settings):
     return bpy.ops.export_scene.gltf(
@@ -321,10 +329,40 @@ class MSFS2020_OT_MultiExportGLTF2(bpy.types.Operator):
     bl_idname = "export_scene.multi_export_gltf"
     bl_label = "Multi-Export glTF 2.0"
 
+    # Options of the command line entry point (see msfs_multi_export_cli.py)
+    name_filter: bpy.props.StringProperty(
+        name="Name Filter",
+        description=(
+            "Comma separated patterns (fnmatch) of the LOD groups or presets to export, "
+            "everything is exported when empty"
+        ),
+        default="",
+        options={"HIDDEN", "SKIP_SAVE"},
+    )
+
+    output_root: bpy.props.StringProperty(
+        name="Output Folder",
+        description="Folder replacing the export path of every LOD group and preset",
+        default="",
+        subtype="DIR_PATH",
+        options={"HIDDEN", "SKIP_SAVE"},
+    )
+
+    summary_path: bpy.props.StringProperty(
+        name="Summary File",
+        description="JSON file where the result of every exported file is written",
+        default="",
+        subtype="FILE_PATH",
+        options={"HIDDEN", "SKIP_SAVE"},
+    )
+
     @staticmethod
     def export(file_path):
         settings = bpy.context.scene.msfs_multi_exporter_settings
         bpy.context.scene.msfs_exporter_settings.use_unique_id = settings.use_unique_id
+        bpy.context.scene.msfs_exporter_settings.resolve_unique_id_collisions = (
+            settings.resolve_unique_id_collisions
+        )
         gltf = None
         if bpy.app.version < (3, 3, 0):
             gltf = export_blender_under_3_3(file_path, settings)
@@ -337,147 +375,667 @@ class MSFS2020_OT_MultiExportGLTF2(bpy.types.Operator):
 
         if gltf is None:
             print("[ASOBO] Export failed.")
+            return False
 
-    def execute(self, context):
-        if context.scene.msfs_multi_exporter_current_tab == "OBJECTS":
-            from .msfs_multi_export_objects import MSFS2020_LODGroupUtility
-
-            lod_groups = context.scene.msfs_multi_exporter_lod_groups
-            sort_by_collection = context.scene.multi_exporter_grouped_by_collections
-
-            for lod_group in lod_groups:
-                export_folder_path = lod_group.folder_path
-                if export_folder_path == "//\\":
-                    export_folder_path = export_folder_path.rsplit("\\")[0]
-                export_folder_path = bpy.path.abspath(export_folder_path)
-                # Generate XML if needed
-                if lod_group.generate_xml:
-                    xml_path = os.path.join(
-                        export_folder_path, lod_group.group_name + ".xml"
-                    )
-                    found_guid = None
+        return "FINISHED" in gltf
 
-                    if os.path.exists(xml_path):
-                        tree = etree.parse(xml_path)
-                        found_guid = tree.getroot().attrib.get("guid")
-
-                    if lod_group.overwrite_guid or found_guid is None:
-                        root = etree.Element(
-                            "ModelInfo",
-                            guid="{" + str(uuid.uuid4()) + "}",
-                            version="1.1",
-                        )
-                    else:
-                        root = etree.Element(
-                            "ModelInfo", guid=found_guid, version="1.1"
-                        )
+    @staticmethod
+    def get_export_folder_path(folder_path):
+        if folder_path == "//\\":
+            folder_path = folder_path.rsplit("\\")[0]
+        return bpy.path.abspath(folder_path)
 
-                    lods = etree.SubElement(root, "LODS")
+    @staticmethod
+    def get_job_folder_path(folder_path, output_root=""):
+        if output_root:
+            return bpy.path.abspath(output_root)
+        return MSFS2020_OT_MultiExportGLTF2.get_export_folder_path(folder_path)
 
-                    lod_files = {}
+    @staticmethod
+    def matches_name_filter(name, name_filter):
+        patterns = [pattern.strip() for pattern in name_filter.split(",") if pattern.strip()]
+        if not patterns:
+            return True
+        return any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
 
-                    for lod in lod_group.lods:
-                        if not MSFS2020_LODGroupUtility.lod_is_visible(context, lod):
-                            continue
+    @staticmethod
+    def gather_jobs(context, scene_index, name_filter="", output_root=""):
+        """
+        Build the export plan of the current tab.
 
-                        if lod.enabled:
-                            lod_files[lod.file_name] = lod.lod_value
+        Each job is a plain dict describing one glTF file to write, so it can be
+        handed over to a background Blender process as JSON.
 
-                    lod_files = sorted(lod_files.items())
-                    last_lod = list(lod_files)[-1:]
+        Returns:
+            tuple(list(dict), list(str)): The export jobs and the errors found while planning
+        """
+        jobs = []
+        errors = []
 
-                    for file_name, lod_value in lod_files:
-                        lod_element = etree.SubElement(lods, "LOD")
+        if context.scene.msfs_multi_exporter_current_tab == "OBJECTS":
+            from .msfs_multi_export_objects import MSFS2020_LODGroupUtility
 
-                        if file_name != last_lod[0]:
-                            lod_element.set("minSize", str(lod_value))
+            lod_groups = context.scene.msfs_multi_exporter_lod_groups
+            for i, lod_group in enumerate(lod_groups):
+                if not MSFS2020_OT_MultiExportGLTF2.matches_name_filter(
+                    lod_group.group_name, name_filter
+                ):
+                    continue
 
-                        lod_element.set(
-                            "ModelFile", os.path.splitext(file_name)[0] + ".gltf"
-                        )
+                export_folder_path = MSFS2020_OT_MultiExportGLTF2.get_job_folder_path(
+                    lod_group.folder_path, output_root
+                )
 
-                    if lod_files:
-                        # Format XML
-                        dom = xml.dom.minidom.parseString(etree.tostring(root))
-                        xml_string = dom.toprettyxml(encoding="utf-8")
+                for j, lod in enumerate(lod_group.lods):
+                    if not MSFS2020_LODGroupUtility.lod_is_visible(
+                        context, lod, scene_index
+                    ):
+                        continue
 
-                        with open(xml_path, "wb") as f:
-                            f.write(xml_string)
-                            f.close()
+                    if not lod.enabled:
+                        continue
 
-                # Export glTF
-                for lod in lod_group.lods:
-                    if not MSFS2020_LODGroupUtility.lod_is_visible(context, lod):
+                    if export_folder_path == "":
+                        errors.append(
+                            "[EXPORT][ERROR] Object : "
+                            + lod.file_name
+                            + " does not have an export path set."
+                        )
                         continue
 
-                    if lod.enabled:
-                        # Use selected objects in order to specify what to export
-                        for obj in bpy.context.selected_objects:
-                            obj.select_set(False)
-
-                        def select_recursive(obj):
-                            if obj in list(bpy.context.window.view_layer.objects):
-                                obj.select_set(True)
-                                for child in obj.children:
-                                    select_recursive(child)
-
-                        if sort_by_collection:
-                            for obj in lod.collection.all_objects:
-                                obj.select_set(True)
-                        else:
-                            select_recursive(lod.objectLOD)
-
-                        if export_folder_path != "":
-                            exportPath = bpy.path.ensure_ext(
+                    jobs.append(
+                        {
+                            "type": "OBJECTS",
+                            "lod_group_index": i,
+                            "lod_index": j,
+                            "name": lod.file_name,
+                            "file_path": bpy.path.ensure_ext(
                                 os.path.join(
                                     export_folder_path,
                                     os.path.splitext(lod.file_name)[0],
                                 ),
                                 ".gltf",
-                            )
-                            MSFS2020_OT_MultiExportGLTF2.export(exportPath)
-                        else:
-                            self.report(
-                                {"ERROR"},
-                                "[EXPORT][ERROR] Object : "
-                                + lod.file_name
-                                + " does not have an export path set.",
-                            )
+                            ),
+                        }
+                    )
 
         elif context.scene.msfs_multi_exporter_current_tab == "PRESETS":
-            presets = bpy.context.scene.msfs_multi_exporter_presets
-            for preset in presets:
-                if preset.enabled:
-                    # Clear currently selected objects
-                    for obj in bpy.context.selected_objects:
-                        obj.select_set(False)
-
-                    # Loop through all enabled layers and select all objects
-                    for layer in preset.layers:
-                        if layer.enabled:
-                            for obj in layer.collection.all_objects:
-                                if obj in list(bpy.context.window.view_layer.objects):
-                                    obj.select_set(True)
-
-                    if preset.folder_path != "":
-                        export_folder_path = preset.folder_path
-                        if export_folder_path == "//\\":
-                            export_folder_path = export_folder_path.rsplit("\\")[0]
-                        export_folder_path = bpy.path.abspath(export_folder_path)
-                        exportPath = bpy.path.ensure_ext(
+            presets = context.scene.msfs_multi_exporter_presets
+            for i, preset in enumerate(presets):
+                if not preset.enabled:
+                    continue
+
+                if not MSFS2020_OT_MultiExportGLTF2.matches_name_filter(
+                    preset.name, name_filter
+                ):
+                    continue
+
+                if preset.folder_path == "" and not output_root:
+                    errors.append(
+                        "[EXPORT][ERROR] Preset : "
+                        + preset.name
+                        + " does not have an export path set."
+                    )
+                    continue
+
+                export_folder_path = MSFS2020_OT_MultiExportGLTF2.get_job_folder_path(
+                    preset.folder_path, output_root
+                )
+                jobs.append(
+                    {
+                        "type": "PRESETS",
+                        "preset_index": i,
+                        "name": preset.name,
+                        "file_path": bpy.path.ensure_ext(
                             os.path.join(export_folder_path, preset.name), ".gltf"
+                        ),
+                    }
+                )
+
+        return jobs, errors
+
+    @staticmethod
+    def select_job_objects(context, job, scene_index):
+        # Use selected objects in order to specify what to export
+        for obj in context.selected_objects:
+            obj.select_set(False)
+
+        # Jobs refer to their LOD or preset by index, make sure it is still the one planned
+        if job["type"] == "OBJECTS":
+            lod_groups = context.scene.msfs_multi_exporter_lod_groups
+            lod = None
+            if job["lod_group_index"] < len(lod_groups):
+                lods = lod_groups[job["lod_group_index"]].lods
+                if job["lod_index"] < len(lods):
+                    lod = lods[job["lod_index"]]
+            if lod is None or lod.file_name != job["name"]:
+                raise RuntimeError("The LODs changed since the export started")
+
+            if context.scene.multi_exporter_grouped_by_collections:
+                for obj in lod.collection.all_objects:
+                    obj.select_set(True)
+            else:
+                for obj in scene_index.get_view_layer_hierarchy(lod.objectLOD):
+                    obj.select_set(True)
+
+        elif job["type"] == "PRESETS":
+            presets = context.scene.msfs_multi_exporter_presets
+            preset = presets[job["preset_index"]] if job["preset_index"] < len(presets) else None
+            if preset is None or preset.name != job["name"]:
+                raise RuntimeError("The presets changed since the export started")
+
+            # Loop through all enabled layers and select all objects
+            for layer in preset.layers:
+                if layer.enabled:
+                    for obj in layer.collection.all_objects:
+                        if scene_index.is_in_view_layer(obj):
+                            obj.select_set(True)
+
+    @staticmethod
+    def run_job(context, job, scene_index):
+        """
+        Select the objects of a job and export them.
+
+        Returns:
+            dict: The job result, with the error message if the export failed
+                and the warnings of the export
+        """
+        result = {
+            "name": job["name"],
+            "file_path": job["file_path"],
+            "success": False,
+            "error": "",
+            "warnings": [],
+        }
+
+        start = time.perf_counter()
+        MSFS2020_unique_id.last_duplicates = []
+        try:
+            with profile_section(job["name"], "lod"):
+                MSFS2020_OT_MultiExportGLTF2.select_job_objects(context, job, scene_index)
+                result["success"] = MSFS2020_OT_MultiExportGLTF2.export(job["file_path"])
+            if not result["success"]:
+                result["error"] = "glTF exporter did not finish"
+        except Exception as e:
+            result["error"] = str(e)
+        result["duration"] = time.perf_counter() - start
+
+        result["warnings"] = [
+            MSFS2020_UniqueIDResolver.get_duplicate_message(duplicate)
+            for duplicate in MSFS2020_unique_id.last_duplicates
+        ]
+
+        return result
+
+    @staticmethod
+    def filter_up_to_date_jobs(context, jobs, manifests, scene_index):
+        """
+        Fingerprint the objects of every job and drop the jobs whose last export
+        is still up to date according to the manifest of their export folder.
+
+        Returns:
+            list(dict): The jobs that need to be exported
+        """
+        from .msfs_multi_export_manifest import MSFS2020_ExportManifest
+
+        outdated_jobs = []
+        for job in jobs:
+            folder_path = os.path.dirname(job["file_path"])
+            manifest = manifests.get(folder_path)
+            if manifest is None:
+                manifest = manifests[folder_path] = MSFS2020_ExportManifest(folder_path)
+
+            MSFS2020_OT_MultiExportGLTF2.select_job_objects(context, job, scene_index)
+            job["fingerprint"] = MSFS2020_ExportManifest.compute_fingerprint(
+                context, context.selected_objects
+            )
+
+            if manifest.is_up_to_date(job["file_path"], job["fingerprint"]):
+                print("[ASOBO] " + job["name"] + " is up to date, skipping export.")
+                continue
+
+            outdated_jobs.append(job)
+
+        return outdated_jobs
+
+    @staticmethod
+    def save_manifests(jobs, results, manifests):
+        fingerprints = {job["file_path"]: job["fingerprint"] for job in jobs}
+        for result in results:
+            if not result["success"]:
+                continue
+
+            folder_path = os.path.dirname(result["file_path"])
+            manifests[folder_path].update(
+                result["file_path"], fingerprints[result["file_path"]]
+            )
+
+        for manifest in manifests.values():
+            manifest.save()
+
+    @staticmethod
+    def write_lod_group_xml(context, lod_group, scene_index, output_root=""):
+        from .msfs_multi_export_objects import MSFS2020_LODGroupUtility
+
+        export_folder_path = MSFS2020_OT_MultiExportGLTF2.get_job_folder_path(
+            lod_group.folder_path, output_root
+        )
+        xml_path = os.path.join(export_folder_path, lod_group.group_name + ".xml")
+        found_guid = None
+
+        if os.path.exists(xml_path):
+            tree = etree.parse(xml_path)
+            found_guid = tree.getroot().attrib.get("guid")
+
+        if lod_group.overwrite_guid or found_guid is None:
+            root = etree.Element(
+                "ModelInfo",
+                guid="{" + str(uuid.uuid4()) + "}",
+                version="1.1",
+            )
+        else:
+            root = etree.Element("ModelInfo", guid=found_guid, version="1.1")
+
+        lods = etree.SubElement(root, "LODS")
+
+        lod_files = {}
+
+        for lod in lod_group.lods:
+            if not MSFS2020_LODGroupUtility.lod_is_visible(context, lod, scene_index):
+                continue
+
+            if lod.enabled:
+                lod_files[lod.file_name] = (lod.lod_index, lod.lod_value)
+
+        # Sorted by the LOD index read from the names, so LOD10 comes after LOD9
+        lod_files = sorted(lod_files.items(), key=lambda item: (item[1][0], item[0]))
+        last_lod = list(lod_files)[-1:]
+
+        for file_name, (lod_index, lod_value) in lod_files:
+            lod_element = etree.SubElement(lods, "LOD")
+
+            if file_name != last_lod[0]:
+                lod_element.set("minSize", str(lod_value))
+
+            lod_element.set("ModelFile", os.path.splitext(file_name)[0] + ".gltf")
+
+        if lod_files:
+            # Format XML
+            dom = xml.dom.minidom.parseString(etree.tostring(root))
+            xml_string = dom.toprettyxml(encoding="utf-8")
+
+            with open(xml_path, "wb") as f:
+                f.write(xml_string)
+                f.close()
+
+    # Progress of the running modal multi-export, drawn by the panel
+    progress = None
+
+    def prepare_export(self, context):
+        settings = context.scene.msfs_multi_exporter_settings
+        self.start_time = time.perf_counter()
+
+        # Built once for the whole run, the export itself does not change the view layer
+        self.scene_index = MSFS2020_SceneIndex(context)
+
+        with profile_section("gather_jobs", "plan"):
+            jobs, errors = MSFS2020_OT_MultiExportGLTF2.gather_jobs(
+                context, self.scene_index, self.name_filter, self.output_root
+            )
+        for error in errors:
+            self.report({"ERROR"}, error)
+
+        self.errors = errors
+
+        self.manifests = {}
+        if settings.use_incremental_export:
+            with profile_section("filter_up_to_date_jobs", "plan"):
+                jobs = MSFS2020_OT_MultiExportGLTF2.filter_up_to_date_jobs(
+                    context, jobs, self.manifests, self.scene_index
+                )
+
+        self.jobs = jobs
+        self.results = []
+        self.parallel_export = None
+
+    def use_single_pass_presets(self, context):
+        settings = context.scene.msfs_multi_exporter_settings
+        # Resolving the unique ID collisions of the combined export would rename nodes
+        # that only collide with the nodes of another preset
+        return (
+            settings.use_single_pass_presets
+            and context.scene.msfs_multi_exporter_current_tab == "PRESETS"
+            and len(self.jobs) > 1
+            and not context.scene.msfs_exporter_settings.resolve_unique_id_collisions
+        )
+
+    def use_parallel_export(self, context):
+        settings = context.scene.msfs_multi_exporter_settings
+        return settings.use_parallel_export and len(self.jobs) > 1
+
+    def finish_export(self, context, cancelled=False):
+        settings = context.scene.msfs_multi_exporter_settings
+
+        for result in self.results:
+            if not result["success"]:
+                self.report(
+                    {"ERROR"},
+                    "[EXPORT][ERROR] "
+                    + result["name"]
+                    + " : "
+                    + result["error"],
+                )
+            for warning in result.get("warnings", []):
+                self.report({"WARNING"}, "[EXPORT][WARNING] " + result["name"] + " : " + warning)
+
+        if settings.use_incremental_export:
+            MSFS2020_OT_MultiExportGLTF2.save_manifests(self.jobs, self.results, self.manifests)
+
+        # The ModelInfo XML is only written once every glTF of the run has been exported,
+        # a cancelled run would reference missing files
+        if not cancelled and context.scene.msfs_multi_exporter_current_tab == "OBJECTS":
+            for lod_group in context.scene.msfs_multi_exporter_lod_groups:
+                if lod_group.generate_xml and MSFS2020_OT_MultiExportGLTF2.matches_name_filter(
+                    lod_group.group_name, self.name_filter
+                ):
+                    with profile_section("write_lod_group_xml", "xml"):
+                        MSFS2020_OT_MultiExportGLTF2.write_lod_group_xml(
+                            context, lod_group, self.scene_index, self.output_root
                         )
-                        MSFS2020_OT_MultiExportGLTF2.export(exportPath)
-                    else:
-                        self.report(
-                            {"ERROR"},
-                            "[EXPORT][ERROR] Preset : "
-                            + preset.name
-                            + " does not have an export path set.",
-                        )
+
+        self.report_timings(cancelled)
+
+        if self.summary_path:
+            self.write_summary(context, cancelled)
+
+    @staticmethod
+    def get_dependencies():
+        """
+        Files read by the export besides the .blend file, so a batch export can tell
+        when the exported files are outdated.
+
+        Returns:
+            list(str): The absolute paths of the linked libraries and of the unpacked images
+        """
+        dependencies = set()
+        for library in bpy.data.libraries:
+            dependencies.add(os.path.normpath(bpy.path.abspath(library.filepath)))
+        for image in bpy.data.images:
+            if image.source in {"FILE", "SEQUENCE", "TILED"} and image.packed_file is None:
+                dependencies.add(
+                    os.path.normpath(bpy.path.abspath(image.filepath, library=image.library))
+                )
+        return sorted(dependencies)
+
+    def write_summary(self, context, cancelled=False):
+        summary = {
+            "blend_file": bpy.data.filepath,
+            "tab": context.scene.msfs_multi_exporter_current_tab,
+            "success": (
+                not cancelled
+                and not self.errors
+                and all(result["success"] for result in self.results)
+            ),
+            "cancelled": cancelled,
+            "duration": time.perf_counter() - self.start_time,
+            "errors": self.errors,
+            "files": self.results,
+            "dependencies": MSFS2020_OT_MultiExportGLTF2.get_dependencies(),
+        }
+
+        summary_path = bpy.path.abspath(self.summary_path)
+        os.makedirs(os.path.dirname(os.path.abspath(summary_path)), exist_ok=True)
+        with open(summary_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=4)
+
+    def report_timings(self, cancelled=False):
+        if not self.results:
+            return
+
+        timed_results = sorted(
+            self.results, key=lambda result: result.get("duration", 0.0), reverse=True
+        )
+        print("[ASOBO] Multi-export timings:")
+        for result in timed_results:
+            print(
+                "[ASOBO]   {0} : {1:.2f} s{2}".format(
+                    result["name"],
+                    result.get("duration", 0.0),
+                    "" if result["success"] else " (failed)",
+                )
+            )
+
+        message = "Exported {0} of {1} file(s) in {2:.1f} s".format(
+            sum(1 for result in self.results if result["success"]),
+            len(self.jobs),
+            sum(result.get("duration", 0.0) for result in self.results),
+        )
+        if cancelled:
+            self.report({"WARNING"}, "Multi-export cancelled. " + message)
+        else:
+            self.report({"INFO"}, message)
+
+    def run_export(self, context):
+        self.prepare_export(context)
+
+        if self.use_single_pass_presets(context):
+            from .msfs_multi_export_split import MSFS2020_SinglePassPresetExport
+
+            single_pass_export = MSFS2020_SinglePassPresetExport(self.jobs)
+            with profile_section("single_pass_presets", "export"):
+                self.results = single_pass_export.run(context, self.scene_index)
+        elif self.use_parallel_export(context):
+            from .msfs_multi_export_parallel import MSFS2020_ParallelExport
+
+            settings = context.scene.msfs_multi_exporter_settings
+            parallel_export = MSFS2020_ParallelExport(
+                self.jobs, settings.parallel_export_workers
+            )
+            with profile_section("parallel_export", "export"):
+                self.results = parallel_export.run(context)
+        else:
+            self.results = [
+                MSFS2020_OT_MultiExportGLTF2.run_job(context, job, self.scene_index)
+                for job in self.jobs
+            ]
+
+        self.finish_export(context)
+
+    @staticmethod
+    def start_profiler(context):
+        settings = context.scene.msfs_multi_exporter_settings
+        if not settings.enable_profiling:
+            return None
+
+        profiler = MSFS2020_Profiler(settings.trace_python_memory)
+        profiler.start()
+        return profiler
+
+    @staticmethod
+    def stop_profiler(context, profiler):
+        if profiler is None:
+            return
+
+        settings = context.scene.msfs_multi_exporter_settings
+        profiler.stop()
+        profiler.write_report(
+            bpy.path.abspath(settings.profiling_folder_path) or tempfile.gettempdir()
+        )
+
+    def execute(self, context):
+        profiler = MSFS2020_OT_MultiExportGLTF2.start_profiler(context)
+        if profiler is None:
+            self.run_export(context)
+            return {"FINISHED"}
+
+        try:
+            with profiler.section("multi_export", "run"):
+                self.run_export(context)
+        finally:
+            MSFS2020_OT_MultiExportGLTF2.stop_profiler(context, profiler)
 
         return {"FINISHED"}
 
+    # region Modal export
+    # Exporting from the UI runs one file per timer tick, execute() stays synchronous for scripts
+
+    # Events let through during a run, they only move the view. Any other event could edit the
+    # LODs, presets or objects the remaining jobs and the scene index refer to
+    VIEW_EVENTS = {
+        "MOUSEMOVE",
+        "INBETWEEN_MOUSEMOVE",
+        "MIDDLEMOUSE",
+        "WHEELUPMOUSE",
+        "WHEELDOWNMOUSE",
+        "TRACKPADPAN",
+        "TRACKPADZOOM",
+        "NDOF_MOTION",
+        "WINDOW_DEACTIVATE",
+    }
+
+    def invoke(self, context, event):
+        if context.window is None:
+            return self.execute(context)
+
+        self.profiler = MSFS2020_OT_MultiExportGLTF2.start_profiler(context)
+        self.prepare_export(context)
+        if not self.jobs:
+            self.finish_export(context)
+            MSFS2020_OT_MultiExportGLTF2.stop_profiler(context, self.profiler)
+            return {"FINISHED"}
+
+        self.job_index = 0
+        self.export_start_time = time.perf_counter()
+
+        wm = context.window_manager
+        wm.progress_begin(0, len(self.jobs))
+        self.timer = wm.event_timer_add(0.01, window=context.window)
+        wm.modal_handler_add(self)
+        self.update_progress(context)
+        return {"RUNNING_MODAL"}
+
+    def get_done_job_count(self):
+        if self.parallel_export is not None:
+            return self.parallel_export.get_finished_job_count()
+        return self.job_index
+
+    def export_step(self, context):
+        """
+        Export the next file of the run.
+
+        Returns:
+            bool: True once every file has been exported
+        """
+        if self.use_single_pass_presets(context):
+            # The combined export can't be split across ticks
+            from .msfs_multi_export_split import MSFS2020_SinglePassPresetExport
+
+            with profile_section("single_pass_presets", "export"):
+                self.results = MSFS2020_SinglePassPresetExport(self.jobs).run(
+                    context, self.scene_index
+                )
+            self.job_index = len(self.jobs)
+            return True
+
+        if self.use_parallel_export(context):
+            if self.parallel_export is None:
+                from .msfs_multi_export_parallel import MSFS2020_ParallelExport
+
+                settings = context.scene.msfs_multi_exporter_settings
+                self.parallel_export = MSFS2020_ParallelExport(
+                    self.jobs, settings.parallel_export_workers
+                )
+                self.parallel_export.start(context)
+                return False
+
+            if not self.parallel_export.poll():
+                return False
+
+            try:
+                with profile_section("parallel_export", "export"):
+                    self.results = self.parallel_export.gather_results()
+            finally:
+                self.parallel_export.cleanup()
+                self.parallel_export = None
+            self.job_index = len(self.jobs)
+            return True
+
+        job = self.jobs[self.job_index]
+        self.results.append(
+            MSFS2020_OT_MultiExportGLTF2.run_job(context, job, self.scene_index)
+        )
+        self.job_index += 1
+        return self.job_index >= len(self.jobs)
+
+    def update_progress(self, context):
+        done = self.get_done_job_count()
+        total = len(self.jobs)
+        elapsed = time.perf_counter() - self.export_start_time
+
+        text = "Multi-Export {0}/{1}".format(done, total)
+        if done < total and self.parallel_export is None:
+            text += " : " + self.jobs[done]["name"]
+        if 0 < done < total:
+            text += " (ETA {0:.0f} s)".format(elapsed / done * (total - done))
+        text += ", press Esc to cancel"
+
+        MSFS2020_OT_MultiExportGLTF2.progress = {
+            "factor": done / total,
+            "text": text,
+        }
+
+        context.window_manager.progress_update(done)
+        if context.workspace is not None:
+            context.workspace.status_text_set(text)
+        for area in context.screen.areas if context.screen is not None else []:
+            if area.type == "VIEW_3D":
+                area.tag_redraw()
+
+    def end_modal(self, context, cancelled=False):
+        wm = context.window_manager
+        wm.event_timer_remove(self.timer)
+        wm.progress_end()
+        if context.workspace is not None:
+            context.workspace.status_text_set(None)
+        MSFS2020_OT_MultiExportGLTF2.progress = None
+
+        if self.parallel_export is not None:
+            self.parallel_export.terminate()
+            self.parallel_export = None
+
+        self.finish_export(context, cancelled)
+        MSFS2020_OT_MultiExportGLTF2.stop_profiler(context, self.profiler)
+
+        for area in context.screen.areas if context.screen is not None else []:
+            if area.type == "VIEW_3D":
+                area.tag_redraw()
+
+    def modal(self, context, event):
+        # Files are exported one per tick, so a cancel always happens between two files
+        if event.type == "ESC":
+            self.end_modal(context, cancelled=True)
+            return {"CANCELLED"}
+
+        if event.type in MSFS2020_OT_MultiExportGLTF2.VIEW_EVENTS:
+            return {"PASS_THROUGH"}
+
+        if event.type != "TIMER":
+            return {"RUNNING_MODAL"}
+
+        try:
+            done = self.export_step(context)
+        except Exception:
+            self.end_modal(context, cancelled=True)
+            raise
+
+        if done:
+            self.end_modal(context)
+            return {"FINISHED"}
+
+        self.update_progress(context)
+        return {"RUNNING_MODAL"}
+    # endregion
+
 
 class MSFS2020_OT_ChangeTab(bpy.types.Operator):
     bl_idname = "msfs2020.multi_export_change_tab"
@@ -511,6 +1069,13 @@ class MSFS2020_PT_MultiExporter(bpy.types.Panel):
 
         current_tab = context.scene.msfs_multi_exporter_current_tab
 
+        progress = MSFS2020_OT_MultiExportGLTF2.progress
+        if progress is not None:
+            if bpy.app.version >= (4, 0, 0):
+                layout.progress(factor=progress["factor"], text=progress["text"])
+            else:
+                layout.label(text=progress["text"], icon="EXPORT")
+
         row = layout.row(align=True)
         row.operator(
             MSFS2020_OT_ChangeTab.bl_idname,
@@ -0,0 +1,640 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS-2020 authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Batch multi-export of every .blend file of a folder, run outside of Blender:
+
+    python <addon folder>/io/msfs_multi_export_batch.py --blender <blender executable> \
+        --jobs 4 --timeout 600 --retries 1 --memory-limit 8192 C:/Scenery/Sources
+
+Every file is exported by a background Blender process running msfs_multi_export_cli.py.
+Only the Python standard library is used, so this module can run without bpy.
+"""
+
+import argparse
+import concurrent.futures
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+CLI_SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "msfs_multi_export_cli.py")
+ADDON_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STATE_FILE_NAME = "batch_state.json"
+REPORT_FILE_NAME = "batch_report.json"
+
+# Seconds between two checks of the running Blender processes
+POLL_INTERVAL = 0.5
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def get_file_hash(path):
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def get_process_memory(pid):
+    """
+    Resident memory of a process, in bytes.
+
+    Returns:
+        int: The memory used by the process, or None when it can't be read on this platform
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            with open(f"/proc/{pid}/status", "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError):
+            return None
+        return None
+
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return None
+        try:
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(PROCESS_MEMORY_COUNTERS)
+            if not kernel32.K32GetProcessMemoryInfo(
+                handle, ctypes.byref(counters), counters.cb
+            ):
+                return None
+            return counters.WorkingSetSize
+        finally:
+            kernel32.CloseHandle(handle)
+
+    return None
+
+
+def get_child_process_ids(pid):
+    """
+    Every process started by a process, directly or not.
+
+    Returns:
+        list(int): The process ids, None when they can't be listed on this platform
+    """
+    if sys.platform.startswith("linux"):
+        # The Blender processes are started in their own process group, the one killed on timeout
+        pids = []
+        for name in os.listdir("/proc"):
+            if not name.isdigit() or int(name) == pid:
+                continue
+            try:
+                with open(f"/proc/{name}/stat", "r", encoding="utf-8") as f:
+                    # The process name is in parentheses and can hold spaces, the fields follow it
+                    fields = f.read().rpartition(")")[2].split()
+            except OSError:
+                continue
+            if int(fields[2]) == pid:
+                pids.append(int(name))
+        return pids
+
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESSENTRY32W(ctypes.Structure):
+            _fields_ = [
+                ("dwSize", wintypes.DWORD),
+                ("cntUsage", wintypes.DWORD),
+                ("th32ProcessID", wintypes.DWORD),
+                ("th32DefaultHeapID", ctypes.c_void_p),
+                ("th32ModuleID", wintypes.DWORD),
+                ("cntThreads", wintypes.DWORD),
+                ("th32ParentProcessID", wintypes.DWORD),
+                ("pcPriClassBase", ctypes.c_long),
+                ("dwFlags", wintypes.DWORD),
+                ("szExeFile", ctypes.c_wchar * 260),
+            ]
+
+        TH32CS_SNAPPROCESS = 0x2
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+        snapshot = kernel32.CreateToolhelp32Snapshot(TH32CS_SNAPPROCESS, 0)
+        if snapshot == wintypes.HANDLE(-1).value:
+            return None
+
+        # Parent process id -> child process ids
+        children = {}
+        try:
+            entry = PROCESSENTRY32W()
+            entry.dwSize = ctypes.sizeof(PROCESSENTRY32W)
+            found = kernel32.Process32FirstW(snapshot, ctypes.byref(entry))
+            while found:
+                children.setdefault(entry.th32ParentProcessID, []).append(entry.th32ProcessID)
+                found = kernel32.Process32NextW(snapshot, ctypes.byref(entry))
+        finally:
+            kernel32.CloseHandle(snapshot)
+
+        pids = []
+        stack = list(children.get(pid, []))
+        while stack:
+            child_pid = stack.pop()
+            if child_pid == pid or child_pid in pids:
+                continue
+            pids.append(child_pid)
+            stack.extend(children.get(child_pid, []))
+        return pids
+
+    return None
+
+
+def get_process_tree_memory(pid):
+    """
+    Resident memory of a process and of every process it started, such as the Blender
+    processes of a parallel export, in bytes.
+
+    Returns:
+        int: The memory used by the processes, or None when it can't be read on this platform
+    """
+    memory = get_process_memory(pid)
+    if memory is None:
+        return None
+
+    for child_pid in get_child_process_ids(pid) or []:
+        # A process can exit while the tree is read
+        memory += get_process_memory(child_pid) or 0
+    return memory
+
+
+def get_file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def get_addon_signature():
+    # The addon is the one installed from this folder, any change of its code can change the exports
+    addon_hash = hashlib.sha256()
+    for folder, folders, files in os.walk(ADDON_FOLDER):
+        folders[:] = sorted(name for name in folders if name != "__pycache__")
+        for name in sorted(files):
+            if name.endswith(".py"):
+                path = os.path.join(folder, name)
+                signature = (os.path.relpath(path, ADDON_FOLDER), get_file_signature(path))
+                addon_hash.update(repr(signature).encode("utf-8"))
+    return addon_hash.hexdigest()
+
+
+def get_process_group_options():
+    # A process group lets a timed out export be killed with the workers of a parallel export
+    if sys.platform == "win32":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def kill_process_tree(process):
+    if process.poll() is not None:
+        return
+
+    if sys.platform == "win32":
+        subprocess.run(
+            ["taskkill", "/F", "/T", "/PID", str(process.pid)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    else:
+        import signal
+
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except OSError:
+            process.kill()
+    process.wait()
+
+
+class MSFS2020_BatchState:
+    """
+    Inputs of the last successful export of every .blend file, to skip the unchanged ones.
+
+    A file is unchanged if its size and modification time did not change, or if they did
+    but its content hash is the same (file copied or saved again without changes). The
+    export options, Blender, the addon, the linked libraries and images listed in the export
+    summary must not have changed either, and the exported files must still exist.
+    """
+
+    def __init__(self, state_path):
+        self.state_path = state_path
+        self.files = {}
+
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                self.files = json.load(f).get("files", {})
+        except (OSError, ValueError):
+            self.files = {}
+
+    def is_up_to_date(self, blend_path, options, environment):
+        entry = self.files.get(blend_path)
+        if (
+            entry is None
+            or entry["options"] != options
+            or entry.get("environment") != environment
+        ):
+            return False
+
+        if not all(os.path.exists(path) for path in entry.get("outputs", [])):
+            return False
+
+        for path, signature in entry.get("dependencies", {}).items():
+            if get_file_signature(path) != signature:
+                return False
+
+        stat = os.stat(blend_path)
+        if entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            return True
+
+        if entry["size"] != stat.st_size or entry["hash"] != get_file_hash(blend_path):
+            return False
+
+        entry["mtime"] = stat.st_mtime
+        return True
+
+    def update(self, blend_path, options, environment, summary):
+        stat = os.stat(blend_path)
+        self.files[blend_path] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "hash": get_file_hash(blend_path),
+            "options": options,
+            "environment": environment,
+            "outputs": [result["file_path"] for result in summary["files"] if result["success"]],
+            "dependencies": {
+                path: get_file_signature(path) for path in summary.get("dependencies", [])
+            },
+        }
+
+    def remove(self, blend_path):
+        self.files.pop(blend_path, None)
+
+    def save(self):
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"files": self.files}, f, indent=4)
+        os.replace(temp_path, self.state_path)
+
+
+class MSFS2020_BatchExport:
+    """
+    Run the multi-export of many .blend files in a bounded pool of background Blender processes.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.source_folder = os.path.abspath(args.source_folder)
+        self.report_folder = os.path.abspath(
+            args.report_folder or os.path.join(self.source_folder, ".msfs_multi_export_batch")
+        )
+        self.state = MSFS2020_BatchState(os.path.join(self.report_folder, STATE_FILE_NAME))
+
+    def find_blend_files(self):
+        blend_paths = []
+        for folder, folders, files in os.walk(self.source_folder):
+            # Don't look into the report folder or hidden folders
+            folders[:] = [
+                name
+                for name in folders
+                if not name.startswith(".")
+                and os.path.join(folder, name) != self.report_folder
+            ]
+            for name in files:
+                if not name.lower().endswith(".blend"):
+                    continue
+
+                blend_path = os.path.join(folder, name)
+                relative_path = os.path.relpath(blend_path, self.source_folder)
+                if any(
+                    fnmatch.fnmatch(relative_path.replace(os.sep, "/"), pattern)
+                    for pattern in self.args.exclude
+                ):
+                    continue
+                blend_paths.append(blend_path)
+        return sorted(blend_paths)
+
+    def get_options(self):
+        # Options changing the exported files, a file is exported again when they change
+        return {
+            "tab": self.args.tab,
+            "filter": self.args.filter,
+            "output_root": self.args.output_root,
+        }
+
+    def get_environment(self):
+        # Blender and the addon doing the export, a file is exported again when they change
+        blender_path = shutil.which(self.args.blender) or self.args.blender
+        return {
+            "blender": [os.path.abspath(blender_path), get_file_signature(blender_path)],
+            "addon": get_addon_signature(),
+        }
+
+    def get_file_stem(self, blend_path):
+        relative_path = os.path.relpath(blend_path, self.source_folder)
+        return os.path.splitext(relative_path)[0].replace(os.sep, "__").replace("/", "__")
+
+    def get_command(self, blend_path, summary_path):
+        cli_args = ["--tab", self.args.tab, "--summary", summary_path]
+        for pattern in self.args.filter:
+            cli_args += ["--filter", pattern]
+        if self.args.output_root:
+            # Keep the folder structure of the sources in the output folder
+            relative_path = os.path.relpath(blend_path, self.source_folder)
+            output_folder = os.path.join(
+                os.path.abspath(self.args.output_root), os.path.splitext(relative_path)[0]
+            )
+            cli_args += ["--output-root", output_folder]
+        if self.args.workers > 0:
+            cli_args += ["--workers", str(self.args.workers)]
+
+        return [
+            self.args.blender,
+            "--background",
+            "--factory-startup" if self.args.factory_startup else None,
+            blend_path,
+            "--python-exit-code",
+            "1",
+            "--python",
+            CLI_SCRIPT_PATH,
+            "--",
+        ] + cli_args
+
+    def run_process(self, command, log_path):
+        """
+        Run a Blender process until it exits, times out or goes over the memory limit.
+
+        Returns:
+            tuple(str, int, int): The status, exit code and peak memory (bytes) of the process
+        """
+        memory_limit = self.args.memory_limit * 1024 * 1024
+        peak_memory = 0
+
+        with open(log_path, "w", encoding="utf-8") as log_file:
+            process = subprocess.Popen(
+                [arg for arg in command if arg is not None],
+                stdout=log_file,
+                stderr=subprocess.STDOUT,
+                **get_process_group_options(),
+            )
+
+            start_time = time.perf_counter()
+            while True:
+                try:
+                    process.wait(timeout=POLL_INTERVAL)
+                    break
+                except subprocess.TimeoutExpired:
+                    pass
+
+                # With --workers, the export runs in child Blender processes
+                memory = get_process_tree_memory(process.pid)
+                if memory is not None:
+                    peak_memory = max(peak_memory, memory)
+                    if memory_limit and memory > memory_limit:
+                        kill_process_tree(process)
+                        return "memory_limit", process.returncode, peak_memory
+
+                if self.args.timeout and time.perf_counter() - start_time > self.args.timeout:
+                    kill_process_tree(process)
+                    return "timeout", process.returncode, peak_memory
+
+        return ("exported" if process.returncode == 0 else "failed"), process.returncode, peak_memory
+
+    def export_file(self, blend_path):
+        stem = self.get_file_stem(blend_path)
+        result = {
+            "blend_file": blend_path,
+            "status": None,
+            "attempts": [],
+            "duration": 0.0,
+            "summary": None,
+        }
+
+        for attempt in range(self.args.retries + 1):
+            summary_path = os.path.join(self.report_folder, "files", f"{stem}.summary.json")
+            log_path = os.path.join(self.report_folder, "files", f"{stem}.{attempt}.log")
+            if os.path.exists(summary_path):
+                os.remove(summary_path)
+
+            start_time = time.perf_counter()
+            status, exit_code, peak_memory = self.run_process(
+                self.get_command(blend_path, summary_path), log_path
+            )
+            duration = time.perf_counter() - start_time
+
+            result["attempts"].append(
+                {
+                    "status": status,
+                    "exit_code": exit_code,
+                    "duration": duration,
+                    "peak_memory": peak_memory,
+                    "log": log_path,
+                }
+            )
+            result["duration"] += duration
+            result["status"] = status
+
+            try:
+                with open(summary_path, "r", encoding="utf-8") as f:
+                    result["summary"] = json.load(f)
+            except (OSError, ValueError):
+                result["summary"] = None
+
+            print(
+                "[ASOBO] {0} : {1} ({2:.1f} s, attempt {3})".format(
+                    blend_path, status, duration, attempt + 1
+                )
+            )
+            if status == "exported":
+                break
+
+        return result
+
+    def write_report(self, results, duration):
+        report = {
+            "source_folder": self.source_folder,
+            "options": self.get_options(),
+            "duration": duration,
+            "counts": {},
+            "files": results,
+        }
+        for result in results:
+            report["counts"][result["status"]] = report["counts"].get(result["status"], 0) + 1
+
+        report_path = os.path.join(self.report_folder, REPORT_FILE_NAME)
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+        return report_path
+
+    def run(self):
+        """
+        Returns:
+            int: The process exit code, 1 if any file failed
+        """
+        os.makedirs(os.path.join(self.report_folder, "files"), exist_ok=True)
+
+        start_time = time.perf_counter()
+        options = self.get_options()
+        environment = self.get_environment()
+        results = []
+        blend_paths = []
+        for blend_path in self.find_blend_files():
+            if not self.args.force and self.state.is_up_to_date(blend_path, options, environment):
+                results.append(
+                    {
+                        "blend_file": blend_path,
+                        "status": "skipped",
+                        "attempts": [],
+                        "duration": 0.0,
+                        "summary": None,
+                    }
+                )
+            else:
+                blend_paths.append(blend_path)
+
+        print(
+            "[ASOBO] Batch export of {0} file(s), {1} unchanged".format(
+                len(blend_paths), len(results)
+            )
+        )
+
+        # The pool only waits on the Blender processes, threads are enough to drive them
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, self.args.jobs)) as executor:
+            futures = {
+                executor.submit(self.export_file, blend_path): blend_path
+                for blend_path in blend_paths
+            }
+            for future in concurrent.futures.as_completed(futures):
+                result = future.result()
+                results.append(result)
+
+                # Without a summary, the exported files and the dependencies are unknown
+                if result["status"] == "exported" and result["summary"] is not None:
+                    self.state.update(result["blend_file"], options, environment, result["summary"])
+                else:
+                    self.state.remove(result["blend_file"])
+                # Saved after each file so an interrupted batch doesn't export everything again
+                self.state.save()
+
+        results.sort(key=lambda result: result["blend_file"])
+        report_path = self.write_report(results, time.perf_counter() - start_time)
+        print("[ASOBO] Batch export report written to " + report_path)
+
+        return 0 if all(result["status"] in ("exported", "skipped") for result in results) else 1
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="msfs_multi_export_batch",
+        description="Run the MSFS 2020 multi-export of every .blend file of a folder",
+    )
+    parser.add_argument("source_folder", help="Folder searched recursively for .blend files")
+    parser.add_argument(
+        "--blender",
+        default=os.environ.get("BLENDER", "blender"),
+        help="Blender executable, with the addon installed (default: $BLENDER or blender)",
+    )
+    parser.add_argument(
+        "--tab",
+        choices=("objects", "presets"),
+        default="objects",
+        help="Export the LOD groups (objects) or the presets (presets) of each file",
+    )
+    parser.add_argument(
+        "--filter",
+        action="append",
+        default=[],
+        help="Name pattern (fnmatch) of the LOD groups or presets to export, can be repeated",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        help="Pattern (fnmatch) of the .blend paths to ignore, relative to the source folder",
+    )
+    parser.add_argument(
+        "--output-root",
+        default="",
+        help="Export each file to <output root>/<path of the .blend file> instead of the scene export paths",
+    )
+    parser.add_argument(
+        "--report-folder",
+        default="",
+        help="Folder of the report, logs and state (default: <source folder>/.msfs_multi_export_batch)",
+    )
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Number of files exported at once")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Parallel export workers of each file (see the Parallel Export setting)",
+    )
+    parser.add_argument("--timeout", type=float, default=0, help="Seconds before an export is stopped, 0 to disable")
+    parser.add_argument("--retries", type=int, default=0, help="Number of times a failed export is retried")
+    parser.add_argument(
+        "--memory-limit",
+        type=int,
+        default=0,
+        help=(
+            "Resident memory in MB of Blender and its parallel export processes above which "
+            "an export is stopped, 0 to disable (Windows and Linux)"
+        ),
+    )
+    parser.add_argument("--force", action="store_true", help="Export the unchanged files too")
+    parser.add_argument(
+        "--factory-startup",
+        action="store_true",
+        help="Start Blender without the user preferences, the export script enables the addon",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    if not os.path.isdir(args.source_folder):
+        print("[ASOBO] " + args.source_folder + " is not a folder")
+        return 1
+    return MSFS2020_BatchExport(args).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
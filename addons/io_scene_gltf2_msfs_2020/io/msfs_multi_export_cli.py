@@ -0,0 +1,197 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS-2020 authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Command line entry point of the multi-export, for unattended builds:
+
+    blender --background scene.blend --python-exit-code 1 \
+        --python <addon folder>/io/msfs_multi_export_cli.py -- \
+        --tab objects --filter "Cube*" --output-root //build --summary //build/summary.json
+
+The Blender process exits with 0 when every file was exported, 1 otherwise.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import bpy
+
+TABS = {
+    "objects": "OBJECTS",
+    "presets": "PRESETS",
+}
+
+
+def get_script_args(argv):
+    # Blender's own arguments come before "--"
+    if "--" in argv:
+        return argv[argv.index("--") + 1:]
+    return []
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="msfs_multi_export_cli",
+        description="Export the LOD groups or presets of a .blend file with the MSFS 2020 multi-exporter",
+    )
+    parser.add_argument(
+        "--tab",
+        choices=sorted(TABS),
+        default="objects",
+        help="Export the LOD groups (objects) or the presets (presets) of the scene",
+    )
+    parser.add_argument(
+        "--filter",
+        action="append",
+        default=[],
+        help="Name pattern (fnmatch) of the LOD groups or presets to export, can be repeated",
+    )
+    parser.add_argument(
+        "--output-root",
+        default="",
+        help="Folder where every file is exported, instead of the export paths set in the scene",
+    )
+    parser.add_argument(
+        "--summary",
+        default="",
+        help="JSON file where the result of the export is written",
+    )
+    parser.add_argument(
+        "--no-reload-lods",
+        action="store_true",
+        help="Use the LOD groups saved in the file instead of reloading them",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Export with this many background Blender processes (parallel export)",
+    )
+    return parser.parse_args(argv)
+
+
+def read_summary(summary_path):
+    try:
+        with open(summary_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print("[ASOBO] Could not read the multi-export summary " + summary_path + ": " + str(e))
+        return None
+
+
+def export_current_file(tab, name_filter=(), output_root="", summary_path="", reload_lods=True, workers=0):
+    """
+    Run the multi-export of the file currently open.
+
+    Returns:
+        dict: The export summary, None if it could not be read
+    """
+    scene = bpy.context.scene
+    scene.msfs_multi_exporter_current_tab = TABS[tab]
+
+    if workers > 0:
+        settings = scene.msfs_multi_exporter_settings
+        settings.use_parallel_export = True
+        settings.parallel_export_workers = workers
+
+    if scene.msfs_multi_exporter_current_tab == "OBJECTS" and reload_lods:
+        bpy.ops.msfs2020.reload_lod_groups()
+
+    temp_dir = None
+    summary_path = bpy.path.abspath(summary_path) if summary_path else ""
+    if not summary_path:
+        temp_dir = tempfile.mkdtemp(prefix="msfs2020_multi_export_cli_")
+        summary_path = os.path.join(temp_dir, "summary.json")
+
+    try:
+        bpy.ops.export_scene.multi_export_gltf(
+            "EXEC_DEFAULT",
+            name_filter=",".join(name_filter),
+            output_root=output_root,
+            summary_path=summary_path,
+        )
+        return read_summary(summary_path)
+    finally:
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def print_summary(summary):
+    for error in summary["errors"]:
+        print(error)
+    for result in summary["files"]:
+        print(
+            "[ASOBO] {0} : {1}".format(
+                result["file_path"], "exported" if result["success"] else result["error"]
+            )
+        )
+        for warning in result.get("warnings", []):
+            print("[ASOBO] {0} : {1}".format(result["file_path"], warning))
+    print(
+        "[ASOBO] Multi-export {0} : {1} file(s) in {2:.1f} s".format(
+            "succeeded" if summary["success"] else "failed",
+            len(summary["files"]),
+            summary["duration"],
+        )
+    )
+
+
+def main(argv=None):
+    """
+    Run the multi-export of the current file with the command line options.
+
+    Returns:
+        int: The process exit code
+    """
+    args = parse_args(get_script_args(sys.argv if argv is None else argv))
+
+    summary = export_current_file(
+        args.tab,
+        name_filter=args.filter,
+        output_root=args.output_root,
+        summary_path=args.summary,
+        reload_lods=not args.no_reload_lods,
+        workers=args.workers,
+    )
+    if summary is None:
+        return 1
+
+    print_summary(summary)
+    return 0 if summary["success"] else 1
+
+
+if __name__ == "__main__":
+    # Run as a script, this file is not part of the addon package: enable the addon
+    # installed from this folder and run its copy of the module
+    import addon_utils
+    import importlib
+
+    addon_folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for module in addon_utils.modules():
+        if os.path.dirname(os.path.abspath(module.__file__)) == addon_folder:
+            break
+    else:
+        print("[ASOBO] The MSFS 2020 addon in " + addon_folder + " is not installed")
+        sys.exit(1)
+
+    if not addon_utils.check(module.__name__)[1]:
+        addon_utils.enable(module.__name__, default_set=False)
+
+    cli = importlib.import_module(module.__name__ + ".io.msfs_multi_export_cli")
+    sys.exit(cli.main())
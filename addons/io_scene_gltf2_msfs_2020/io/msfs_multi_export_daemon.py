@@ -0,0 +1,563 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS-2020 authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Local export daemon keeping warm background Blender processes, run outside of Blender:
+
+    python <addon folder>/io/msfs_multi_export_daemon.py serve --blender <blender executable> --workers 4
+    python <addon folder>/io/msfs_multi_export_daemon.py export scene.blend --tab objects --filter "Cube*"
+    python <addon folder>/io/msfs_multi_export_daemon.py stop
+
+Each worker starts Blender and enables the addon once, then opens and exports the .blend
+file of every job it is given. Workers are restarted after a number of jobs to release the
+memory Blender keeps between files. Only the Python standard library is used by the daemon
+and its clients, the worker side runs inside Blender.
+
+The daemon only accepts loopback addresses. Its connection key is generated every time it
+starts and written to a file only the current user can read, which the clients read back.
+"""
+
+import argparse
+import ipaddress
+import os
+import queue
+import secrets
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+ADDON_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_ADDRESS = "127.0.0.1:6020"
+# Only the user running the daemon can read its key files
+KEY_FOLDER = os.path.join(os.path.expanduser("~"), ".msfs2020_export_daemon")
+# Connection key of the worker listener, given to the Blender processes through their environment
+WORKER_KEY_ENVIRONMENT_VARIABLE = "MSFS2020_EXPORT_DAEMON_WORKER_KEY"
+
+# Seconds between two checks of the state of a worker or of the daemon
+POLL_INTERVAL = 0.5
+# Seconds a new Blender process has to connect back to the daemon
+WORKER_START_TIMEOUT = 120
+
+
+def is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host.strip("[]")).is_loopback
+    except ValueError:
+        return False
+
+
+def parse_address(address):
+    host, _, port = address.rpartition(":")
+    host = host or "127.0.0.1"
+    # Connections are pickled messages, the daemon must not be reachable from another machine
+    if not is_loopback(host):
+        raise ValueError("The export daemon only accepts loopback addresses, not " + host)
+    return (host.strip("[]"), int(port))
+
+
+def get_key_path(address):
+    return os.path.join(KEY_FOLDER, "daemon_{0}.key".format(parse_address(address)[1]))
+
+
+def write_authkey(key_path):
+    """
+    Write a new random connection key to a file only the current user can read.
+
+    Returns:
+        bytes: The connection key
+    """
+    authkey = secrets.token_hex(32).encode("ascii")
+    os.makedirs(os.path.dirname(key_path), mode=0o700, exist_ok=True)
+
+    # Never reuse a key file another user could have prepared
+    if os.path.lexists(key_path):
+        os.remove(key_path)
+    fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(authkey)
+    return authkey
+
+
+def read_authkey(key_path):
+    with open(key_path, "rb") as f:
+        return f.read().strip()
+
+
+def get_failed_summary(blend_path, error):
+    return {
+        "blend_file": blend_path,
+        "success": False,
+        "cancelled": False,
+        "duration": 0.0,
+        "errors": ["[EXPORT][ERROR] " + error],
+        "files": [],
+    }
+
+
+# region Worker
+def get_worker_command(blender_path, address, worker_id):
+    # The addon package name depends on how it was installed, so it is found from its folder
+    expression = (
+        "import addon_utils, importlib, os, sys\n"
+        "module = next((module for module in addon_utils.modules()"
+        f" if os.path.dirname(os.path.abspath(module.__file__)) == {ADDON_FOLDER!r}), None)\n"
+        "if module is None:\n"
+        f"    print('[ASOBO] The MSFS 2020 addon in ' + {ADDON_FOLDER!r} + ' is not installed')\n"
+        "    sys.exit(1)\n"
+        "if not addon_utils.check(module.__name__)[1]:\n"
+        "    addon_utils.enable(module.__name__, default_set=False)\n"
+        "worker = importlib.import_module(module.__name__ + '.io.msfs_multi_export_daemon')\n"
+        f"sys.exit(worker.run_worker({address!r}, {worker_id!r}))\n"
+    )
+
+    return [
+        blender_path,
+        "--background",
+        "--python-exit-code",
+        "1",
+        "--python-expr",
+        expression,
+    ]
+
+
+def run_worker(address, worker_id):
+    """
+    Entry point of a warm Blender process: export the jobs sent by the daemon until it
+    asks the worker to quit.
+
+    Returns:
+        int: The process exit code
+    """
+    import bpy
+
+    from .msfs_multi_export_cli import export_current_file
+
+    connection = Client(
+        parse_address(address), authkey=os.environ[WORKER_KEY_ENVIRONMENT_VARIABLE].encode("ascii")
+    )
+    connection.send(worker_id)
+
+    temp_dir = tempfile.mkdtemp(prefix="msfs2020_export_daemon_")
+    summary_path = os.path.join(temp_dir, "summary.json")
+
+    try:
+        while True:
+            try:
+                job = connection.recv()
+            except EOFError:
+                break
+            if job is None:
+                break
+
+            try:
+                bpy.ops.wm.open_mainfile(filepath=job["blend_file"], load_ui=False)
+                summary = export_current_file(
+                    job["tab"],
+                    name_filter=job["filter"],
+                    output_root=job["output_root"],
+                    summary_path=job["summary"] or summary_path,
+                    reload_lods=job["reload_lods"],
+                )
+                if summary is None:
+                    summary = get_failed_summary(job["blend_file"], "The export did not write its summary")
+            except Exception as e:
+                summary = get_failed_summary(job["blend_file"], str(e))
+
+            connection.send(summary)
+    finally:
+        connection.close()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return 0
+# endregion
+
+
+# region Daemon
+class MSFS2020_ExportDaemonWorker:
+    """
+    One warm Blender process and the thread feeding it the jobs of the daemon.
+    """
+
+    def __init__(self, daemon, index):
+        self.daemon = daemon
+        self.index = index
+        self.process_count = 0
+        self.process = None
+        self.connection = None
+        self.job_count = 0
+        self.log_file = None
+
+    def start_process(self):
+        # A new id for every process, so a late connection of a killed process is ignored
+        self.process_count += 1
+        worker_id = f"worker_{self.index}_{self.process_count}"
+
+        log_path = os.path.join(self.daemon.log_folder, f"worker_{self.index}.log")
+        self.log_file = open(log_path, "a", encoding="utf-8")
+        # The key goes through the environment, the command line can be read by other users
+        env = dict(os.environ)
+        env[WORKER_KEY_ENVIRONMENT_VARIABLE] = self.daemon.worker_authkey.decode("ascii")
+        self.process = subprocess.Popen(
+            get_worker_command(self.daemon.args.blender, self.daemon.worker_address, worker_id),
+            stdout=self.log_file,
+            stderr=subprocess.STDOUT,
+            env=env,
+        )
+        self.connection = self.daemon.wait_worker_connection(worker_id, self.process)
+        self.job_count = 0
+        if self.connection is None:
+            self.stop_process()
+            return False
+        return True
+
+    def stop_process(self, wait=False):
+        if self.connection is not None:
+            try:
+                if wait:
+                    self.connection.send(None)
+            except OSError:
+                pass
+            self.connection.close()
+            self.connection = None
+
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=WORKER_START_TIMEOUT if wait else 0)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
+
+    def run_job(self, job):
+        if self.process is None and not self.start_process():
+            return get_failed_summary(job["blend_file"], "The Blender worker could not be started")
+
+        start_time = time.perf_counter()
+        try:
+            self.connection.send(job)
+            while not self.connection.poll(POLL_INTERVAL):
+                if self.process.poll() is not None:
+                    raise EOFError
+                timeout = self.daemon.args.timeout
+                if timeout and time.perf_counter() - start_time > timeout:
+                    self.stop_process()
+                    return get_failed_summary(job["blend_file"], "The export timed out")
+            summary = self.connection.recv()
+        except (EOFError, OSError):
+            self.stop_process()
+            return get_failed_summary(job["blend_file"], "The Blender worker stopped during the export")
+
+        # Blender doesn't give back all the memory of a file once another one is opened
+        self.job_count += 1
+        recycle_after = self.daemon.args.recycle_after
+        if recycle_after > 0 and self.job_count >= recycle_after:
+            self.stop_process(wait=True)
+        return summary
+
+    def run(self):
+        while not self.daemon.stopped.is_set():
+            try:
+                job, reply = self.daemon.jobs.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+
+            reply.put(self.run_job(job))
+
+        self.stop_process(wait=True)
+
+
+class MSFS2020_ExportDaemon:
+    """
+    Accept export jobs from local clients and dispatch them to a pool of warm Blender processes.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.address = parse_address(args.address)
+        self.key_path = args.key_file or get_key_path(args.address)
+        self.authkey = None
+        self.jobs = queue.Queue()
+        self.stopped = threading.Event()
+        self.log_folder = os.path.abspath(
+            args.log_folder or os.path.join(tempfile.gettempdir(), "msfs2020_export_daemon")
+        )
+
+        # Worker id -> connection, filled by the thread accepting the workers
+        self.worker_connections = {}
+        self.worker_connections_changed = threading.Condition()
+        self.worker_authkey = secrets.token_hex(32).encode("ascii")
+        self.worker_listener = Listener(("127.0.0.1", 0), authkey=self.worker_authkey)
+        self.worker_address = "{0}:{1}".format(*self.worker_listener.address)
+
+        self.workers = [
+            MSFS2020_ExportDaemonWorker(self, i) for i in range(max(1, args.workers))
+        ]
+
+    def accept_workers(self):
+        while not self.stopped.is_set():
+            try:
+                connection = self.worker_listener.accept()
+                worker_id = connection.recv()
+            except (EOFError, OSError):
+                continue
+
+            with self.worker_connections_changed:
+                self.worker_connections[worker_id] = connection
+                self.worker_connections_changed.notify_all()
+
+    def wait_worker_connection(self, worker_id, process):
+        deadline = time.monotonic() + WORKER_START_TIMEOUT
+        with self.worker_connections_changed:
+            while worker_id not in self.worker_connections:
+                if process.poll() is not None or time.monotonic() > deadline or self.stopped.is_set():
+                    return None
+                self.worker_connections_changed.wait(POLL_INTERVAL)
+            return self.worker_connections.pop(worker_id)
+
+    def handle_client(self, connection):
+        try:
+            while True:
+                request = connection.recv()
+                command = request.get("command")
+                if command == "export":
+                    reply = queue.Queue()
+                    self.jobs.put((request["job"], reply))
+                    connection.send(reply.get())
+                elif command == "status":
+                    connection.send(
+                        {
+                            "workers": len(self.workers),
+                            "running": sum(1 for worker in self.workers if worker.process is not None),
+                            "queued": self.jobs.qsize(),
+                        }
+                    )
+                elif command == "stop":
+                    connection.send({"stopped": True})
+                    self.stop()
+                    return
+                else:
+                    connection.send({"error": "Unknown command " + str(command)})
+        except (EOFError, OSError):
+            pass
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        # Unblock the accept() of the listeners
+        listeners = ((parse_address(self.worker_address), self.worker_authkey), (self.address, self.authkey))
+        for address, authkey in listeners:
+            try:
+                Client(address, authkey=authkey).close()
+            except OSError:
+                pass
+
+    def serve(self):
+        os.makedirs(self.log_folder, exist_ok=True)
+
+        threads = [threading.Thread(target=self.accept_workers, daemon=True)]
+        threads += [threading.Thread(target=worker.run, daemon=True) for worker in self.workers]
+        for thread in threads:
+            thread.start()
+
+        self.authkey = write_authkey(self.key_path)
+        listener = Listener(self.address, authkey=self.authkey)
+        print(
+            "[ASOBO] Export daemon listening on {0} with {1} worker(s), key in {2}, logs in {3}".format(
+                self.args.address, len(self.workers), self.key_path, self.log_folder
+            )
+        )
+
+        try:
+            while not self.stopped.is_set():
+                try:
+                    connection = listener.accept()
+                except OSError:
+                    continue
+                if self.stopped.is_set():
+                    connection.close()
+                    break
+                threading.Thread(target=self.handle_client, args=(connection,), daemon=True).start()
+        except KeyboardInterrupt:
+            self.stopped.set()
+        finally:
+            listener.close()
+            try:
+                os.remove(self.key_path)
+            except OSError:
+                pass
+            for thread in threads[1:]:
+                thread.join()
+            self.worker_listener.close()
+
+            # Jobs nobody will run anymore
+            while not self.jobs.empty():
+                job, reply = self.jobs.get()
+                reply.put(get_failed_summary(job["blend_file"], "The export daemon was stopped"))
+
+        return 0
+# endregion
+
+
+# region Client
+class MSFS2020_ExportDaemonClient:
+    def __init__(self, address=DEFAULT_ADDRESS, key_path=""):
+        authkey = read_authkey(key_path or get_key_path(address))
+        self.connection = Client(parse_address(address), authkey=authkey)
+
+    def request(self, request):
+        self.connection.send(request)
+        return self.connection.recv()
+
+    def export(self, blend_path, tab="objects", name_filter=(), output_root="", summary_path="", reload_lods=True):
+        """
+        Export a .blend file with a worker of the daemon.
+
+        Returns:
+            dict: The export summary
+        """
+        return self.request(
+            {
+                "command": "export",
+                "job": {
+                    "blend_file": os.path.abspath(blend_path),
+                    "tab": tab,
+                    "filter": list(name_filter),
+                    "output_root": os.path.abspath(output_root) if output_root else "",
+                    "summary": os.path.abspath(summary_path) if summary_path else "",
+                    "reload_lods": reload_lods,
+                },
+            }
+        )
+
+    def close(self):
+        self.connection.close()
+# endregion
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="msfs_multi_export_daemon",
+        description="Export .blend files with a pool of warm Blender processes",
+    )
+    parser.add_argument(
+        "--address",
+        default=DEFAULT_ADDRESS,
+        help=f"Loopback address of the daemon (default: {DEFAULT_ADDRESS})",
+    )
+    parser.add_argument(
+        "--key-file",
+        default="",
+        help="File holding the connection key of the daemon (default: daemon_<port>.key in " + KEY_FOLDER + ")",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Start the daemon")
+    serve.add_argument(
+        "--blender",
+        default=os.environ.get("BLENDER", "blender"),
+        help="Blender executable, with the addon installed (default: $BLENDER or blender)",
+    )
+    serve.add_argument("--workers", type=int, default=2, help="Number of Blender processes")
+    serve.add_argument(
+        "--recycle-after",
+        type=int,
+        default=20,
+        help="Restart a Blender process after this many jobs, 0 to never restart it",
+    )
+    serve.add_argument("--timeout", type=float, default=0, help="Seconds before an export is stopped, 0 to disable")
+    serve.add_argument("--log-folder", default="", help="Folder of the Blender logs")
+
+    export = commands.add_parser("export", help="Export a .blend file with the daemon")
+    export.add_argument("blend_file")
+    export.add_argument("--tab", choices=("objects", "presets"), default="objects")
+    export.add_argument(
+        "--filter",
+        action="append",
+        default=[],
+        help="Name pattern (fnmatch) of the LOD groups or presets to export, can be repeated",
+    )
+    export.add_argument("--output-root", default="", help="Folder replacing the export paths set in the scene")
+    export.add_argument("--summary", default="", help="JSON file where the result of the export is written")
+    export.add_argument("--no-reload-lods", action="store_true")
+
+    commands.add_parser("status", help="Show the state of the daemon")
+    commands.add_parser("stop", help="Stop the daemon and its Blender processes")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    try:
+        parse_address(args.address)
+    except ValueError as e:
+        print("[ASOBO] " + str(e))
+        return 1
+
+    if args.command == "serve":
+        return MSFS2020_ExportDaemon(args).serve()
+
+    try:
+        client = MSFS2020_ExportDaemonClient(args.address, args.key_file)
+    except OSError as e:
+        print("[ASOBO] Could not connect to the export daemon on " + args.address + ": " + str(e))
+        return 1
+
+    try:
+        if args.command == "export":
+            summary = client.export(
+                args.blend_file,
+                tab=args.tab,
+                name_filter=args.filter,
+                output_root=args.output_root,
+                summary_path=args.summary,
+                reload_lods=not args.no_reload_lods,
+            )
+            for error in summary["errors"]:
+                print(error)
+            for result in summary["files"]:
+                print(
+                    "[ASOBO] {0} : {1}".format(
+                        result["file_path"], "exported" if result["success"] else result["error"]
+                    )
+                )
+                for warning in result.get("warnings", []):
+                    print("[ASOBO] {0} : {1}".format(result["file_path"], warning))
+            return 0 if summary["success"] else 1
+        elif args.command == "status":
+            print("[ASOBO] " + str(client.request({"command": "status"})))
+        elif args.command == "stop":
+            client.request({"command": "stop"})
+    finally:
+        client.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
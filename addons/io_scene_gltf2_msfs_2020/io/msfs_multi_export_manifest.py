@@ -0,0 +1,448 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS-2020 authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import os
+
+import bpy
+import numpy as np
+
+# Settings that only change how the multi-export runs, not what it writes
+RUN_OPTIONS = {
+    "name",
+    "rna_type",
+    "will_save_settings",
+    "use_parallel_export",
+    "parallel_export_workers",
+    "use_incremental_export",
+    "use_single_pass_presets",
+    "enable_profiling",
+    "trace_python_memory",
+    "profiling_folder_path",
+}
+
+# Attribute data type -> (foreach_get property, component count, numpy type)
+ATTRIBUTE_LAYOUTS = {
+    "FLOAT": ("value", 1, np.float32),
+    "INT": ("value", 1, np.int32),
+    "INT8": ("value", 1, np.int32),
+    "BOOLEAN": ("value", 1, bool),
+    "FLOAT2": ("vector", 2, np.float32),
+    "FLOAT_VECTOR": ("vector", 3, np.float32),
+    "FLOAT_COLOR": ("color", 4, np.float32),
+    "BYTE_COLOR": ("color", 4, np.float32),
+}
+
+# Object types the Khronos exporter converts to meshes
+MESH_OBJECT_TYPES = {"MESH", "CURVE", "SURFACE", "FONT", "META"}
+
+
+class MSFS2020_ExportFingerprint:
+    """
+    Content hash of everything that ends up in an exported glTF file.
+    """
+
+    def __init__(self):
+        self.hash = hashlib.sha256()
+
+    def add_value(self, value):
+        self.hash.update(repr(value).encode("utf-8"))
+
+    def add_array(self, collection, prop, components, dtype):
+        data = np.empty(len(collection) * components, dtype=dtype)
+        collection.foreach_get(prop, data)
+        self.hash.update(data.tobytes())
+
+    def add_mesh(self, mesh):
+        self.add_value((len(mesh.vertices), len(mesh.edges), len(mesh.loops), len(mesh.polygons)))
+        self.add_array(mesh.vertices, "co", 3, np.float32)
+        self.add_array(mesh.edges, "vertices", 2, np.int32)
+        self.add_array(mesh.loops, "vertex_index", 1, np.int32)
+        self.add_array(mesh.polygons, "loop_total", 1, np.int32)
+        self.add_array(mesh.polygons, "material_index", 1, np.int32)
+        self.add_array(mesh.polygons, "use_smooth", 1, bool)
+
+        for uv_layer in mesh.uv_layers:
+            self.add_value(uv_layer.name)
+            self.add_array(uv_layer.data, "uv", 2, np.float32)
+
+        for attribute in mesh.attributes:
+            layout = ATTRIBUTE_LAYOUTS.get(attribute.data_type)
+            if layout is None:
+                continue
+            self.add_value((attribute.name, attribute.domain, attribute.data_type))
+            self.add_array(attribute.data, *layout)
+
+    def add_property_value(self, identifier, value):
+        if isinstance(value, bpy.types.Image):
+            self.add_image(value)
+        elif isinstance(value, bpy.types.ID):
+            self.add_value((identifier, value.name_full))
+        elif hasattr(value, "__len__") and not isinstance(value, str):
+            self.add_value((identifier, tuple(value)))
+        else:
+            self.add_value((identifier, value))
+
+    def add_image(self, image):
+        if image is None:
+            self.add_value(None)
+            return
+
+        file_path = bpy.path.abspath(image.filepath, library=image.library)
+        self.add_value((image.name, file_path, image.file_format))
+
+        if image.packed_file is not None:
+            self.add_value(image.packed_file.size)
+        elif os.path.exists(file_path):
+            stat = os.stat(file_path)
+            self.add_value((stat.st_size, stat.st_mtime_ns))
+
+    def add_msfs_properties(self, data):
+        for prop in data.bl_rna.properties:
+            if not prop.identifier.startswith("msfs_"):
+                continue
+
+            self.add_property_value(prop.identifier, getattr(data, prop.identifier))
+
+    def add_node_settings(self, node):
+        # Settings of the node type (blend mode, interpolation...), not the ones shared by all nodes
+        # such as its location
+        base_properties = {prop.identifier for prop in bpy.types.Node.bl_rna.properties}
+        for prop in node.bl_rna.properties:
+            if prop.identifier in base_properties:
+                continue
+
+            value = getattr(node, prop.identifier)
+            if isinstance(value, bpy.types.ColorRamp):
+                self.add_value((prop.identifier, value.interpolation, value.color_mode))
+                for element in value.elements:
+                    self.add_value((element.position, tuple(element.color)))
+            elif isinstance(value, bpy.types.CurveMapping):
+                for curve in value.curves:
+                    self.add_value(tuple(tuple(point.location) for point in curve.points))
+            elif isinstance(value, bpy.types.NodeTree):
+                self.add_node_tree(value)
+            elif prop.type != "POINTER" and prop.type != "COLLECTION":
+                self.add_property_value(prop.identifier, value)
+            elif isinstance(value, bpy.types.ID):
+                self.add_property_value(prop.identifier, value)
+
+    def add_node_tree(self, node_tree, visited=None):
+        # Group nodes can share a node tree or, through a bug in a file, contain themselves
+        if visited is None:
+            visited = set()
+        if node_tree is None or node_tree.name_full in visited:
+            self.add_value(None if node_tree is None else node_tree.name_full)
+            return
+        visited.add(node_tree.name_full)
+
+        self.add_value(node_tree.name_full)
+        for node in sorted(node_tree.nodes, key=lambda node: node.name):
+            self.add_value((node.name, node.bl_idname, node.mute))
+            if node.type == "GROUP":
+                self.add_node_tree(node.node_tree, visited)
+            else:
+                self.add_node_settings(node)
+
+            for socket in node.inputs:
+                if hasattr(socket, "default_value"):
+                    self.add_property_value(socket.identifier, socket.default_value)
+
+        for link in sorted(
+            (
+                link.from_node.name,
+                link.from_socket.identifier,
+                link.to_node.name,
+                link.to_socket.identifier,
+                link.is_muted,
+            )
+            for link in node_tree.links
+        ):
+            self.add_value(link)
+
+    def add_material(self, material):
+        if material is None:
+            self.add_value(None)
+            return
+
+        self.add_value(material.name)
+        self.add_msfs_properties(material)
+
+        # blend_method is replaced by surface_render_method in recent Blender versions
+        self.add_value(
+            (
+                getattr(material, "blend_method", None),
+                getattr(material, "surface_render_method", None),
+                material.use_backface_culling,
+                material.use_nodes,
+            )
+        )
+
+        # Non MSFS materials are exported from their node tree
+        if material.use_nodes and material.node_tree is not None:
+            self.add_node_tree(material.node_tree)
+
+    def add_fcurve(self, fcurve):
+        self.add_value((fcurve.data_path, fcurve.array_index, fcurve.mute))
+        self.add_array(fcurve.keyframe_points, "co", 2, np.float32)
+        self.add_array(fcurve.keyframe_points, "handle_left", 2, np.float32)
+        self.add_array(fcurve.keyframe_points, "handle_right", 2, np.float32)
+        self.add_value(tuple(keyframe.interpolation for keyframe in fcurve.keyframe_points))
+
+    def add_action(self, action):
+        if action is None:
+            self.add_value(None)
+            return
+
+        self.add_value(action.name)
+        for fcurve in action.fcurves:
+            self.add_fcurve(fcurve)
+
+    def add_animation(self, animation_data):
+        if animation_data is None:
+            return
+
+        self.add_action(animation_data.action)
+
+        # Each NLA strip can be exported as its own glTF animation
+        for track in animation_data.nla_tracks:
+            self.add_value((track.name, track.mute, track.is_solo))
+            for strip in track.strips:
+                self.add_value(
+                    (
+                        strip.name,
+                        strip.mute,
+                        strip.frame_start,
+                        strip.frame_end,
+                        strip.action_frame_start,
+                        strip.action_frame_end,
+                        strip.scale,
+                        strip.repeat,
+                        strip.blend_type,
+                    )
+                )
+                self.add_action(strip.action)
+
+        for fcurve in animation_data.drivers:
+            self.add_fcurve(fcurve)
+            driver = fcurve.driver
+            self.add_value((driver.type, driver.expression))
+            for variable in driver.variables:
+                self.add_value((variable.name, variable.type))
+                for target in variable.targets:
+                    self.add_value(
+                        (
+                            target.id.name_full if target.id is not None else None,
+                            target.data_path,
+                            target.bone_target,
+                            target.transform_type,
+                            target.transform_space,
+                        )
+                    )
+
+    def add_custom_properties(self, obj):
+        # Custom properties are exported as extras, ID property groups are converted
+        # to plain python values so their memory address does not end up in the hash
+        for key in sorted(obj.keys()):
+            value = obj[key]
+            if hasattr(value, "to_dict"):
+                value = value.to_dict()
+            elif hasattr(value, "to_list"):
+                value = value.to_list()
+            self.add_value((key, value))
+
+    def add_object(self, obj, depsgraph):
+        self.add_value((obj.name, obj.type, obj.parent.name if obj.parent else None))
+        self.add_value(tuple(tuple(row) for row in obj.matrix_world))
+        self.add_msfs_properties(obj)
+        self.add_custom_properties(obj)
+        self.add_animation(obj.animation_data)
+
+        for slot in obj.material_slots:
+            self.add_material(slot.material)
+
+        if obj.type in MESH_OBJECT_TYPES:
+            evaluated_object = obj.evaluated_get(depsgraph)
+            mesh = evaluated_object.to_mesh()
+            try:
+                # Metaballs only have geometry on the basis object of their family
+                if mesh is not None:
+                    self.add_mesh(mesh)
+            finally:
+                evaluated_object.to_mesh_clear()
+
+            shape_keys = getattr(obj.data, "shape_keys", None)
+            if shape_keys is not None:
+                for key_block in shape_keys.key_blocks:
+                    self.add_value((key_block.name, key_block.value, key_block.mute))
+                    self.add_array(key_block.data, "co", 3, np.float32)
+                self.add_animation(shape_keys.animation_data)
+
+        elif obj.type == "ARMATURE":
+            for bone in obj.data.bones:
+                self.add_value((bone.name, bone.parent.name if bone.parent else None))
+                self.add_value(tuple(tuple(row) for row in bone.matrix_local))
+
+        elif obj.type == "LIGHT":
+            # Everything the KHR_lights_punctual export reads, some of these only
+            # exist in some Blender versions
+            light = obj.data
+            self.add_value(
+                (
+                    light.type,
+                    tuple(light.color),
+                    light.energy,
+                    getattr(light, "spot_size", None),
+                    getattr(light, "spot_blend", None),
+                    getattr(light, "shadow_soft_size", None),
+                    getattr(light, "use_custom_distance", None),
+                    getattr(light, "cutoff_distance", None),
+                    getattr(light, "use_nodes", None),
+                )
+            )
+            if getattr(light, "use_nodes", False):
+                self.add_node_tree(light.node_tree)
+            self.add_custom_properties(light)
+            self.add_animation(light.animation_data)
+
+        elif obj.type == "CAMERA":
+            camera = obj.data
+            self.add_value(
+                (
+                    camera.type,
+                    camera.lens,
+                    camera.lens_unit,
+                    camera.angle,
+                    camera.angle_x,
+                    camera.angle_y,
+                    camera.sensor_fit,
+                    camera.sensor_width,
+                    camera.sensor_height,
+                    camera.clip_start,
+                    camera.clip_end,
+                    camera.ortho_scale,
+                    camera.shift_x,
+                    camera.shift_y,
+                )
+            )
+            self.add_custom_properties(camera)
+            self.add_animation(camera.animation_data)
+
+    def add_settings(self, settings):
+        for prop in settings.bl_rna.properties:
+            if prop.identifier in RUN_OPTIONS:
+                continue
+
+            value = getattr(settings, prop.identifier)
+            if hasattr(value, "__len__") and not isinstance(value, str):
+                value = tuple(value)
+            self.add_value((prop.identifier, value))
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
+
+
+class MSFS2020_ExportManifest:
+    """
+    Fingerprints of the files previously exported in a folder, stored as JSON
+    next to the glTF files.
+    """
+
+    FILE_NAME = ".msfs_multi_export_manifest.json"
+
+    def __init__(self, folder_path):
+        self.file_path = os.path.join(folder_path, MSFS2020_ExportManifest.FILE_NAME)
+        self.entries = {}
+        self.modified = False
+
+        if os.path.exists(self.file_path):
+            try:
+                with open(self.file_path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f).get("files", {})
+            except (OSError, ValueError):
+                print("[ASOBO] Could not read export manifest " + self.file_path)
+
+    @staticmethod
+    def get_output_paths(file_path):
+        # The glTF and the .bin buffer written next to it
+        return [file_path, os.path.splitext(file_path)[0] + ".bin"]
+
+    @staticmethod
+    def get_output_stats(file_path):
+        """
+        Size and modification time of every output of an export that exists on disk.
+        """
+        stats = {}
+        for output_path in MSFS2020_ExportManifest.get_output_paths(file_path):
+            if not os.path.exists(output_path):
+                continue
+            stat = os.stat(output_path)
+            stats[os.path.basename(output_path)] = [stat.st_size, stat.st_mtime_ns]
+        return stats
+
+    def is_up_to_date(self, file_path, fingerprint):
+        if not os.path.exists(file_path):
+            return False
+
+        entry = self.entries.get(os.path.basename(file_path))
+        # Entries written by older versions only stored the fingerprint
+        if not isinstance(entry, dict) or entry.get("fingerprint") != fingerprint:
+            return False
+
+        # An output that was deleted, replaced or edited since the export is out of date
+        return entry.get("outputs") == MSFS2020_ExportManifest.get_output_stats(file_path)
+
+    def update(self, file_path, fingerprint):
+        self.entries[os.path.basename(file_path)] = {
+            "fingerprint": fingerprint,
+            "outputs": MSFS2020_ExportManifest.get_output_stats(file_path),
+        }
+        self.modified = True
+
+    def save(self):
+        if not self.modified:
+            return
+
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        with open(self.file_path, "w", encoding="utf-8") as f:
+            json.dump({"files": self.entries}, f, indent=4, sort_keys=True)
+        self.modified = False
+
+    @staticmethod
+    def compute_fingerprint(context, objects):
+        from .. import get_version_string
+
+        fingerprint = MSFS2020_ExportFingerprint()
+        fingerprint.add_value(get_version_string())
+        fingerprint.add_value(bpy.app.version)
+        fingerprint.add_settings(context.scene.msfs_multi_exporter_settings)
+
+        # The camera export derives the aspect ratio from the render resolution
+        if any(obj.type == "CAMERA" for obj in objects):
+            render = context.scene.render
+            fingerprint.add_value(
+                (
+                    render.resolution_x,
+                    render.resolution_y,
+                    render.pixel_aspect_x,
+                    render.pixel_aspect_y,
+                )
+            )
+
+        depsgraph = context.evaluated_depsgraph_get()
+        for obj in sorted(objects, key=lambda obj: obj.name):
+            fingerprint.add_object(obj, depsgraph)
+
+        return fingerprint.hexdigest()
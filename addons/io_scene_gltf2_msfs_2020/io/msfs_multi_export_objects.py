@@ -12,11 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import re
+import fnmatch
 
 import bpy
 
+from .msfs_lod_naming import DEFAULT_LOD_PATTERNS, MSFS2020_LODNaming
 from .msfs_multi_export import MSFS2020_OT_MultiExportGLTF2
+from .msfs_scene_index import MSFS2020_SceneIndex
 
 
 class MultiExporterLOD(bpy.types.PropertyGroup):
@@ -41,6 +43,13 @@ class MultiExporterLOD(bpy.types.PropertyGroup):
         min=0,
         max=999
     )
+
+    lod_index: bpy.props.IntProperty(
+        name="",
+        description="LOD index read from the name, used to sort the LODs of a group",
+        default=0,
+        min=0
+    )
     
     file_name: bpy.props.StringProperty(
         name="",
@@ -65,6 +74,11 @@ class MultiExporterLODGroup(bpy.types.PropertyGroup):
     lods: bpy.props.CollectionProperty(
         type=MultiExporterLOD
     )
+
+    active_lod_index: bpy.props.IntProperty(
+        name="",
+        default=0
+    )
     
     folder_path: bpy.props.StringProperty(
         name="",
@@ -94,35 +108,24 @@ class MultiExporterLODGroup(bpy.types.PropertyGroup):
 
 class MSFS2020_LODGroupUtility:
     @staticmethod
-    def lod_is_visible(context, lod):
+    def lod_is_visible(context, lod, scene_index=None):
+        if scene_index is None:
+            scene_index = MSFS2020_SceneIndex.get(context)
+
         sort_by_collection = context.scene.multi_exporter_grouped_by_collections
+        show_hidden_objects = context.scene.multi_exporter_show_hidden_objects
 
         if sort_by_collection:
-            # Checking visibility from the collection itself won't work,
-            # so we have to find the LayerCollection that contains our collection.
-            collection_hidden = False
-            for (
-                layer_collection
-            ) in bpy.context.window.view_layer.layer_collection.children:
-                if layer_collection.collection == lod.collection:
-                    collection_hidden = not layer_collection.visible_get()
-
-            if (
-                not context.scene.multi_exporter_show_hidden_objects
-                and collection_hidden
-            ) or (
-                lod.collection is None
-                or lod.collection not in list(bpy.data.collections)
-            ):
+            if lod.collection is None or not scene_index.has_collection(lod.collection):
+                return False
+
+            if not show_hidden_objects and scene_index.is_collection_hidden(lod.collection):
                 return False
         else:
-            if (
-                not context.scene.multi_exporter_show_hidden_objects
-                and lod.objectLOD.hide_get()
-            ) or (
-                lod.objectLOD is None
-                or lod.objectLOD not in list(bpy.context.window.view_layer.objects)
-            ):
+            if lod.objectLOD is None or not scene_index.is_in_view_layer(lod.objectLOD):
+                return False
+
+            if not show_hidden_objects and scene_index.is_object_hidden(lod.objectLOD):
                 return False
 
         return True
@@ -138,103 +141,202 @@ class MSFS2020_OT_ReloadLODGroups(bpy.types.Operator):
         MSFS2020_OT_ReloadLODGroups.reload_lod_groups(self, context)
 
     @staticmethod
-    def get_group_from_name(name):
-        matches = re.findall("^x[0-9]_|_LOD[0-9]+", name)
-        # If an object starts with xN_ or ends with _LODN, treat as an LOD
-        if matches:
-            # Get base object group name from object
-            for match in matches:
-                filtered_string = name.replace(match, "")
-            return filtered_string
-        else:
-            # If prefix or suffix isn't found, use the object name as the group
-            return name
+    def update_lod_patterns(self, context):
+        MSFS2020_OT_ReloadLODGroups.reload_lod_groups(self, context)
 
     @staticmethod
-    def get_lod_group_names(lod_groups):
-        return [lod_group.group_name for lod_group in lod_groups]
+    def get_group_from_name(name, pattern_string=DEFAULT_LOD_PATTERNS):
+        # If prefix or suffix isn't found, the object name is used as the group
+        return MSFS2020_LODNaming.parse(name, pattern_string)[0]
+
+    @staticmethod
+    def sort_lods(lod_group):
+        lods = lod_group.lods
+        order = list(range(len(lods)))
+        sorted_order = sorted(order, key=lambda j: lods[j].lod_index)
+        if sorted_order == order:
+            return
+
+        for position, j in enumerate(sorted_order):
+            current_position = order.index(j)
+            if current_position != position:
+                lods.move(current_position, position)
+                order.insert(position, order.pop(current_position))
+
+    @staticmethod
+    def get_lod_group_indices(lod_groups):
+        return {lod_group.group_name: i for i, lod_group in enumerate(lod_groups)}
+
+    @staticmethod
+    def get_lod_source(lod, sort_by_collection):
+        return lod.collection if sort_by_collection else lod.objectLOD
 
     @staticmethod
     def reload_lod_groups(self, context):
         lod_groups = context.scene.msfs_multi_exporter_lod_groups
         sort_by_collection = context.scene.multi_exporter_grouped_by_collections
+        pattern_string = MSFS2020_LODNaming.get_pattern_string(context)
+
+        if sort_by_collection:
+            existing_sources = set(bpy.data.collections)
+            sources = bpy.data.collections
+        else:
+            existing_sources = set(context.scene.objects)
+            sources = [obj for obj in context.scene.objects if obj.parent is None]
+
+        # Remove deleted LODs, going backwards so removing an item doesn't shift the ones left to check
+        known_sources = set()
+        for i in range(len(lod_groups) - 1, -1, -1):
+            lod_group = lod_groups[i]
+            for j in range(len(lod_group.lods) - 1, -1, -1):
+                lod = lod_group.lods[j]
+                source = MSFS2020_OT_ReloadLODGroups.get_lod_source(lod, sort_by_collection)
+                if source not in existing_sources:
+                    lod_group.lods.remove(j)
+                    continue
 
-        # Remove deleted LODs
-        for i, lod_group in enumerate(lod_groups):
-            for j, lod in enumerate(lod_group.lods):
-                if sort_by_collection:
-                    if (
-                        not lod.collection in list(bpy.data.collections)
-                        or not MSFS2020_OT_ReloadLODGroups.get_group_from_name(
-                            lod.collection.name
-                        )
-                        == lod_group.group_name
-                    ):
-                        lod_groups[i].lods.remove(j)
-                        continue
-                else:
-                    if (
-                        not lod.objectLOD in list(context.scene.objects)
-                        or not MSFS2020_OT_ReloadLODGroups.get_group_from_name(
-                            lod.objectLOD.name
-                        )
-                        == lod_group.group_name
-                    ):
-                        lod_groups[i].lods.remove(j)
-                        continue
+                group_name, lod_index = MSFS2020_LODNaming.parse(source.name, pattern_string)
+                if group_name != lod_group.group_name:
+                    lod_group.lods.remove(j)
+                    continue
+
+                if lod.lod_index != (lod_index or 0):
+                    lod.lod_index = lod_index or 0
+                known_sources.add(source)
 
             if len(lod_group.lods) == 0:
                 lod_groups.remove(i)
 
-        # Search for new groups
-        found_lod_groups = {}
-        if sort_by_collection:
-            for collection in bpy.data.collections:
-                lod_group = MSFS2020_OT_ReloadLODGroups.get_group_from_name(collection.name)
-                if lod_group not in found_lod_groups:
-                    found_lod_groups[lod_group] = []
-                found_lod_groups[lod_group].append(collection)
-        else:
-            for blender_object in context.scene.objects:
-                if blender_object.parent is None:
-                    lod_group = MSFS2020_OT_ReloadLODGroups.get_group_from_name(blender_object.name)
-                    if lod_group not in found_lod_groups:
-                        found_lod_groups[lod_group] = []
-                    found_lod_groups[lod_group].append(blender_object)
-
-        # Add to object groups
-        for lod_group, blender_objects in found_lod_groups.items():
-            if lod_group not in MSFS2020_OT_ReloadLODGroups.get_lod_group_names(lod_groups):
-                # Create LOD group
-                created_lod_group = lod_groups.add()
-                created_lod_group.group_name = lod_group
+        # Add the new LODs to their group, creating the groups that don't exist yet
+        lod_group_indices = MSFS2020_OT_ReloadLODGroups.get_lod_group_indices(lod_groups)
+        for source in sources:
+            if source in known_sources:
+                continue
 
-            lod_group_index = MSFS2020_OT_ReloadLODGroups.get_lod_group_names(
-                lod_groups
-            ).index(lod_group)
+            group_name, lod_index = MSFS2020_LODNaming.parse(source.name, pattern_string)
+            lod_group_index = lod_group_indices.get(group_name)
+            if lod_group_index is None:
+                created_lod_group = lod_groups.add()
+                created_lod_group.group_name = group_name
+                lod_group_index = lod_group_indices[group_name] = len(lod_groups) - 1
 
+            # Adding items can reallocate the collections, so always go through the indices
+            lod = lod_groups[lod_group_index].lods.add()
             if sort_by_collection:
-                for collection in blender_objects:
-                    if collection not in [
-                        lod.collection for lod in lod_groups[lod_group_index].lods
-                    ]:
-                        lod = lod_groups[lod_group_index].lods.add()
-                        lod.collection = collection
-                        lod.file_name = collection.name
+                lod.collection = source
             else:
-                for obj in blender_objects:
-                    if obj not in [
-                        lod.objectLOD for lod in lod_groups[lod_group_index].lods
-                    ]:
-                        lod = lod_groups[lod_group_index].lods.add()
-                        lod.objectLOD = obj
-                        lod.file_name = obj.name
+                lod.objectLOD = source
+            lod.file_name = source.name
+            lod.lod_index = lod_index or 0
+            # Only set for new LODs, a value edited by the user is kept on the next reloads
+            lod.lod_value = min(lod_index or 0, 999)
+            known_sources.add(source)
+
+        for lod_group in lod_groups:
+            MSFS2020_OT_ReloadLODGroups.sort_lods(lod_group)
 
     def execute(self, context):
         MSFS2020_OT_ReloadLODGroups.reload_lod_groups(self, context)
         return {"FINISHED"}
 
 
+def filter_list_items(ui_list, names, visibilities):
+    """
+    Filter and sort the items of a UIList from their names, the way the default UIList does.
+
+    Returns:
+        tuple(list(int), list(int)): The filter flags and the new order of the items
+    """
+    pattern = ui_list.filter_name.lower()
+    if pattern and "*" not in pattern:
+        pattern = "*" + pattern + "*"
+
+    flags = [
+        ui_list.bitflag_filter_item
+        if visible and (not pattern or fnmatch.fnmatchcase(name.lower(), pattern))
+        else 0
+        for name, visible in zip(names, visibilities)
+    ]
+
+    order = []
+    if ui_list.use_filter_sort_alpha:
+        order = bpy.types.UI_UL_list.sort_items_helper(
+            list(enumerate(names)), key=lambda item: item[1].lower()
+        )
+
+    return flags, order
+
+
+class MSFS2020_UL_LODGroups(bpy.types.UIList):
+    """
+    LOD groups of the scene, only the rows scrolled into view are drawn.
+    """
+
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        if context.scene.multi_exporter_grouped_by_collections:
+            group_icon = "OUTLINER_COLLECTION"
+        else:
+            group_icon = "OBJECT_DATA"
+
+        if self.layout_type in {"DEFAULT", "COMPACT"}:
+            layout.label(text=item.group_name, icon=group_icon)
+            layout.label(text=str(len(item.lods)))
+        elif self.layout_type == "GRID":
+            layout.alignment = "CENTER"
+            layout.label(text="", icon=group_icon)
+
+    def filter_items(self, context, data, propname):
+        lod_groups = getattr(data, propname)
+        scene_index = MSFS2020_SceneIndex.get(context)
+
+        names = [lod_group.group_name for lod_group in lod_groups]
+        # A group is only listed if one of its LODs is shown
+        visibilities = [
+            any(
+                MSFS2020_LODGroupUtility.lod_is_visible(context, lod, scene_index)
+                for lod in lod_group.lods
+            )
+            for lod_group in lod_groups
+        ]
+        return filter_list_items(self, names, visibilities)
+
+
+class MSFS2020_UL_LODs(bpy.types.UIList):
+    """
+    LODs of the active LOD group.
+    """
+
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        source = MSFS2020_OT_ReloadLODGroups.get_lod_source(
+            item, context.scene.multi_exporter_grouped_by_collections
+        )
+        name = source.name if source is not None else ""
+
+        if self.layout_type in {"DEFAULT", "COMPACT"}:
+            layout.prop(item, "enabled", text=name)
+            column = layout.column()
+            column.prop(item, "lod_value", text="LOD Value")
+            column.prop(item, "file_name", text="File Name")
+        elif self.layout_type == "GRID":
+            layout.alignment = "CENTER"
+            layout.prop(item, "enabled", text="")
+
+    def filter_items(self, context, data, propname):
+        lods = getattr(data, propname)
+        sort_by_collection = context.scene.multi_exporter_grouped_by_collections
+        scene_index = MSFS2020_SceneIndex.get(context)
+
+        names = []
+        visibilities = []
+        for lod in lods:
+            source = MSFS2020_OT_ReloadLODGroups.get_lod_source(lod, sort_by_collection)
+            names.append(source.name if source is not None else "")
+            visibilities.append(
+                MSFS2020_LODGroupUtility.lod_is_visible(context, lod, scene_index)
+            )
+        return filter_list_items(self, names, visibilities)
+
+
 class MSFS2020_PT_MultiExporterObjectsView(bpy.types.Panel):
     bl_label = ""
     bl_parent_id = "MSFS2020_PT_MultiExporter"
@@ -253,63 +355,43 @@ class MSFS2020_PT_MultiExporterObjectsView(bpy.types.Panel):
         layout.operator(MSFS2020_OT_ReloadLODGroups.bl_idname, text="Reload LODs")
         layout.prop(context.scene, "multi_exporter_show_hidden_objects")
         layout.prop(context.scene, "multi_exporter_grouped_by_collections")
+        layout.prop(context.scene, "multi_exporter_lod_patterns")
 
         lod_groups = context.scene.msfs_multi_exporter_lod_groups
-        sort_by_collection = context.scene.multi_exporter_grouped_by_collections
-
-        total_lods = 0
-        for lod_group in lod_groups:
-            for lod in lod_group.lods:
-                if not MSFS2020_LODGroupUtility.lod_is_visible(context, lod):
-                    continue
-
-                total_lods += 1
 
-        if total_lods == 0:
+        if len(lod_groups) == 0:
             box = layout.box()
             box.label(text="No LODs found in scene")
         else:
-            for lod_group in lod_groups:
-                # If we only have one LOD in the group, and it is hidden, then don't render the group
-                if len(lod_group.lods) == 1:
-                    if not MSFS2020_LODGroupUtility.lod_is_visible(
-                        context, lod_group.lods[0]
-                    ):
-                        continue
-
-                if len(lod_group.lods) > 0:
-                    row = layout.row()
-
-                    box = row.box()
-                    box.prop(
-                        lod_group,
-                        "expanded",
-                        text=lod_group.group_name,
-                        icon="DOWNARROW_HLT" if lod_group.expanded else "RIGHTARROW",
-                        icon_only=True,
-                        emboss=False,
-                    )
-                    
-                    if lod_group.expanded:
-                        box.prop(lod_group, "generate_xml", text="Generate XML")
-                        if lod_group.generate_xml:
-                            box.prop(lod_group, "overwrite_guid", text="Overwrite GUID")
-
-                        box.prop(lod_group, "folder_path", text="Export Path")
-
-                        col = box.column()
-                        for lod in lod_group.lods:
-                            if not MSFS2020_LODGroupUtility.lod_is_visible(context, lod):
-                                continue
-
-                            row = col.row()
-                            if sort_by_collection:
-                                row.prop(lod, "enabled", text=lod.collection.name)
-                            else:
-                                row.prop(lod, "enabled", text=lod.objectLOD.name)
-                            subrow = row.column()
-                            subrow.prop(lod, "lod_value", text="LOD Value")
-                            subrow.prop(lod, "file_name", text="File Name")
+            layout.template_list(
+                "MSFS2020_UL_LODGroups",
+                "",
+                context.scene,
+                "msfs_multi_exporter_lod_groups",
+                context.scene,
+                "msfs_multi_exporter_lod_groups_index",
+            )
+
+            lod_group_index = context.scene.msfs_multi_exporter_lod_groups_index
+            if 0 <= lod_group_index < len(lod_groups):
+                lod_group = lod_groups[lod_group_index]
+
+                box = layout.box()
+                box.label(text=lod_group.group_name)
+                box.prop(lod_group, "generate_xml", text="Generate XML")
+                if lod_group.generate_xml:
+                    box.prop(lod_group, "overwrite_guid", text="Overwrite GUID")
+
+                box.prop(lod_group, "folder_path", text="Export Path")
+
+                box.template_list(
+                    "MSFS2020_UL_LODs",
+                    "",
+                    lod_group,
+                    "lods",
+                    lod_group,
+                    "active_lod_index",
+                )
 
         row = layout.row(align=True)
         row.operator(MSFS2020_OT_MultiExportGLTF2.bl_idname, text="Export")
@@ -320,6 +402,11 @@ def register():
         type=MultiExporterLODGroup
     )
     
+    bpy.types.Scene.msfs_multi_exporter_lod_groups_index = bpy.props.IntProperty(
+        name="",
+        default=0
+    )
+
     bpy.types.Scene.multi_exporter_show_hidden_objects = bpy.props.BoolProperty(
         name="Show hidden objects",
         default=True
@@ -330,3 +417,14 @@ def register():
         default=False,
         update=MSFS2020_OT_ReloadLODGroups.update_grouped_by,
     )
+
+    bpy.types.Scene.multi_exporter_lod_patterns = bpy.props.StringProperty(
+        name="LOD patterns",
+        description=(
+            "Regular expressions separated by semicolons that mark an object or collection as a LOD."
+            " The matched text is removed from the name to get the LOD group,"
+            " and the first group of the pattern is the LOD index"
+        ),
+        default=DEFAULT_LOD_PATTERNS,
+        update=MSFS2020_OT_ReloadLODGroups.update_lod_patterns,
+    )
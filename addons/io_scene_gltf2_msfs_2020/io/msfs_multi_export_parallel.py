@@ -0,0 +1,292 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS-2020 authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+
+import bpy
+
+from .msfs_profiler import MSFS2020_Profiler
+
+# Name of the addon package, needed to enable the addon in the worker processes
+ADDON_PACKAGE = __package__.rpartition(".")[0]
+
+
+def get_worker_command(blend_path, jobs_path, results_path):
+    expression = (
+        "import addon_utils, importlib, sys\n"
+        f"if not addon_utils.check({ADDON_PACKAGE!r})[1]:\n"
+        f"    addon_utils.enable({ADDON_PACKAGE!r}, default_set=False)\n"
+        f"worker = importlib.import_module({__name__!r})\n"
+        f"sys.exit(worker.run_worker({jobs_path!r}, {results_path!r}))\n"
+    )
+
+    return [
+        bpy.app.binary_path,
+        "--background",
+        blend_path,
+        "--python-exit-code",
+        "1",
+        "--python-expr",
+        expression,
+    ]
+
+
+def get_profile_path(results_path):
+    return os.path.splitext(results_path)[0] + "_profile.json"
+
+
+def get_progress_path(results_path):
+    return os.path.splitext(results_path)[0] + "_progress.jsonl"
+
+
+def read_progress(results_path):
+    """
+    Results of the jobs a worker finished so far, one JSON line per job.
+    A line the worker is still writing is ignored.
+    """
+    try:
+        with open(get_progress_path(results_path), "r", encoding="utf-8") as f:
+            lines = f.readlines()
+    except OSError:
+        return []
+
+    results = []
+    for line in lines:
+        if not line.endswith("\n"):
+            break
+        results.append(json.loads(line))
+    return results
+
+
+def get_job_groups(jobs):
+    """
+    Jobs that have to run in the same worker: the LODs of a LOD group or the presets
+    exported to the same folder share textures, and exporting them from different
+    workers writes the same files concurrently and loads the same data twice.
+
+    Returns:
+        list(list(dict)): The groups, in the order of their first job
+    """
+    groups = {}
+    for job in jobs:
+        if job["type"] == "OBJECTS":
+            key = ("OBJECTS", job["lod_group_index"])
+        else:
+            folder_path = os.path.dirname(os.path.abspath(job["file_path"]))
+            key = ("FOLDER", os.path.normcase(folder_path))
+        groups.setdefault(key, []).append(job)
+    return list(groups.values())
+
+
+def split_jobs(jobs, worker_count):
+    """
+    Give whole job groups to the workers, biggest groups first to the worker with
+    the fewest jobs, so the workers get about the same number of jobs.
+
+    Returns:
+        list(list(dict)): The jobs of every worker, in the order of the plan
+    """
+    groups = get_job_groups(jobs)
+    worker_jobs = [[] for _ in range(max(1, min(worker_count, len(groups))))]
+    for group in sorted(groups, key=len, reverse=True):
+        min(worker_jobs, key=len).extend(group)
+
+    job_order = {id(job): i for i, job in enumerate(jobs)}
+    return [sorted(jobs, key=lambda job: job_order[id(job)]) for jobs in worker_jobs]
+
+
+def run_worker(jobs_path, results_path):
+    """
+    Entry point of a background Blender process: export every job of the
+    jobs file and write the results next to it. The result of each job is also
+    appended to a progress file as soon as it is done, for the progress bar.
+
+    Returns:
+        int: The process exit code
+    """
+    from .msfs_multi_export import MSFS2020_OT_MultiExportGLTF2
+    from .msfs_scene_index import MSFS2020_SceneIndex
+
+    with open(jobs_path, "r", encoding="utf-8") as f:
+        jobs = json.load(f)
+
+    profiler = None
+    settings = bpy.context.scene.msfs_multi_exporter_settings
+    if settings.enable_profiling:
+        profiler = MSFS2020_Profiler(settings.trace_python_memory)
+        profiler.start()
+
+    scene_index = MSFS2020_SceneIndex(bpy.context)
+
+    results = []
+    with open(get_progress_path(results_path), "w", encoding="utf-8") as progress_file:
+        for job in jobs:
+            result = MSFS2020_OT_MultiExportGLTF2.run_job(bpy.context, job, scene_index)
+            results.append(result)
+            progress_file.write(json.dumps(result) + "\n")
+            progress_file.flush()
+
+    if profiler is not None:
+        profiler.stop()
+        with open(get_profile_path(results_path), "w", encoding="utf-8") as f:
+            json.dump(profiler.to_dict(), f)
+
+    with open(results_path, "w", encoding="utf-8") as f:
+        json.dump(results, f)
+
+    return 0 if all(result["success"] for result in results) else 1
+
+
+class MSFS2020_ParallelExport:
+    """
+    Split a multi-export plan across several background Blender processes.
+    Every worker opens the same saved .blend file and exports its share of the jobs,
+    see split_jobs.
+    """
+
+    def __init__(self, jobs, worker_count):
+        self.jobs = jobs
+        self.worker_jobs = split_jobs(jobs, worker_count)
+        self.worker_count = len(self.worker_jobs)
+        self.temp_dir = None
+        self.workers = []
+
+    def get_blend_path(self):
+        # Workers can only see what is on disk, so unsaved changes are written to a copy
+        if bpy.data.filepath and not bpy.data.is_dirty:
+            return bpy.data.filepath
+
+        blend_path = os.path.join(self.temp_dir, "multi_export.blend")
+        bpy.ops.wm.save_as_mainfile(filepath=blend_path, copy=True, relative_remap=True)
+        return blend_path
+
+    def start(self, context):
+        self.temp_dir = tempfile.mkdtemp(prefix="msfs2020_multi_export_")
+        blend_path = self.get_blend_path()
+
+        for i, jobs in enumerate(self.worker_jobs):
+            jobs_path = os.path.join(self.temp_dir, f"jobs_{i}.json")
+            results_path = os.path.join(self.temp_dir, f"results_{i}.json")
+            log_path = os.path.join(self.temp_dir, f"worker_{i}.log")
+
+            with open(jobs_path, "w", encoding="utf-8") as f:
+                json.dump(jobs, f)
+
+            log_file = open(log_path, "w", encoding="utf-8")
+            process = subprocess.Popen(
+                get_worker_command(blend_path, jobs_path, results_path),
+                stdout=log_file,
+                stderr=subprocess.STDOUT,
+            )
+
+            self.workers.append(
+                {
+                    "process": process,
+                    "jobs": jobs,
+                    "results_path": results_path,
+                    "log_path": log_path,
+                    "log_file": log_file,
+                }
+            )
+
+    def poll(self):
+        """
+        Returns:
+            bool: True once every worker process has exited
+        """
+        return all(worker["process"].poll() is not None for worker in self.workers)
+
+    def get_finished_job_count(self):
+        count = 0
+        for worker in self.workers:
+            if worker["process"].poll() is not None:
+                count += len(worker["jobs"])
+            else:
+                count += len(read_progress(worker["results_path"]))
+        return count
+
+    def terminate(self):
+        for worker in self.workers:
+            if worker["process"].poll() is None:
+                worker["process"].terminate()
+        self.wait()
+        for worker in self.workers:
+            worker["log_file"].close()
+        self.cleanup()
+
+    def wait(self):
+        for worker in self.workers:
+            worker["process"].wait()
+
+    def get_log_tail(self, worker, line_count=20):
+        try:
+            with open(worker["log_path"], "r", encoding="utf-8", errors="replace") as f:
+                return "".join(f.readlines()[-line_count:])
+        except OSError:
+            return ""
+
+    def gather_results(self):
+        results = []
+        for i, worker in enumerate(self.workers):
+            worker["log_file"].close()
+
+            profile_path = get_profile_path(worker["results_path"])
+            if MSFS2020_Profiler.active is not None and os.path.exists(profile_path):
+                with open(profile_path, "r", encoding="utf-8") as f:
+                    MSFS2020_Profiler.active.merge(json.load(f), "worker_" + str(i))
+
+            if os.path.exists(worker["results_path"]):
+                with open(worker["results_path"], "r", encoding="utf-8") as f:
+                    results.extend(json.load(f))
+                continue
+
+            # The worker crashed before writing its results, keep the jobs it finished
+            # and fail the others
+            finished_results = read_progress(worker["results_path"])
+            results.extend(finished_results)
+
+            error = (
+                "Worker process exited with code "
+                + str(worker["process"].returncode)
+                + "\n"
+                + self.get_log_tail(worker)
+            )
+            for job in worker["jobs"][len(finished_results):]:
+                results.append(
+                    {
+                        "name": job["name"],
+                        "file_path": job["file_path"],
+                        "success": False,
+                        "error": error,
+                    }
+                )
+
+        return results
+
+    def cleanup(self):
+        if self.temp_dir is not None:
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+            self.temp_dir = None
+
+    def run(self, context):
+        self.start(context)
+        try:
+            self.wait()
+            return self.gather_results()
+        finally:
+            self.cleanup()
@@ -69,6 +69,53 @@ class MultiExporterPreset(bpy.types.PropertyGroup):
     )
 
 
+class MSFS2020_CollectionTree:
+    """
+    Parent and child maps of the collections of a scene, shared by the Edit Layers
+    popups until the collections change.
+    """
+
+    # Scene pointer -> collection tree
+    cached_trees = {}
+
+    def __init__(self, scene):
+        self.root = scene.collection
+
+        # Collection -> direct children / parents (a collection can be linked in several parents)
+        self.children = {}
+        self.parents = {}
+        stack = [self.root]
+        while stack:
+            collection = stack.pop()
+            if collection in self.children:
+                continue
+
+            children = list(collection.children)
+            self.children[collection] = children
+            for child in children:
+                self.parents.setdefault(child, []).append(collection)
+            stack.extend(children)
+
+    def get_children(self, collection):
+        return self.children.get(collection, [])
+
+    def get_parents(self, collection):
+        return self.parents.get(collection, [])
+
+    @staticmethod
+    def get(scene):
+        key = scene.as_pointer()
+        tree = MSFS2020_CollectionTree.cached_trees.get(key)
+        if tree is None:
+            tree = MSFS2020_CollectionTree(scene)
+            MSFS2020_CollectionTree.cached_trees[key] = tree
+        return tree
+
+    @staticmethod
+    def clear_cache():
+        MSFS2020_CollectionTree.cached_trees.clear()
+
+
 class MSFS2020_OT_AddPreset(bpy.types.Operator):
     bl_idname = "msfs2020.multi_export_add_preset"
     bl_label = "Add preset"
@@ -78,6 +125,7 @@ class MSFS2020_OT_AddPreset(bpy.types.Operator):
         preset = presets.add()
         preset.name = f"Preset {len(presets)}"
         preset.folder_path = ""
+        context.scene.msfs_multi_exporter_presets_index = len(presets) - 1
 
         return {"FINISHED"}
 
@@ -93,6 +141,11 @@ class MSFS2020_OT_RemovePreset(bpy.types.Operator):
         presets = bpy.context.scene.msfs_multi_exporter_presets
         presets.remove(self.preset_index)
 
+        scene = context.scene
+        scene.msfs_multi_exporter_presets_index = min(
+            scene.msfs_multi_exporter_presets_index, len(presets) - 1
+        )
+
         return {"FINISHED"}
 
 
@@ -103,34 +156,24 @@ class MSFS2020_OT_EditLayers(bpy.types.Operator):
 
     preset_index: bpy.props.IntProperty()
 
-    collection_tree = {}
-
     def execute(self, context):
         return {"FINISHED"}
 
-    def getChildren(self, collection, children):
-        children[collection] = {}
-        for child in collection.children:
-            children[collection] = self.getChildren(child, children[collection])
-        return children
-
     def invoke(self, context, event):
         preset = bpy.context.scene.msfs_multi_exporter_presets[self.preset_index]
 
-        for i, layer in enumerate(preset.layers):
-            if not layer.collection in list(bpy.data.collections):
+        # Remove the layers of deleted collections, going backwards so the indices left to check don't move
+        collections = set(bpy.data.collections)
+        for i in range(len(preset.layers) - 1, -1, -1):
+            if preset.layers[i].collection not in collections:
                 preset.layers.remove(i)
 
+        layer_collections = {layer.collection for layer in preset.layers}
         for collection in bpy.data.collections:
-            if not collection in [layer.collection for layer in preset.layers]:
+            if collection not in layer_collections:
                 layer = preset.layers.add()
                 layer.collection = collection
 
-        # Because it isn't really possible to define children in the layers, 
-        # we have to generate a "tree" of collections with their children, 
-        # and use that when rendering.
-        self.collection_tree = self.getChildren(bpy.context.scene.collection, {})
-
         wm = context.window_manager
         return wm.invoke_props_dialog(self)
 
@@ -139,34 +182,51 @@ class MSFS2020_OT_EditLayers(bpy.types.Operator):
 
         preset = bpy.context.scene.msfs_multi_exporter_presets[self.preset_index]
 
+        # Because it isn't really possible to define children in the layers,
+        # the layers are drawn following the cached tree of the scene collections
+        collection_tree = MSFS2020_CollectionTree.get(bpy.context.scene)
+        layers = {layer.collection: layer for layer in preset.layers}
+
         # Loop through our collection tree and draw layers with respect to children
-        def drawTree(layout_item, tree):
-            for i, (collection, children) in enumerate(tree.items()):
-                for layer in preset.layers:
-                    if layer.collection == collection:
-                        box = layout_item.box()
-                        row = box.row()
-                        if layer.collection.children:
-                            row.prop(
-                                layer,
-                                "expanded",
-                                text=layer.collection.name,
-                                icon=(
-                                    "DOWNARROW_HLT" if layer.expanded else "RIGHTARROW"
-                                ),
-                                icon_only=True,
-                                emboss=False,
-                            )
-                            row.prop(layer, "enabled", text="Enabled")
-                            if layer.expanded:
-                                drawTree(box, children)
-                        else:
-                            row.label(text=layer.collection.name)
-                            row.prop(layer, "enabled", text="Enabled")
-
-                        break
-
-        drawTree(layout, self.collection_tree[bpy.context.scene.collection])
+        def drawTree(layout_item, collection):
+            for child in collection_tree.get_children(collection):
+                layer = layers.get(child)
+                if layer is None:
+                    continue
+
+                box = layout_item.box()
+                row = box.row()
+                if collection_tree.get_children(child):
+                    row.prop(
+                        layer,
+                        "expanded",
+                        text=child.name,
+                        icon=("DOWNARROW_HLT" if layer.expanded else "RIGHTARROW"),
+                        icon_only=True,
+                        emboss=False,
+                    )
+                    row.prop(layer, "enabled", text="Enabled")
+                    if layer.expanded:
+                        drawTree(box, child)
+                else:
+                    row.label(text=child.name)
+                    row.prop(layer, "enabled", text="Enabled")
+
+        drawTree(layout, collection_tree.root)
+
+
+class MSFS2020_UL_Presets(bpy.types.UIList):
+    """
+    Export presets, filtered and sorted on their name by the default UIList filter.
+    """
+
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        if self.layout_type in {"DEFAULT", "COMPACT"}:
+            layout.prop(item, "enabled", text="")
+            layout.prop(item, "name", text="", emboss=False)
+        elif self.layout_type == "GRID":
+            layout.alignment = "CENTER"
+            layout.prop(item, "enabled", text="")
 
 
 class MSFS2020_PT_MultiExporterPresetsView(bpy.types.Panel):
@@ -187,34 +247,73 @@ class MSFS2020_PT_MultiExporterPresetsView(bpy.types.Panel):
         layout.operator(MSFS2020_OT_AddPreset.bl_idname, text="Add Preset")
 
         presets = bpy.context.scene.msfs_multi_exporter_presets
-        for i, preset in enumerate(presets):
-            row = layout.row()
-            box = row.box()
-            box.prop(
-                preset,
-                "expanded",
-                text=preset.name,
-                icon="DOWNARROW_HLT" if preset.expanded else "RIGHTARROW",
-                icon_only=True,
-                emboss=False,
-            )
-
-            if preset.expanded:
-                box.prop(preset, "enabled", text="Enabled")
-                box.prop(preset, "name", text="Name")
-                box.prop(preset, "folder_path", text="Export Path")
-                box.operator(
-                    MSFS2020_OT_EditLayers.bl_idname, text="Edit Layers"
-                ).preset_index = i
-                box.operator(
-                    MSFS2020_OT_RemovePreset.bl_idname, text="Remove"
-                ).preset_index = i
+        layout.template_list(
+            "MSFS2020_UL_Presets",
+            "",
+            context.scene,
+            "msfs_multi_exporter_presets",
+            context.scene,
+            "msfs_multi_exporter_presets_index",
+        )
+
+        preset_index = context.scene.msfs_multi_exporter_presets_index
+        if 0 <= preset_index < len(presets):
+            preset = presets[preset_index]
+
+            box = layout.box()
+            box.prop(preset, "enabled", text="Enabled")
+            box.prop(preset, "name", text="Name")
+            box.prop(preset, "folder_path", text="Export Path")
+            box.operator(
+                MSFS2020_OT_EditLayers.bl_idname, text="Edit Layers"
+            ).preset_index = preset_index
+            box.operator(
+                MSFS2020_OT_RemovePreset.bl_idname, text="Remove"
+            ).preset_index = preset_index
 
         row = layout.row()
         row.operator(MSFS2020_OT_MultiExportGLTF2.bl_idname, text="Export")
 
 
+@bpy.app.handlers.persistent
+def clear_collection_tree_cache(*args):
+    MSFS2020_CollectionTree.clear_cache()
+
+
+@bpy.app.handlers.persistent
+def update_collection_tree_cache(scene, depsgraph):
+    if depsgraph.id_type_updated("COLLECTION") or depsgraph.id_type_updated("SCENE"):
+        MSFS2020_CollectionTree.clear_cache()
+
+
+COLLECTION_TREE_CACHE_HANDLERS = (
+    bpy.app.handlers.load_post,
+    bpy.app.handlers.undo_post,
+    bpy.app.handlers.redo_post,
+)
+
+
 def register():
     bpy.types.Scene.msfs_multi_exporter_presets = bpy.props.CollectionProperty(
         type=MultiExporterPreset
     )
+
+    bpy.types.Scene.msfs_multi_exporter_presets_index = bpy.props.IntProperty(
+        name="",
+        default=0
+    )
+
+    for handlers in COLLECTION_TREE_CACHE_HANDLERS:
+        if clear_collection_tree_cache not in handlers:
+            handlers.append(clear_collection_tree_cache)
+    if update_collection_tree_cache not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(update_collection_tree_cache)
+
+
+def unregister():
+    for handlers in COLLECTION_TREE_CACHE_HANDLERS:
+        if clear_collection_tree_cache in handlers:
+            handlers.remove(clear_collection_tree_cache)
+    if update_collection_tree_cache in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(update_collection_tree_cache)
+    MSFS2020_CollectionTree.clear_cache()
@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+
 import bpy
 
 from ..com.msfs_constants import (
@@ -44,6 +46,10 @@ def on_use_unique_id_extension_update(self, context):
     props = context.scene.msfs_exporter_settings
     props.use_unique_id = self.use_unique_id
 
+def on_resolve_unique_id_collisions_update(self, context):
+    props = context.scene.msfs_exporter_settings
+    props.resolve_unique_id_collisions = self.resolve_unique_id_collisions
+
 def get_use_selection(self):
     return True
 
@@ -117,6 +123,83 @@ class MSFS2020_MultiExporterSettings(bpy.types.PropertyGroup):
         default=True,
         update=on_use_unique_id_extension_update,
     )
+
+    resolve_unique_id_collisions: bpy.props.BoolProperty(
+        name="Resolve Unique ID Collisions",
+        description="Add a suffix computed from the name of the node to the unique IDs already used by another node",
+        default=False,
+        update=on_resolve_unique_id_collisions_update,
+    )
+    # endregion
+
+    # region Multi-Export Options
+    # Parallel export Check
+    use_parallel_export: bpy.props.BoolProperty(
+        name="Parallel Export",
+        description=(
+            "Split the export across several background Blender processes. "
+            "Each process opens a saved copy of the current file"
+        ),
+        default=False,
+    )
+
+    # Number of background Blender processes
+    parallel_export_workers: bpy.props.IntProperty(
+        name="Worker Processes",
+        description="Number of background Blender processes used by the parallel export",
+        default=max(1, (os.cpu_count() or 2) // 2),
+        min=1,
+        max=64,
+    )
+
+    # Profiling Check
+    enable_profiling: bpy.props.BoolProperty(
+        name="Profiling",
+        description=(
+            "Record the time, call count and peak memory of every export step "
+            "and write a JSON report and a Chrome trace file"
+        ),
+        default=False,
+    )
+
+    # Python memory tracing Check
+    trace_python_memory: bpy.props.BoolProperty(
+        name="Trace Python Memory",
+        description=(
+            "Also record the peak Python heap memory of every export step. "
+            "This makes the export much slower"
+        ),
+        default=False,
+    )
+
+    # Profiling report folder
+    profiling_folder_path: bpy.props.StringProperty(
+        name="Report Folder",
+        description="Folder where the profiling reports are written",
+        default="//",
+        maxlen=1024,
+        subtype="DIR_PATH",
+    )
+
+    # Incremental export Check
+    use_incremental_export: bpy.props.BoolProperty(
+        name="Incremental Export",
+        description=(
+            "Skip the files whose objects, materials, textures and export settings "
+            "did not change since their last export"
+        ),
+        default=False,
+    )
+
+    # Single pass preset export Check
+    use_single_pass_presets: bpy.props.BoolProperty(
+        name="Single Pass Presets",
+        description=(
+            "Export the objects of every enabled preset at once and split the result "
+            "into one file per preset, so objects shared by several presets are only exported once"
+        ),
+        default=False,
+    )
     # endregion
 
     # region Include Options
@@ -849,6 +932,48 @@ class MSFS2020_PT_export_main(bpy.types.Panel):
         layout.prop(settings, "export_copyright")
         layout.prop(settings, "will_save_settings")
 
+class MSFS2020_PT_export_multi_export(bpy.types.Panel):
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_label = "Multi-Export"
+    bl_parent_id = "MSFS2020_PT_MultiExporter"
+    bl_options = {"DEFAULT_CLOSED"}
+
+    @classmethod
+    def poll(cls, context):
+        current_tab = MSFS2020_PT_export_main.get_multi_exporter_current_tab(context)
+        return current_tab == "SETTINGS"
+
+    def draw_header(self, context):
+        self.layout.label(icon="EXPORT")
+
+    def draw(self, context):
+        settings = MSFS2020_PT_export_main.get_multi_exporter_settings(context)
+
+        layout = self.layout
+        layout.use_property_split = True
+        layout.use_property_decorate = False  # No animation.
+
+        layout.prop(settings, "use_parallel_export")
+
+        row = layout.row()
+        row.active = settings.use_parallel_export
+        row.prop(settings, "parallel_export_workers")
+
+        layout.prop(settings, "use_incremental_export")
+
+        layout.prop(settings, "use_single_pass_presets")
+
+        layout.prop(settings, "enable_profiling")
+
+        row = layout.row()
+        row.active = settings.enable_profiling
+        row.prop(settings, "trace_python_memory")
+
+        row = layout.row()
+        row.active = settings.enable_profiling
+        row.prop(settings, "profiling_folder_path")
+
 class MSFS2020_PT_export_texture(bpy.types.Panel):
     bl_space_type = "VIEW_3D"
     bl_region_type = "UI"
@@ -932,6 +1057,8 @@ class MSFS2020_PT_extension(bpy.types.Panel):
             "use_unique_id",
             text="Use ASOBO Unique ID extension for nodes"
         )
+        if settings.use_unique_id:
+            layout.prop(settings, "resolve_unique_id_collisions")
 
 # endregion
 
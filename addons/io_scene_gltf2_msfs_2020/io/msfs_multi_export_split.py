@@ -0,0 +1,553 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS-2020 authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import copy
+import json
+import os
+import shutil
+import tempfile
+import time
+import urllib.parse
+
+import bpy
+
+from .msfs_profiler import profile_section
+from .msfs_unique_id import MSFS2020_UniqueIDResolver, MSFS2020_unique_id
+
+# Extensions whose data references buffers, materials or nodes in ways the splitter does not follow
+UNSUPPORTED_EXTENSIONS = {
+    "KHR_draco_mesh_compression",
+    "EXT_meshopt_compression",
+    "KHR_materials_variants",
+    "KHR_animation_pointer",
+}
+
+
+class MSFS2020_GLTFSplitError(Exception):
+    pass
+
+
+class MSFS2020_GLTFIndexRemap:
+    """
+    Old index -> new index of the items of a glTF array that are kept, in order of first use.
+    """
+
+    def __init__(self):
+        self.indices = {}
+        self.order = []
+
+    def get(self, index):
+        new_index = self.indices.get(index)
+        if new_index is None:
+            new_index = self.indices[index] = len(self.order)
+            self.order.append(index)
+        return new_index
+
+
+def get_extension_names(value, names):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key == "extensions" and isinstance(item, dict):
+                names.update(item.keys())
+            get_extension_names(item, names)
+    elif isinstance(value, list):
+        for item in value:
+            get_extension_names(item, names)
+    return names
+
+
+def get_union_folder(temp_dir, texture_dir):
+    """
+    Folder of the combined export, deep enough in the temporary folder for the textures
+    written to a texture folder relative to it ("../texture") to stay in the temporary folder.
+    """
+    folder_path = temp_dir
+    if texture_dir and not os.path.isabs(texture_dir):
+        for part in os.path.normpath(texture_dir).split(os.sep):
+            if part == os.pardir:
+                folder_path = os.path.join(folder_path, "export")
+    os.makedirs(folder_path, exist_ok=True)
+    return folder_path
+
+
+class MSFS2020_GLTFSplitter:
+    """
+    Write subsets of the nodes of an exported glTF file as standalone glTF files.
+
+    Only what the kept nodes reference (meshes, skins, materials, textures, accessors...)
+    is written, the binary buffer is rebuilt from the kept buffer views and the
+    images are copied next to the new file.
+    """
+
+    def __init__(self, gltf_path, texture_dir=""):
+        self.folder_path = os.path.dirname(gltf_path)
+        self.texture_dir = texture_dir
+
+        with open(gltf_path, "r", encoding="utf-8") as f:
+            self.gltf = json.load(f)
+
+        unsupported = UNSUPPORTED_EXTENSIONS.intersection(self.gltf.get("extensionsUsed", []))
+        if unsupported:
+            raise MSFS2020_GLTFSplitError("Unsupported extensions " + ", ".join(sorted(unsupported)))
+
+        buffers = self.gltf.get("buffers", [])
+        if len(buffers) > 1:
+            raise MSFS2020_GLTFSplitError("More than one buffer")
+
+        self.buffer = b""
+        if buffers:
+            uri = buffers[0].get("uri")
+            if uri is None or uri.startswith("data:"):
+                raise MSFS2020_GLTFSplitError("Embedded buffer")
+            with open(os.path.join(self.folder_path, urllib.parse.unquote(uri)), "rb") as f:
+                self.buffer = f.read()
+
+        self.nodes = self.gltf.get("nodes", [])
+        self.parents = {}
+        for i, node in enumerate(self.nodes):
+            for child in node.get("children", []):
+                self.parents[child] = i
+
+        self.scene = self.gltf.get("scenes", [{}])[self.gltf.get("scene", 0)]
+
+        # Extensions that never appear in the file (KHR_mesh_quantization...) are always kept
+        self.extension_names = get_extension_names(self.gltf, set())
+
+    # region Nodes
+    def get_node_names(self):
+        return [node.get("name") for node in self.nodes]
+
+    def get_parent(self, node_index):
+        return self.parents.get(node_index)
+
+    def get_node_objects(self, object_names):
+        """
+        The exporter names the node of an object after it, nodes without an object
+        (bones, correction nodes...) belong to the object of their parent.
+
+        Returns:
+            dict(int, str): Node index -> name of the object the node was exported from
+        """
+        name_counts = collections.Counter(self.get_node_names())
+        duplicates = {name for name in object_names if name_counts[name] > 1}
+        if duplicates:
+            raise MSFS2020_GLTFSplitError("Ambiguous node names " + ", ".join(sorted(duplicates)))
+
+        node_objects = {}
+        stack = [(root, None) for root in self.scene.get("nodes", [])]
+        while stack:
+            node_index, parent_object = stack.pop()
+            name = self.nodes[node_index].get("name")
+            node_object = name if name in object_names else parent_object
+            node_objects[node_index] = node_object
+            stack.extend((child, node_object) for child in self.nodes[node_index].get("children", []))
+        return node_objects
+    # endregion
+
+    # region Writing
+    def find_image_file(self, uri):
+        """
+        Returns:
+            tuple(str, str): The path of the file of an image, and its path relative to the
+                folder of a glTF file using it, None if it cannot be found
+        """
+        uri = urllib.parse.unquote(uri)
+        candidates = [uri]
+        if self.texture_dir:
+            # The MSFS extension only keeps the file name in the uri
+            candidates.append(os.path.join(self.texture_dir, os.path.basename(uri)))
+
+        for relative_path in candidates:
+            file_path = os.path.join(self.folder_path, relative_path)
+            if os.path.isfile(file_path):
+                return os.path.normpath(file_path), relative_path
+        return None
+
+    def write_image(self, image, folder_path):
+        # The uri is kept as exported, the file is copied where it is expected from the new file
+        uri = image.get("uri")
+        if uri is None or uri.startswith("data:"):
+            return
+
+        found = self.find_image_file(uri)
+        if found is None:
+            raise MSFS2020_GLTFSplitError("Image file not found for " + uri)
+
+        file_path, relative_path = found
+        destination_path = os.path.normpath(os.path.join(folder_path, relative_path))
+        if os.path.exists(destination_path) and os.path.samefile(file_path, destination_path):
+            # Absolute texture folder, the combined export already wrote it in place
+            return
+
+        os.makedirs(os.path.dirname(destination_path), exist_ok=True)
+        shutil.copyfile(file_path, destination_path)
+
+    def remap_texture_infos(self, value, textures):
+        # Texture infos of the core spec and of every extension are stored under *Texture keys
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if key.endswith("Texture") and isinstance(item, dict) and "index" in item:
+                    item["index"] = textures.get(item["index"])
+                self.remap_texture_infos(item, textures)
+        elif isinstance(value, list):
+            for item in value:
+                self.remap_texture_infos(item, textures)
+
+    def write(self, node_indices, gltf_path):
+        """
+        Write the given nodes, and everything they reference, as a new glTF file.
+        Every kept node must have its parent kept, or be a root node.
+        """
+        gltf = self.gltf
+        folder_path = os.path.dirname(gltf_path)
+        os.makedirs(folder_path, exist_ok=True)
+
+        kept_nodes = sorted(node_indices)
+        node_map = {old: new for new, old in enumerate(kept_nodes)}
+        for node_index in kept_nodes:
+            parent = self.get_parent(node_index)
+            if parent is not None and parent not in node_map:
+                raise MSFS2020_GLTFSplitError("Node " + str(node_index) + " is kept without its parent")
+
+        meshes = MSFS2020_GLTFIndexRemap()
+        skins = MSFS2020_GLTFIndexRemap()
+        cameras = MSFS2020_GLTFIndexRemap()
+        lights = MSFS2020_GLTFIndexRemap()
+        materials = MSFS2020_GLTFIndexRemap()
+        textures = MSFS2020_GLTFIndexRemap()
+        images = MSFS2020_GLTFIndexRemap()
+        samplers = MSFS2020_GLTFIndexRemap()
+        accessors = MSFS2020_GLTFIndexRemap()
+        buffer_views = MSFS2020_GLTFIndexRemap()
+
+        result = {"asset": copy.deepcopy(gltf["asset"])}
+        if "extras" in gltf:
+            result["extras"] = copy.deepcopy(gltf["extras"])
+
+        # Nodes
+        nodes = []
+        for node_index in kept_nodes:
+            node = copy.deepcopy(self.nodes[node_index])
+            children = [node_map[child] for child in node.get("children", []) if child in node_map]
+            if children:
+                node["children"] = children
+            else:
+                node.pop("children", None)
+
+            if "mesh" in node:
+                node["mesh"] = meshes.get(node["mesh"])
+            if "skin" in node:
+                node["skin"] = skins.get(node["skin"])
+            if "camera" in node:
+                node["camera"] = cameras.get(node["camera"])
+
+            light = node.get("extensions", {}).get("KHR_lights_punctual")
+            if light is not None:
+                light["light"] = lights.get(light["light"])
+
+            nodes.append(node)
+
+        scene = copy.deepcopy(self.scene)
+        scene["nodes"] = [node_map[root] for root in self.scene.get("nodes", []) if root in node_map]
+        result["scene"] = 0
+        result["scenes"] = [scene]
+        result["nodes"] = nodes
+
+        # Meshes
+        result["meshes"] = []
+        for mesh_index in meshes.order:
+            mesh = copy.deepcopy(gltf["meshes"][mesh_index])
+            for primitive in mesh["primitives"]:
+                primitive["attributes"] = {
+                    name: accessors.get(accessor)
+                    for name, accessor in primitive["attributes"].items()
+                }
+                if "indices" in primitive:
+                    primitive["indices"] = accessors.get(primitive["indices"])
+                if "material" in primitive:
+                    primitive["material"] = materials.get(primitive["material"])
+                for target in primitive.get("targets", []):
+                    for name in target:
+                        target[name] = accessors.get(target[name])
+            result["meshes"].append(mesh)
+
+        # Skins
+        result["skins"] = []
+        for skin_index in skins.order:
+            skin = copy.deepcopy(gltf["skins"][skin_index])
+            if any(joint not in node_map for joint in skin["joints"]):
+                raise MSFS2020_GLTFSplitError("Skin " + str(skin_index) + " is kept without its joints")
+
+            skin["joints"] = [node_map[joint] for joint in skin["joints"]]
+            if "skeleton" in skin:
+                if skin["skeleton"] not in node_map:
+                    raise MSFS2020_GLTFSplitError("Skin " + str(skin_index) + " is kept without its skeleton")
+                skin["skeleton"] = node_map[skin["skeleton"]]
+            if "inverseBindMatrices" in skin:
+                skin["inverseBindMatrices"] = accessors.get(skin["inverseBindMatrices"])
+            result["skins"].append(skin)
+
+        # Animations, only the channels of the kept nodes are written
+        result["animations"] = []
+        for source_animation in gltf.get("animations", []):
+            animation_samplers = MSFS2020_GLTFIndexRemap()
+            channels = []
+            for channel in source_animation["channels"]:
+                if channel["target"].get("node") not in node_map:
+                    continue
+                channel = copy.deepcopy(channel)
+                channel["target"]["node"] = node_map[channel["target"]["node"]]
+                channel["sampler"] = animation_samplers.get(channel["sampler"])
+                channels.append(channel)
+
+            if not channels:
+                continue
+
+            animation = copy.deepcopy(source_animation)
+            animation["channels"] = channels
+            animation["samplers"] = []
+            for sampler_index in animation_samplers.order:
+                sampler = copy.deepcopy(source_animation["samplers"][sampler_index])
+                sampler["input"] = accessors.get(sampler["input"])
+                sampler["output"] = accessors.get(sampler["output"])
+                animation["samplers"].append(sampler)
+            result["animations"].append(animation)
+
+        # Materials and textures
+        result["materials"] = []
+        for material_index in materials.order:
+            material = copy.deepcopy(gltf["materials"][material_index])
+            self.remap_texture_infos(material, textures)
+            result["materials"].append(material)
+
+        result["textures"] = []
+        for texture_index in textures.order:
+            texture = copy.deepcopy(gltf["textures"][texture_index])
+            if "sampler" in texture:
+                texture["sampler"] = samplers.get(texture["sampler"])
+            if "source" in texture:
+                texture["source"] = images.get(texture["source"])
+            # Alternative sources (EXT_texture_webp...)
+            for extension in texture.get("extensions", {}).values():
+                if isinstance(extension, dict) and "source" in extension:
+                    extension["source"] = images.get(extension["source"])
+            result["textures"].append(texture)
+
+        result["images"] = []
+        for image_index in images.order:
+            image = copy.deepcopy(gltf["images"][image_index])
+            if "bufferView" in image:
+                image["bufferView"] = buffer_views.get(image["bufferView"])
+            self.write_image(image, folder_path)
+            result["images"].append(image)
+
+        result["samplers"] = [copy.deepcopy(gltf["samplers"][i]) for i in samplers.order]
+        result["cameras"] = [copy.deepcopy(gltf["cameras"][i]) for i in cameras.order]
+
+        # Accessors and buffer views
+        result["accessors"] = []
+        for accessor_index in accessors.order:
+            accessor = copy.deepcopy(gltf["accessors"][accessor_index])
+            if "bufferView" in accessor:
+                accessor["bufferView"] = buffer_views.get(accessor["bufferView"])
+            sparse = accessor.get("sparse")
+            if sparse is not None:
+                sparse["indices"]["bufferView"] = buffer_views.get(sparse["indices"]["bufferView"])
+                sparse["values"]["bufferView"] = buffer_views.get(sparse["values"]["bufferView"])
+            result["accessors"].append(accessor)
+
+        buffer = bytearray()
+        result["bufferViews"] = []
+        for buffer_view_index in buffer_views.order:
+            buffer_view = copy.deepcopy(gltf["bufferViews"][buffer_view_index])
+            start = buffer_view.get("byteOffset", 0)
+            data = self.buffer[start : start + buffer_view["byteLength"]]
+
+            # Keep every buffer view aligned for its accessors
+            buffer.extend(b"\0" * (-len(buffer) % 4))
+            buffer_view["buffer"] = 0
+            buffer_view["byteOffset"] = len(buffer)
+            buffer.extend(data)
+            result["bufferViews"].append(buffer_view)
+
+        if buffer:
+            buffer.extend(b"\0" * (-len(buffer) % 4))
+            bin_name = os.path.splitext(os.path.basename(gltf_path))[0] + ".bin"
+            with open(os.path.join(folder_path, bin_name), "wb") as f:
+                f.write(buffer)
+            result["buffers"] = [{"byteLength": len(buffer), "uri": urllib.parse.quote(bin_name)}]
+
+        # Root extensions
+        root_extensions = copy.deepcopy(gltf.get("extensions", {}))
+        if "KHR_lights_punctual" in root_extensions:
+            source_lights = root_extensions["KHR_lights_punctual"]["lights"]
+            if lights.order:
+                root_extensions["KHR_lights_punctual"]["lights"] = [source_lights[i] for i in lights.order]
+            else:
+                root_extensions.pop("KHR_lights_punctual")
+        if root_extensions:
+            result["extensions"] = root_extensions
+
+        # glTF arrays must not be empty
+        for key in list(result.keys()):
+            if isinstance(result[key], list) and not result[key]:
+                del result[key]
+
+        used_extensions = get_extension_names(result, set())
+        for key in ("extensionsUsed", "extensionsRequired"):
+            extensions = [
+                name
+                for name in gltf.get(key, [])
+                if name in used_extensions or name not in self.extension_names
+            ]
+            if extensions:
+                result[key] = extensions
+
+        with open(gltf_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=4)
+    # endregion
+
+
+class MSFS2020_SinglePassPresetExport:
+    """
+    Export the objects of every preset with a single run of the glTF exporter,
+    then split the result into one glTF file per preset.
+
+    Objects shared by several presets are evaluated and gathered once. A preset is exported
+    on its own when it cannot be cut out of the combined file: one of its objects is
+    parented to an object outside of the preset, or a collision gizmo merged into one
+    of its meshes belongs to another preset.
+    """
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.temp_dir = None
+
+    def get_job_objects(self, context, scene_index):
+        from .msfs_multi_export import MSFS2020_OT_MultiExportGLTF2
+
+        job_objects = []
+        for job in self.jobs:
+            MSFS2020_OT_MultiExportGLTF2.select_job_objects(context, job, scene_index)
+            job_objects.append({obj.name for obj in context.selected_objects})
+        return job_objects
+
+    @staticmethod
+    def get_exported_ancestor(obj, object_names):
+        parent = obj.parent
+        while parent is not None and parent.name not in object_names:
+            parent = parent.parent
+        return parent
+
+    def can_split(self, object_names, union_names, node_names):
+        """
+        Returns:
+            bool: True if the objects of a preset are exported the same way in the combined file
+        """
+        for name in union_names:
+            obj = bpy.data.objects.get(name)
+            if obj is None:
+                return False
+
+            ancestor = MSFS2020_SinglePassPresetExport.get_exported_ancestor(obj, union_names)
+            if ancestor is None:
+                continue
+
+            in_preset = name in object_names
+            ancestor_in_preset = ancestor.name in object_names
+
+            # A separate export would make the object a root node with its world transform
+            if in_preset and not ancestor_in_preset:
+                return False
+
+            # Objects without a node (collision gizmos) are merged into their parent node
+            if not in_preset and ancestor_in_preset and name not in node_names:
+                return False
+
+        return True
+
+    def run(self, context, scene_index):
+        from .msfs_multi_export import MSFS2020_OT_MultiExportGLTF2
+
+        settings = context.scene.msfs_multi_exporter_settings
+        job_objects = self.get_job_objects(context, scene_index)
+        union_names = set().union(*job_objects)
+
+        self.temp_dir = tempfile.mkdtemp(prefix="msfs2020_single_pass_export_")
+        try:
+            for obj in context.selected_objects:
+                obj.select_set(False)
+            for name in union_names:
+                bpy.data.objects[name].select_set(True)
+
+            union_path = os.path.join(
+                get_union_folder(self.temp_dir, settings.export_texture_dir), "presets.gltf"
+            )
+            MSFS2020_unique_id.last_duplicates = []
+            with profile_section("union_export", "export"):
+                exported = MSFS2020_OT_MultiExportGLTF2.export(union_path)
+            union_duplicates = MSFS2020_unique_id.last_duplicates
+
+            splitter = None
+            if exported:
+                try:
+                    splitter = MSFS2020_GLTFSplitter(union_path, settings.export_texture_dir)
+                    node_objects = splitter.get_node_objects(union_names)
+                    node_names = set(splitter.get_node_names())
+                except (OSError, ValueError, KeyError, MSFS2020_GLTFSplitError) as e:
+                    print("[ASOBO] Could not split the combined preset export: " + str(e))
+                    splitter = None
+
+            results = []
+            for job, object_names in zip(self.jobs, job_objects):
+                if splitter is not None and self.can_split(object_names, union_names, node_names):
+                    result = {
+                        "name": job["name"],
+                        "file_path": job["file_path"],
+                        "success": False,
+                        "error": "",
+                        # The combined export found the duplicates of all the presets,
+                        # only keep the ones between two objects of this preset
+                        "warnings": [
+                            MSFS2020_UniqueIDResolver.get_duplicate_message(duplicate)
+                            for duplicate in union_duplicates
+                            if duplicate["object"] in object_names
+                            and duplicate["owner_object"] in object_names
+                        ],
+                    }
+                    start = time.perf_counter()
+                    try:
+                        with profile_section(job["name"], "split"):
+                            splitter.write(
+                                [
+                                    node_index
+                                    for node_index, node_object in node_objects.items()
+                                    if node_object in object_names
+                                ],
+                                job["file_path"],
+                            )
+                        result["success"] = True
+                        result["duration"] = time.perf_counter() - start
+                        results.append(result)
+                        continue
+                    except (OSError, KeyError, MSFS2020_GLTFSplitError) as e:
+                        print("[ASOBO] Could not split " + job["name"] + ", exporting it on its own: " + str(e))
+
+                results.append(MSFS2020_OT_MultiExportGLTF2.run_job(context, job, scene_index))
+
+            return results
+        finally:
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+            self.temp_dir = None
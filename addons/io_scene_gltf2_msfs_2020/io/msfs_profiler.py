@@ -0,0 +1,267 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS-2020 authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+from .msfs_multi_export_batch import get_process_memory
+
+# Seconds between two samples of the process resident memory
+MEMORY_SAMPLE_INTERVAL = 0.01
+
+
+class MSFS2020_ProfilerFrame:
+    __slots__ = (
+        "path",
+        "name",
+        "category",
+        "start",
+        "child_time",
+        "peak_memory",
+        "python_heap_peak",
+    )
+
+    def __init__(self, path, name, category, start):
+        self.path = path
+        self.name = name
+        self.category = category
+        self.start = start
+        self.child_time = 0.0
+        self.peak_memory = 0
+        self.python_heap_peak = 0
+
+
+class MSFS2020_Profiler:
+    """
+    Records nested timed sections of a multi-export run.
+
+    Sections are aggregated by their path in the section tree (wall time, self time,
+    call count and peak resident memory of the process) and every call is also kept
+    as a Chrome trace event, so the report can be loaded in chrome://tracing or Perfetto.
+
+    The resident memory is sampled by a background thread, so it includes the meshes
+    and images allocated by Blender. The Python heap peak is only traced with
+    trace_python_memory, tracemalloc slows down the export a lot.
+    """
+
+    # Profiler of the running multi-export, None when profiling is disabled
+    active = None
+
+    def __init__(self, trace_python_memory=False):
+        self.stack = []
+        self.stats = {}
+        self.events = []
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.trace_python_memory = trace_python_memory
+        self.started_tracemalloc = False
+
+        self.sampled_peak_memory = 0
+        self.sample_lock = threading.Lock()
+        self.sample_stop = threading.Event()
+        self.sample_thread = None
+
+    # region Recording
+    def start(self):
+        if self.trace_python_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+
+        self.sampled_peak_memory = get_process_memory(self.pid) or 0
+        self.sample_stop.clear()
+        self.sample_thread = threading.Thread(target=self.sample_memory, daemon=True)
+        self.sample_thread.start()
+        MSFS2020_Profiler.active = self
+
+    def stop(self):
+        if MSFS2020_Profiler.active is self:
+            MSFS2020_Profiler.active = None
+        if self.sample_thread is not None:
+            self.sample_stop.set()
+            self.sample_thread.join()
+            self.sample_thread = None
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+
+    def sample_memory(self):
+        while not self.sample_stop.wait(MEMORY_SAMPLE_INTERVAL):
+            memory = get_process_memory(self.pid)
+            if memory is None:
+                # Resident memory can't be read on this platform
+                return
+            with self.sample_lock:
+                self.sampled_peak_memory = max(self.sampled_peak_memory, memory)
+
+    def update_peak_memory(self):
+        # The peaks are reset at every section boundary, so give the peaks
+        # reached so far to every open section before resetting them
+        memory = get_process_memory(self.pid) or 0
+        with self.sample_lock:
+            peak = max(self.sampled_peak_memory, memory)
+            self.sampled_peak_memory = memory
+        for frame in self.stack:
+            frame.peak_memory = max(frame.peak_memory, peak)
+
+        if not self.trace_python_memory or not tracemalloc.is_tracing():
+            return
+        python_heap_peak = tracemalloc.get_traced_memory()[1]
+        for frame in self.stack:
+            frame.python_heap_peak = max(frame.python_heap_peak, python_heap_peak)
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+
+    @contextlib.contextmanager
+    def section(self, name, category=""):
+        self.update_peak_memory()
+
+        path = self.stack[-1].path + "/" + name if self.stack else name
+        frame = MSFS2020_ProfilerFrame(path, name, category, time.perf_counter())
+        self.stack.append(frame)
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.update_peak_memory()
+            self.stack.pop()
+
+            duration = end - frame.start
+            if self.stack:
+                self.stack[-1].child_time += duration
+
+            stat = self.stats.get(path)
+            if stat is None:
+                stat = self.stats[path] = {
+                    "path": path,
+                    "name": name,
+                    "category": category,
+                    "count": 0,
+                    "total_time": 0.0,
+                    "self_time": 0.0,
+                    "peak_memory": 0,
+                }
+                if self.trace_python_memory:
+                    stat["python_heap_peak"] = 0
+            stat["count"] += 1
+            stat["total_time"] += duration
+            stat["self_time"] += duration - frame.child_time
+            stat["peak_memory"] = max(stat["peak_memory"], frame.peak_memory)
+            if self.trace_python_memory:
+                stat["python_heap_peak"] = max(
+                    stat["python_heap_peak"], frame.python_heap_peak
+                )
+
+            args = {"peak_memory": frame.peak_memory}
+            if self.trace_python_memory:
+                args["python_heap_peak"] = frame.python_heap_peak
+
+            self.events.append(
+                {
+                    "name": name,
+                    "cat": category,
+                    "ph": "X",
+                    "ts": (frame.start - self.origin) * 1e6,
+                    "dur": duration * 1e6,
+                    "pid": self.pid,
+                    "tid": threading.get_ident(),
+                    "args": args,
+                }
+            )
+
+    def merge(self, data, path_prefix=""):
+        """
+        Add the sections recorded by another process (see to_dict) to this profiler.
+        """
+        for stat in data["stats"]:
+            path = path_prefix + "/" + stat["path"] if path_prefix else stat["path"]
+            own_stat = self.stats.get(path)
+            if own_stat is None:
+                self.stats[path] = dict(stat, path=path)
+                continue
+
+            own_stat["count"] += stat["count"]
+            own_stat["total_time"] += stat["total_time"]
+            own_stat["self_time"] += stat["self_time"]
+            own_stat["peak_memory"] = max(own_stat["peak_memory"], stat["peak_memory"])
+            if "python_heap_peak" in stat:
+                own_stat["python_heap_peak"] = max(
+                    own_stat.get("python_heap_peak", 0), stat["python_heap_peak"]
+                )
+
+        # Trace timestamps are relative to each profiler start, align them on ours
+        offset = (data["origin"] - self.origin) * 1e6
+        for event in data["events"]:
+            self.events.append(dict(event, ts=event["ts"] + offset))
+    # endregion
+
+    # region Reports
+    def to_dict(self):
+        return {
+            "origin": self.origin,
+            "stats": sorted(
+                self.stats.values(), key=lambda stat: stat["total_time"], reverse=True
+            ),
+            "events": self.events,
+        }
+
+    def write_report(self, folder_path, name="msfs_multi_export_profile"):
+        os.makedirs(folder_path, exist_ok=True)
+
+        report_path = os.path.join(folder_path, name + ".json")
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump({"sections": self.to_dict()["stats"]}, f, indent=4)
+
+        trace_path = os.path.join(folder_path, name + ".trace.json")
+        with open(trace_path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+        print("[ASOBO] Profiling report written to " + report_path)
+        return report_path, trace_path
+    # endregion
+
+
+def profile_section(name, category=""):
+    """
+    Time a block with the active profiler, does nothing when profiling is disabled.
+    """
+    profiler = MSFS2020_Profiler.active
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.section(name, category)
+
+
+def profiled(category):
+    """
+    Decorator timing every call of a function with the active profiler.
+    """
+
+    def decorator(function):
+        name = function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            profiler = MSFS2020_Profiler.active
+            if profiler is None:
+                return function(*args, **kwargs)
+            with profiler.section(name, category):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
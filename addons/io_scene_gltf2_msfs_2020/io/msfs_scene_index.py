@@ -0,0 +1,140 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS-2020 authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import bpy
+
+
+class MSFS2020_SceneIndex:
+    """
+    Lookup tables of the view layer, built once per multi-export run or per depsgraph
+    change for the UI, so membership, visibility and hierarchy queries don't scan the whole scene.
+    """
+
+    # (scene, view layer) pointers -> index shared by the UI until the next depsgraph update
+    cached_indices = {}
+
+    def __init__(self, context):
+        view_layer = context.view_layer
+        self.view_layer = view_layer
+
+        self.view_layer_objects = set(view_layer.objects)
+        self.collections = set(bpy.data.collections)
+
+        # Collection -> LayerCollection of the view layer
+        self.layer_collections = {}
+        stack = [view_layer.layer_collection]
+        while stack:
+            layer_collection = stack.pop()
+            self.layer_collections[layer_collection.collection] = layer_collection
+            stack.extend(layer_collection.children)
+
+        # Object -> direct children (Object.children scans every object of the file)
+        self.children = {}
+        for obj in bpy.data.objects:
+            if obj.parent is not None:
+                self.children.setdefault(obj.parent, []).append(obj)
+
+        # Object or collection -> hidden state, filled on first query
+        self.hidden_objects = {}
+        self.hidden_collections = {}
+
+    @staticmethod
+    def get(context):
+        """
+        Returns:
+            MSFS2020_SceneIndex: The index of the current view layer, rebuilt only after the scene changed
+        """
+        key = (context.scene.as_pointer(), context.view_layer.as_pointer())
+        scene_index = MSFS2020_SceneIndex.cached_indices.get(key)
+        if scene_index is None:
+            scene_index = MSFS2020_SceneIndex(context)
+            MSFS2020_SceneIndex.cached_indices[key] = scene_index
+        return scene_index
+
+    @staticmethod
+    def clear_cache():
+        MSFS2020_SceneIndex.cached_indices.clear()
+
+    def is_in_view_layer(self, obj):
+        return obj in self.view_layer_objects
+
+    def has_collection(self, collection):
+        return collection in self.collections
+
+    def get_layer_collection(self, collection):
+        return self.layer_collections.get(collection)
+
+    def is_object_hidden(self, obj):
+        hidden = self.hidden_objects.get(obj)
+        if hidden is None:
+            hidden = obj.hide_get(view_layer=self.view_layer)
+            self.hidden_objects[obj] = hidden
+        return hidden
+
+    def is_collection_hidden(self, collection):
+        # Checking visibility from the collection itself won't work,
+        # so the LayerCollection that contains the collection is used
+        hidden = self.hidden_collections.get(collection)
+        if hidden is None:
+            layer_collection = self.get_layer_collection(collection)
+            hidden = layer_collection is not None and not layer_collection.visible_get()
+            self.hidden_collections[collection] = hidden
+        return hidden
+
+    def get_children(self, obj):
+        return self.children.get(obj, [])
+
+    def get_view_layer_hierarchy(self, obj):
+        """
+        Returns:
+            list(bpy.types.Object): The object and its descendants that are in the view layer,
+            a branch stops at the first object missing from the view layer
+        """
+        objects = []
+        stack = [obj]
+        while stack:
+            obj = stack.pop()
+            if not self.is_in_view_layer(obj):
+                continue
+
+            objects.append(obj)
+            stack.extend(self.get_children(obj))
+
+        return objects
+
+
+@bpy.app.handlers.persistent
+def clear_scene_index_cache(*args):
+    MSFS2020_SceneIndex.clear_cache()
+
+
+SCENE_INDEX_CACHE_HANDLERS = (
+    bpy.app.handlers.depsgraph_update_post,
+    bpy.app.handlers.load_post,
+    bpy.app.handlers.undo_post,
+    bpy.app.handlers.redo_post,
+)
+
+
+def register():
+    for handlers in SCENE_INDEX_CACHE_HANDLERS:
+        if clear_scene_index_cache not in handlers:
+            handlers.append(clear_scene_index_cache)
+
+
+def unregister():
+    for handlers in SCENE_INDEX_CACHE_HANDLERS:
+        if clear_scene_index_cache in handlers:
+            handlers.remove(clear_scene_index_cache)
+    MSFS2020_SceneIndex.clear_cache()
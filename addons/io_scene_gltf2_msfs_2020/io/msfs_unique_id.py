@@ -12,15 +12,106 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import zlib
+
 import bpy
 from io_scene_gltf2.io.com.gltf2_io_extensions import Extension
 
+# Key of the resolver of the current export in the export settings
+RESOLVER_KEY = "msfs_unique_id_resolver"
+# Key of the duplicate unique IDs found by the export, once every node has been gathered
+DUPLICATES_KEY = "msfs_unique_id_duplicates"
+
+
+class MSFS2020_UniqueIDResolver:
+    """
+    Unique IDs given to the nodes and bones of one export.
+
+    Each object or bone is resolved once. Two of them ending up with the same ID break the
+    animation bindings in the sim, they are reported at the end of the export and,
+    if enabled, the later ones get a suffix computed from their name so it stays the same
+    from one export to the next.
+    """
+
+    def __init__(self, resolve_collisions=False):
+        self.resolve_collisions = resolve_collisions
+        # Object or bone pointer -> unique ID
+        self.unique_ids = {}
+        # Unique ID -> (object name, path) of the object or bone using it
+        self.owners = {}
+        # Unique IDs used twice, see get_duplicate_message for their content
+        self.duplicates = []
+
+    @staticmethod
+    def get_collision_id(unique_id, path, attempt):
+        key = path if attempt == 0 else f"{path}#{attempt}"
+        return "{0}_{1:08x}".format(unique_id, zlib.crc32(key.encode("utf-8")))
+
+    def resolve(self, blender_object, object_name, path):
+        key = blender_object.as_pointer()
+        unique_id = self.unique_ids.get(key)
+        if unique_id is not None:
+            return unique_id
+
+        unique_id = blender_object.name
+        if blender_object.msfs_override_unique_id:
+            unique_id = blender_object.msfs_unique_id
+
+        owner = self.owners.setdefault(unique_id, (object_name, path))
+        if owner[1] != path:
+            resolved_id = unique_id
+            if self.resolve_collisions:
+                attempt = 0
+                resolved_id = MSFS2020_UniqueIDResolver.get_collision_id(unique_id, path, attempt)
+                while self.owners.setdefault(resolved_id, (object_name, path))[1] != path:
+                    attempt += 1
+                    resolved_id = MSFS2020_UniqueIDResolver.get_collision_id(unique_id, path, attempt)
+
+            self.duplicates.append(
+                {
+                    "unique_id": unique_id,
+                    "owner_object": owner[0],
+                    "owner": owner[1],
+                    "object": object_name,
+                    "path": path,
+                    "exported_as": resolved_id,
+                }
+            )
+            unique_id = resolved_id
+
+        self.unique_ids[key] = unique_id
+        return unique_id
+
+    def resolve_object(self, blender_object):
+        return self.resolve(blender_object, blender_object.name, blender_object.name_full)
+
+    def resolve_bone(self, blender_pose_bone):
+        armature = blender_pose_bone.id_data
+        return self.resolve(
+            blender_pose_bone.bone,
+            armature.name,
+            armature.name_full + "/" + blender_pose_bone.name,
+        )
+
+    @staticmethod
+    def get_duplicate_message(duplicate):
+        message = (
+            "Unique ID " + duplicate["unique_id"] + " of " + duplicate["path"]
+            + " is already used by " + duplicate["owner"]
+        )
+        if duplicate["exported_as"] != duplicate["unique_id"]:
+            message += ", exported as " + duplicate["exported_as"]
+        return message
+
 
 class MSFS2020_unique_id:
     bl_options = {"UNDO"}
 
     extension_name = "ASOBO_unique_id"
 
+    # Duplicate unique IDs of the last export
+    last_duplicates = []
+
     def __new__(cls, *args, **kwargs):
         raise RuntimeError("%s should not be instantiated" % cls)
 
@@ -29,19 +120,49 @@ class MSFS2020_unique_id:
         pass
 
     @staticmethod
-    def export(gltf2_object, blender_object):
-        extension = {}
+    def get_resolver(export_settings):
+        resolver = export_settings.get(RESOLVER_KEY)
+        if resolver is None:
+            resolver = MSFS2020_UniqueIDResolver(
+                bpy.context.scene.msfs_exporter_settings.resolve_unique_id_collisions
+            )
+            export_settings[RESOLVER_KEY] = resolver
+        return resolver
 
-        if type(blender_object) == bpy.types.PoseBone:
-            blender_object = blender_object.bone
-            
-        uniqueID =  blender_object.name
-        if blender_object.msfs_override_unique_id:
-            uniqueID = blender_object.msfs_unique_id
-        extension["id"] = uniqueID
+    @staticmethod
+    def report_duplicates(export_settings):
+        """
+        Store the duplicate unique IDs of the export in the export settings and as the last
+        duplicates, read by the multi-exporter, and log them as warnings.
+        """
+        resolver = export_settings.pop(RESOLVER_KEY, None)
+        duplicates = resolver.duplicates if resolver is not None else []
+        export_settings[DUPLICATES_KEY] = duplicates
+        MSFS2020_unique_id.last_duplicates = duplicates
 
+        # Recent versions of the Khronos exporter report the warnings of their log when they finish
+        log = export_settings.get("log")
+        for duplicate in duplicates:
+            message = MSFS2020_UniqueIDResolver.get_duplicate_message(duplicate)
+            if log is not None and hasattr(log, "warning"):
+                log.warning(message)
+            else:
+                print("[ASOBO] " + message)
+
+    @staticmethod
+    def set_extension(gltf2_object, unique_id):
         gltf2_object.extensions[MSFS2020_unique_id.extension_name] = Extension(
             name=MSFS2020_unique_id.extension_name,
-            extension=extension,
+            extension={"id": unique_id},
             required=False
-        )
\ No newline at end of file
+        )
+
+    @staticmethod
+    def export(gltf2_object, blender_object, export_settings):
+        resolver = MSFS2020_unique_id.get_resolver(export_settings)
+        MSFS2020_unique_id.set_extension(gltf2_object, resolver.resolve_object(blender_object))
+
+    @staticmethod
+    def export_bone(gltf2_node, blender_pose_bone, export_settings):
+        resolver = MSFS2020_unique_id.get_resolver(export_settings)
+        MSFS2020_unique_id.set_extension(gltf2_node, resolver.resolve_bone(blender_pose_bone))
@@ -0,0 +1,114 @@
+# Copyright 2021-2022 The glTF-Blender-IO-MSFS-2020 authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Tests of the glTF splitter of the Single Pass Presets export. The addon modules import bpy,
+run them with the Python of Blender or with the bpy module installed:
+
+    python -m unittest discover -s tests
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "addons"))
+
+try:
+    from io_scene_gltf2_msfs_2020.io.msfs_multi_export_split import (
+        MSFS2020_GLTFSplitter,
+        get_union_folder,
+    )
+except ImportError:
+    MSFS2020_GLTFSplitter = None
+
+
+def write_textured_gltf(gltf_path):
+    # One triangle using a material with a base color texture, the image uri only holds
+    # the file name like the MSFS extension writes it
+    buffer = bytes(36)
+    gltf = {
+        "asset": {"version": "2.0"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"name": "Cube", "mesh": 0}],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0}, "material": 0}]}],
+        "materials": [{"pbrMetallicRoughness": {"baseColorTexture": {"index": 0}}}],
+        "textures": [{"source": 0}],
+        "images": [{"uri": "color.png"}],
+        "accessors": [
+            {
+                "bufferView": 0,
+                "componentType": 5126,
+                "count": 3,
+                "type": "VEC3",
+                "min": [0, 0, 0],
+                "max": [0, 0, 0],
+            }
+        ],
+        "bufferViews": [{"buffer": 0, "byteLength": len(buffer)}],
+        "buffers": [{"byteLength": len(buffer), "uri": "presets.bin"}],
+    }
+
+    folder_path = os.path.dirname(gltf_path)
+    with open(gltf_path, "w", encoding="utf-8") as f:
+        json.dump(gltf, f)
+    with open(os.path.join(folder_path, "presets.bin"), "wb") as f:
+        f.write(buffer)
+
+
+@unittest.skipIf(MSFS2020_GLTFSplitter is None, "bpy is not available")
+class MSFS2020_GLTFSplitterTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="msfs2020_split_test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_parent_texture_folder(self):
+        texture_dir = "../texture"
+        temp_dir = os.path.join(self.root, "temp")
+
+        # The combined export writes its textures to <export folder>/../texture
+        union_folder = get_union_folder(temp_dir, texture_dir)
+        union_path = os.path.join(union_folder, "presets.gltf")
+        write_textured_gltf(union_path)
+        union_texture_folder = os.path.normpath(os.path.join(union_folder, texture_dir))
+        os.makedirs(union_texture_folder)
+        with open(os.path.join(union_texture_folder, "color.png"), "wb") as f:
+            f.write(b"png")
+
+        self.assertEqual(
+            os.path.commonpath([temp_dir, union_texture_folder]), temp_dir
+        )
+
+        gltf_path = os.path.join(self.root, "Scenery", "model", "Cube.gltf")
+        MSFS2020_GLTFSplitter(union_path, texture_dir).write([0], gltf_path)
+
+        with open(gltf_path, "r", encoding="utf-8") as f:
+            gltf = json.load(f)
+        self.assertEqual(gltf["images"], [{"uri": "color.png"}])
+
+        texture_path = os.path.join(self.root, "Scenery", "texture", "color.png")
+        with open(texture_path, "rb") as f:
+            self.assertEqual(f.read(), b"png")
+        self.assertTrue(os.path.exists(os.path.join(self.root, "Scenery", "model", "Cube.bin")))
+
+
+if __name__ == "__main__":
+    unittest.main()